@@ -0,0 +1,298 @@
+from cognit.modules._async_edge_cluster_frontend_client import AsyncEdgeClusterFrontendClient
+from cognit.modules._async_cognit_frontend_client import AsyncCognitFrontendClient
+from cognit.modules._edge_cluster_frontend_client import DEFAULT_EXECUTION_TIMEOUT, is_unknown_function_error
+from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecReturnCode
+from cognit.models._cognit_frontend_client import Scheduling
+from cognit.modules._cognitconfig import CognitConfig
+from cognit.modules._logger import CognitLogger, configure_logging
+from typing import Callable
+import asyncio
+import httpx
+
+DEFAULT_CONFIG_PATH = "cognit/config/cognit_v2.yml"
+DEFAULT_MAX_IN_FLIGHT = 100
+
+class AsyncDeviceRuntime:
+
+    def __init__(self, config_path=DEFAULT_CONFIG_PATH, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> None:
+        """
+        asyncio Device Runtime creation based on the configuration file defined in config_path.
+        Unlike DeviceRuntime, it does not use any thread: every offload is a coroutine
+        running in the event loop of the application.
+
+        Args:
+            config_path (str): Path of the configuration to be applied to access
+            the Cognit Frontend
+            max_in_flight (int): Maximum number of offloads being executed at the same time
+        """
+
+        self.cognit_config = CognitConfig(config_path)
+        # Levels, log file and rotation given in the configuration file
+        configure_logging(
+            level=self.cognit_config.log_level,
+            console_level=self.cognit_config.log_console_level,
+            file=self.cognit_config.log_file,
+            max_bytes=self.cognit_config.log_max_bytes,
+            backup_count=self.cognit_config.log_backup_count,
+            rotate_interval=self.cognit_config.log_rotate_interval,
+            queue_size=self.cognit_config.log_queue_size
+        )
+        self.cognit_logger = CognitLogger()
+        self.max_in_flight = max_in_flight
+        self.current_reqs = None
+
+        # Clients, created in init()
+        self.http_client = None
+        self.insecure_http_client = None
+        self.cfc = None
+        self.ecf = None
+
+        # Created in init() to be bound to the running event loop
+        self.connect_lock = None
+        self.in_flight = None
+
+    async def init(self, init_reqs: dict) -> bool:
+        """
+        Authenticates, uploads the requirements and gets the Edge Cluster Frontend address
+
+        Args:
+            init_reqs (dict): requirements to be considered when offloading functions
+
+        Returns:
+            bool: True if the runtime is ready to offload functions, False otherwise
+        """
+
+        if self.http_client is not None:
+
+            self.cognit_logger.error("AsyncDeviceRuntime is already running")
+            return False
+
+        if init_reqs is None:
+
+            self.cognit_logger.error("init_reqs not provided")
+            return False
+
+        self.current_reqs = Scheduling(**init_reqs)
+        self.connect_lock = asyncio.Lock()
+        self.in_flight = asyncio.Semaphore(self.max_in_flight)
+
+        limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+        self.http_client = self._create_http_client(limits, verify=True)
+        self.insecure_http_client = self._create_http_client(limits, verify=False)
+
+        is_connected = await self._connect()
+
+        if is_connected:
+            self.cognit_logger.info("AsyncDeviceRuntime initialized")
+
+        return is_connected
+
+    async def stop(self) -> bool:
+        """
+        Closes the connections. Offloads still running fail.
+
+        Returns:
+            bool: True if the runtime was stopped, False if it was not running
+        """
+
+        if self.http_client is None:
+
+            self.cognit_logger.error("AsyncDeviceRuntime is not running")
+            return False
+
+        # Function IDs still held in memory are written to disk
+        if self.cfc is not None and self.cfc.function_id_cache is not None:
+            self.cfc.function_id_cache.stop()
+
+        await self.http_client.aclose()
+        await self.insecure_http_client.aclose()
+        self.http_client = None
+        self.insecure_http_client = None
+        self.cfc = None
+        self.ecf = None
+        self.cognit_logger.info("AsyncDeviceRuntime stopped")
+        return True
+
+    async def update_requirements(self, new_reqs: dict) -> bool:
+        """
+        Uploads new requirements and gets the Edge Cluster Frontend address for them
+
+        Args:
+            new_reqs (dict): new requirements to be considered when offloading functions
+
+        Returns:
+            bool: True if the requirements were updated successfully, False otherwise
+        """
+
+        if new_reqs is None:
+
+            self.cognit_logger.error("new_reqs not provided")
+            return False
+
+        if self.http_client is None:
+
+            self.cognit_logger.error("AsyncDeviceRuntime is not running")
+            return False
+
+        new_reqs = Scheduling(**new_reqs)
+
+        if self.current_reqs == new_reqs:
+
+            self.cognit_logger.error("New requirements are the same as the current ones")
+            return False
+
+        self.cognit_logger.info(f"Updating requirements from {self.current_reqs} to {new_reqs}")
+        self.current_reqs = new_reqs
+
+        # Force the offloads to wait until the new requirements are in place
+        self.ecf = None
+        return await self._connect()
+
+    async def call(self, function: Callable, *params: tuple, timeout: float = None) -> ExecResponse:
+        """
+        Offloads a function and waits for its result
+
+        Args:
+            function (Callable): The target funtion to be offloaded
+            params (List[Any]): Arguments needed to call the function
+            timeout (float, optional): Maximum time to wait for the result, including the time
+            waiting for a free slot. Defaults to None.
+
+        Returns:
+            ExecResponse: The response of the offloaded function. If the timeout expires,
+            an ExecResponse with ret_code ERROR is returned
+        """
+
+        if self.http_client is None:
+
+            self.cognit_logger.error("AsyncDeviceRuntime is not running")
+            return ExecResponse(ret_code=ExecReturnCode.ERROR, err="AsyncDeviceRuntime is not running")
+
+        try:
+
+            return await asyncio.wait_for(self._offload(function, params, timeout), timeout)
+
+        except asyncio.TimeoutError:
+
+            self.cognit_logger.error(f"Call timed out after {timeout} seconds")
+            return ExecResponse(ret_code=ExecReturnCode.ERROR, err=f"Timeout of {timeout} seconds expired")
+
+    def submit(self, function: Callable, *params: tuple, timeout: float = None) -> asyncio.Task:
+        """
+        Offloads a function without waiting for its result. Must be called from the event loop.
+
+        Args:
+            function (Callable): The target funtion to be offloaded
+            params (List[Any]): Arguments needed to call the function
+            timeout (float, optional): Maximum time for the call to be completed. Defaults to None.
+
+        Returns:
+            asyncio.Task: Awaitable that gives the ExecResponse of the call
+        """
+
+        return asyncio.create_task(self.call(function, *params, timeout=timeout))
+
+    async def _offload(self, function: Callable, params: tuple, timeout: float = None) -> ExecResponse:
+
+        async with self.in_flight:
+
+            if not await self._connect():
+                return ExecResponse(ret_code=ExecReturnCode.ERROR, err="Could not connect to COGNIT")
+
+            # Keep the clients of the moment the call started
+            cfc = self.cfc
+            ecf = self.ecf
+
+            # Fingerprinted once per call, out of the event loop
+            entry = await cfc.get_function_entry(function)
+            function_id = await cfc.upload_function_to_daas(function, entry)
+
+            if function_id is None:
+
+                self.cognit_logger.error("Function could not be uploaded")
+                return ExecResponse(ret_code=ExecReturnCode.ERROR, err="Function could not be uploaded")
+
+            result = await self._execute(ecf, function_id, cfc.get_app_requirements_id(), params, timeout)
+
+            # IDs reused from a previous process are validated by their first execution
+            if not cfc.is_function_id_verified(entry.function_hash):
+
+                # Any result but an unknown ID, failed or not, tells that the ID is valid
+                if not is_unknown_function_error(result):
+                    cfc.set_function_id_verified(entry.function_hash)
+                    return result
+
+                self.cognit_logger.warning("The DaaS does not know the cached function ID, uploading the function again")
+                cfc.forget_function(entry.function_hash)
+                function_id = await cfc.upload_function_to_daas(function, entry)
+
+                if function_id is not None:
+                    result = await self._execute(ecf, function_id, cfc.get_app_requirements_id(), params, timeout)
+
+            return result
+
+    async def _execute(self, ecf: AsyncEdgeClusterFrontendClient, function_id: int, app_req_id: int, params: tuple, timeout: float = None) -> ExecResponse:
+
+        # A hung ECF must not hold the call forever, even without a timeout given by the caller
+        timeout = timeout if timeout is not None else DEFAULT_EXECUTION_TIMEOUT
+
+        try:
+
+            return await ecf.execute_function(function_id, app_req_id, params, timeout=timeout)
+
+        except Exception as e:
+
+            self.cognit_logger.error(f"There was a request error. Detailed message: {e}")
+            return ExecResponse(ret_code=ExecReturnCode.ERROR, err=str(e))
+
+    async def _connect(self) -> bool:
+        """
+        Brings the clients to a usable state. Concurrent offloads share a single reconnection.
+
+        Returns:
+            bool: True if both clients are connected, False otherwise
+        """
+
+        async with self.connect_lock:
+
+            if self._is_connected():
+                return True
+
+            # Authenticate again if the Cognit Frontend rejected us
+            if self.cfc is None or not self.cfc.get_has_connection():
+
+                self.cfc = AsyncCognitFrontendClient(self.cognit_config, self.http_client)
+
+                if await self.cfc.authenticate() is None:
+                    return False
+
+            if not await self.cfc.init(self.current_reqs):
+
+                self.cognit_logger.error("Requirements could not be uploaded")
+                return False
+
+            address = await self.cfc.get_edge_cluster_address()
+
+            if address is None:
+                return False
+
+            self.ecf = AsyncEdgeClusterFrontendClient(self.cfc.token, address, self.http_client, self.insecure_http_client)
+            return self._is_connected()
+
+    def _is_connected(self) -> bool:
+
+        return self.cfc is not None and self.cfc.get_has_connection() \
+            and self.ecf is not None and self.ecf.get_has_connection()
+
+    def _create_http_client(self, limits: httpx.Limits, verify: bool) -> httpx.AsyncClient:
+
+        return httpx.AsyncClient(limits=limits, verify=verify, timeout=None)
+
+    async def __aenter__(self):
+
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+
+        if self.http_client is not None:
+            await self.stop()
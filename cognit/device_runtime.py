@@ -1,13 +1,17 @@
-from cognit.models._device_runtime import Call, FunctionLanguage, ExecResponse, ExecutionMode
-from cognit.modules._sync_result_queue import SyncResultQueue
+from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecReturnCode
+from cognit.models._device_runtime import Call, FunctionLanguage, ExecutionMode
 from cognit.models._cognit_frontend_client import Scheduling
 from cognit.modules._sm_handler import StateMachineHandler
 from cognit.modules._cognitconfig import CognitConfig
 from cognit.modules._call_queue import CallQueue
-from cognit.modules._logger import CognitLogger
+from cognit.modules._call_timings import CallStats
+from cognit.modules._metrics import MetricsServer, metrics
+from cognit.modules._logger import CognitLogger, configure_logging
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from threading import Thread
-from typing import Callable
+from typing import Callable, Any
 import signal
+import time
 import sys
 
 DEFAULT_CONFIG_PATH = "cognit/config/cognit_v2.yml"
@@ -24,13 +28,30 @@ class DeviceRuntime:
         """
         
         self.cognit_config = CognitConfig(config_path)
-        self.sync_result_queue = SyncResultQueue()
+        # Levels, log file and rotation given in the configuration file
+        configure_logging(
+            level=self.cognit_config.log_level,
+            console_level=self.cognit_config.log_console_level,
+            file=self.cognit_config.log_file,
+            max_bytes=self.cognit_config.log_max_bytes,
+            backup_count=self.cognit_config.log_backup_count,
+            rotate_interval=self.cognit_config.log_rotate_interval,
+            queue_size=self.cognit_config.log_queue_size
+        )
         self.cognit_logger = CognitLogger()
         self.call_queue = CallQueue()
+        # Kept across restarts of the state machine
+        self.call_stats = CallStats()
         self.current_reqs = None
         self.sm_handler = None
         self.sm_thread = None
 
+        # Serves the metrics while the runtime is running, if a port is configured
+        self.metrics_server = None
+
+        if self.cognit_config.metrics_port > 0:
+            self.metrics_server = MetricsServer(metrics, self.cognit_config.metrics_host, self.cognit_config.metrics_port)
+
     def init(self, init_reqs: dict) -> bool:
         """
         Launches SM thread 
@@ -68,7 +89,7 @@ class DeviceRuntime:
         # State machine initialization
         if self.sm_handler == None:
 
-            self.sm_handler = StateMachineHandler(self.cognit_config, self.current_reqs, self.call_queue, self.sync_result_queue)
+            self.sm_handler = StateMachineHandler(self.cognit_config, self.current_reqs, self.call_queue, self.call_stats)
 
         # Launch SM thread
         try:
@@ -80,13 +101,22 @@ class DeviceRuntime:
         except Exception as e:
 
             raise Exception(f"DeviceRuntime could not be initialized: {e}")
+
+        if self.metrics_server is not None:
+
+            try:
+                self.metrics_server.start()
+            except OSError as e:
+                # The runtime works without them
+                self.cognit_logger.error(f"Metrics could not be served: {e}")
         
         self.cognit_logger.info("DeviceRuntime initialized")
         return True
     
     def stop(self) -> bool:
         """
-        Stops the SM thread
+        Stops the SM thread. The calls still queued get an ERROR result, and no call is
+        accepted until init() is called again
 
         Returns:
             bool: True if the SM thread was stopped successfully, False otherwise
@@ -102,6 +132,10 @@ class DeviceRuntime:
         self.sm_thread.join()
         self.sm_thread = None
         self.sm_handler = None
+
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+
         self.cognit_logger.info("DeviceRuntime stopped")
         return True
     
@@ -149,21 +183,24 @@ class DeviceRuntime:
         self.current_reqs = new_reqs
         return True
 
-    def call_async(self, function: Callable, callback: Callable, *params: tuple) -> bool:
+    def call_async(self, function: Callable, callback: Callable, *params: tuple, callback_key: Any = None) -> bool:
         """
-        Offloads a function asynchronously
+        Offloads a function asynchronously. The callback runs in a pool of threads
+        of its own, so a slow callback does not delay other offloads.
 
         Args:
             function (Callable): The target funtion to be offloaded
             callback (Callable): The callback function to be executed after the offloaded function finishes
             params (List[Any]): Arguments needed to call the function
+            callback_key (Any, optional): Callbacks of the calls with the same key are run one after
+            another in submission order. Defaults to None, which gives no ordering.
 
         Returns:
             bool: True if the function was added to the queue successfully, False otherwise
         """
 
         # Create a Call object
-        call = Call(function=function, fc_lang=FunctionLanguage.PY, mode=ExecutionMode.ASYNC, callback=callback, params=params, timeout=None)
+        call = Call(function=function, fc_lang=FunctionLanguage.PY, mode=ExecutionMode.ASYNC, callback=callback, callback_key=callback_key, params=params, timeout=None)
 
         # Add the call to the queue
         if self.call_queue.add_call(call):
@@ -176,31 +213,138 @@ class DeviceRuntime:
             self.cognit_logger.error("Function could not be added to the queue")
             return False
         
-    def call(self, function: Callable, *params: tuple, timeout: int = None) -> ExecResponse:
+    def submit(self, function: Callable, *params: tuple, timeout: float = None) -> Future:
+        """
+        Offloads a function without waiting for its result
+
+        Args:
+            function (Callable): The target funtion to be offloaded
+            params (List[Any]): Arguments needed to call the function
+            timeout (float, optional): Maximum time for the call to be queued, uploaded and executed.
+            Defaults to None.
+
+        Returns:
+            Future: Handle that gives the ExecResponse of this call, with the time spent in each phase
+            in its timings attribute. None if the call could not be queued
+        """
+
+        call = self._submit_call(function, params, timeout)
+
+        return call.future if call is not None else None
+
+    def call(self, function: Callable, *params: tuple, timeout: float = None) -> ExecResponse:
         """
-        Offloads a function synchronously
+        Offloads a function synchronously. It is safe to be called from several threads at the same time
 
         Args:
             function (Callable): The target funtion to be offloaded
             params (List[Any]): Arguments needed to call the function
-            timeout (int, optional): Maximum time to wait for the result. Defaults to None.
+            timeout (float, optional): Maximum time to wait for the result, including the time
+            the call spends in the queue. Defaults to None.
+
+        Returns:
+            ExecResponse: The response of the offloaded function, with the milliseconds spent in each
+            phase of the offload in its timings attribute. If the timeout expires, an ExecResponse
+            with ret_code ERROR is returned
+        """
+
+        call = self._submit_call(function, params, timeout)
+
+        if call is None:
+            return None
+
+        try:
+
+            # Wait for the result of this call
+            return call.future.result(timeout)
+
+        except FutureTimeoutError:
+
+            # Withdraw the call so that it does not take an ECF slot later
+            if call.future.cancel():
+                self.call_queue.remove_call(call)
+
+            self.cognit_logger.error(f"Call timed out after {timeout} seconds")
+            return ExecResponse(ret_code=ExecReturnCode.ERROR, err=f"Timeout of {timeout} seconds expired")
+
+    def get_callback_metrics(self) -> dict:
+        """
+        Returns the metrics of the pool that runs the call_async() callbacks
+
+        Returns:
+            dict: Callbacks queued and running and time spent in them, None if the runtime is not running
+        """
+
+        if self.sm_handler is None:
+            return None
+
+        return self.sm_handler.sm.callback_executor.get_metrics()
+
+    def get_latency_stats(self) -> dict:
+        """
+        Returns the latency of the Edge Clusters known to the runtime
+
+        Returns:
+            dict: Per Edge Cluster address, EWMA, p50, p95 and p99 in milliseconds of the network
+            latency and of the round trip of the calls, None if the runtime is not running
+        """
+
+        if self.sm_handler is None:
+            return None
+
+        return self.sm_handler.sm.latency_monitor.get_stats()
+
+    def stats(self) -> dict:
+        """
+        Returns the time spent by the finished calls in each phase of the offload: queue_wait,
+        function_serialization, upload, params_serialization, execute (round trip to the Edge
+        Cluster, execution included), response_parsing, result_deserialization and total
+
+        Returns:
+            dict: Per function and phase, number of calls and mean, p50, p95, p99 and maximum
+            duration in milliseconds
+        """
+
+        return self.call_stats.get_stats()
+
+    def get_metrics(self) -> str:
+        """
+        Returns the metrics of the runtime in the Prometheus text exposition format: queue depth
+        and rejections, calls in flight, duration of the requests to each Edge Cluster, function
+        ID cache hits and uploads, state machine transitions and re-inits, token refreshes and
+        bytes sent and received
+
+        Returns:
+            str: Metrics, one sample per line
+        """
+
+        return metrics.render()
+
+    def _submit_call(self, function: Callable, params: tuple, timeout: float) -> Call:
+        """
+        Creates a SYNC call and adds it to the queue
+
+        Args:
+            function (Callable): The target funtion to be offloaded
+            params (tuple): Arguments needed to call the function
+            timeout (float): Maximum time for the call to be completed, None for no limit
 
         Returns:
-            ExecResponse: The response of the offloaded function
+            Call: The queued call, None if it could not be added to the queue
         """
 
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
         # Create a Call object
-        call = Call(function=function, fc_lang=FunctionLanguage.PY, mode=ExecutionMode.SYNC, callback=None, params=params, timeout=timeout)
+        call = Call(function=function, fc_lang=FunctionLanguage.PY, mode=ExecutionMode.SYNC, callback=None, params=params, timeout=timeout, deadline=deadline)
 
         # Add the call to the queue
         if self.call_queue.add_call(call):
 
             self.cognit_logger.debug("Function added to the queue")
+            return call
 
         else:
 
             self.cognit_logger.error("Function could not be added to the queue")
             return None
-        
-        # Wait for the result
-        return self.sync_result_queue.get_sync_result()
\ No newline at end of file
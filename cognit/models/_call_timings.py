@@ -0,0 +1,62 @@
+import time
+
+# Phases of an offload, in the order they happen
+QUEUE_WAIT = "queue_wait"
+FUNCTION_SERIALIZATION = "function_serialization"
+UPLOAD = "upload"
+PARAMS_SERIALIZATION = "params_serialization"
+EXECUTE = "execute"
+RESPONSE_PARSING = "response_parsing"
+RESULT_DESERIALIZATION = "result_deserialization"
+TOTAL = "total"
+
+PHASES = (QUEUE_WAIT, FUNCTION_SERIALIZATION, UPLOAD, PARAMS_SERIALIZATION, EXECUTE, RESPONSE_PARSING, RESULT_DESERIALIZATION, TOTAL)
+
+"""
+Time spent by a single call in each phase of its offload. Every phase is recorded with
+the time.monotonic() values of its start and end; a phase run several times, as the
+execution of a call that fails over to another Edge Cluster, adds up its durations.
+"""
+class CallTimings:
+
+    def __init__(self):
+
+        self.created_at = time.monotonic()
+        self.finished_at = None
+        # (phase, start, end) in the order they were recorded
+        self.spans = []
+
+    def record(self, phase: str, start: float, end: float = None):
+        """
+        Records a phase that started at the given time.monotonic() value
+
+        Args:
+            phase (str): Name of the phase
+            start (float): time.monotonic() when the phase started
+            end (float): time.monotonic() when the phase ended, now by default
+        """
+
+        self.spans.append((phase, start, time.monotonic() if end is None else end))
+
+    def finish(self):
+        """
+        Marks the call as finished, the total goes from its creation to now
+        """
+
+        if self.finished_at is None:
+            self.finished_at = time.monotonic()
+
+    def get_durations(self) -> dict[str, float]:
+        """
+        Returns the milliseconds spent in each phase recorded, and in total if the call has finished
+        """
+
+        durations = {}
+
+        for phase, start, end in self.spans:
+            durations[phase] = durations.get(phase, 0.0) + (end - start) * 1000
+
+        if self.finished_at is not None:
+            durations[TOTAL] = (self.finished_at - self.created_at) * 1000
+
+        return durations
@@ -1,6 +1,9 @@
+from cognit.models._call_timings import CallTimings
 from typing import Callable, List, Any
 from pydantic import BaseModel, Field
+from concurrent.futures import Future
 from enum import Enum
+import time
 
 class ExecReturnCode(Enum):
     SUCCESS = 0
@@ -21,14 +24,41 @@ class Call(BaseModel):
         description="The language of the offloaded function 'PY' or 'C'")
     callback: Callable | None = Field(
         description="The callback function to be executed after the offloaded function finishes")
+    callback_key: Any = Field(
+        default=None,
+        description="Callbacks of the calls with the same key are run in submission order",
+    )
     mode: ExecutionMode = Field(
         description="The mode of execution of the offloaded function (SYNC or ASYNC)")
     params: List[Any] = Field(
         description="A list containing the function parameters encoded in base64")
-    timeout: int | None = Field(
+    timeout: float | None = Field(
         default=None,
         description="The timeout for the offloaded function execution in seconds",
     )
+    deadline: float | None = Field(
+        default=None,
+        description="time.monotonic() value after which the caller no longer waits for the result",
+    )
+    future: Future = Field(
+        default_factory=Future,
+        description="Handle through which the result is delivered to the caller",
+    )
+    timings: CallTimings = Field(
+        default_factory=CallTimings,
+        description="Time spent in each phase of the offload, it starts when the call is created",
+    )
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def get_remaining_time(self) -> float | None:
+        """
+        Returns the seconds left until the deadline, None if the call has no deadline
+        """
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
     
 class ExecResponse(BaseModel):
     ret_code: ExecReturnCode = Field(
@@ -42,4 +72,8 @@ class ExecResponse(BaseModel):
     err: str | None = Field(
         default=None,
         description="Offloaded function execution error description",
+    )
+    timings: dict[str, float] | None = Field(
+        default=None,
+        description="Milliseconds spent in each phase of the offload, set by the Device Runtime",
     )
\ No newline at end of file
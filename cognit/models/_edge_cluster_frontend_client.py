@@ -30,6 +30,10 @@ class ExecResponse(BaseModel):
         default=None,
         description="Offloaded function execution error description",
     )
+    timings: dict[str, float] | None = Field(
+        default=None,
+        description="Milliseconds spent in each phase of the offload, set by the Device Runtime",
+    )
 class AsyncExecStatus(Enum):
     WORKING = "WORKING"
     READY = "READY"
@@ -0,0 +1,329 @@
+from cognit.models._cognit_frontend_client import Scheduling
+from cognit.modules._cognit_frontend_client import parse_edge_cluster_frontends, get_upload_function_data
+from cognit.modules._latency_calculator import LatencyCalculator
+from cognit.modules._function_registry import function_registry, RegisteredFunction
+from cognit.modules._function_id_cache import get_function_id_cache
+from cognit.modules._cognitconfig import CognitConfig
+from cognit.modules._logger import CognitLogger
+from typing import Callable
+import asyncio
+import httpx
+
+"""
+asyncio counterpart of CognitFrontendClient. All the requests are sent through
+a shared httpx.AsyncClient so that they do not block the event loop. Functions
+are fingerprinted and serialized in a worker thread for the same reason.
+"""
+class AsyncCognitFrontendClient:
+
+    def __init__(self, config: CognitConfig, http_client: httpx.AsyncClient):
+        """
+        Args:
+            config: CognitConfig object containing a valid Cognit user and pwd
+            http_client: Client used to send the requests. It is not closed by this class
+        """
+
+        self.config = config
+        self.endpoint = self.config.cognit_frontend_engine_endpoint
+        self.http_client = http_client
+        self.latency_calculator = LatencyCalculator(self.config.latency_probe_samples, self.config.latency_probe_timeout)
+        self.is_max_latency_activated = False
+        self.logger = CognitLogger()
+        self._has_connection = False
+        self.app_req_id = None
+        self.token = None
+
+        # Storage
+        self.offloaded_funs_hash_map = {}
+        self.pending_uploads = {}
+        self.available_ecfs = []
+
+        # IDs of the functions uploaded by previous processes, they are only valid for this endpoint and user
+        self.function_id_cache = None
+        self.function_id_cache_namespace = f"{self.endpoint}|{self.config.cognit_frontend_engine_cfe_usr}"
+
+        if self.config.function_id_cache_path:
+            self.function_id_cache = get_function_id_cache(self.config.function_id_cache_path, self.config.function_id_cache_size)
+
+    async def authenticate(self) -> str:
+        """
+        Authenticate against Cognit FE to get a valid JWT Token
+
+        Returns:
+            Token: JSON dict containing the JWT Token, None if the authentication failed
+        """
+
+        self.logger.debug(f"Requesting token for {self.config._cognit_frontend_engine_usr}")
+        uri = f'{self.endpoint}/v1/authenticate'
+        auth = (self.config._cognit_frontend_engine_usr, self.config.cognit_frontend_engine_cfe_pwd)
+
+        try:
+
+            response = await self.http_client.post(uri, auth=auth)
+
+        except httpx.HTTPError as e:
+
+            self.logger.critical(f"Token creation failed with exception: {e}")
+            self.set_has_connection(False)
+            return None
+
+        if response.status_code not in [200, 201]:
+
+            self.logger.critical(f"Token creation failed with status code: {response.status_code}")
+            self.set_has_connection(False)
+            return None
+
+        self.token = response.json()
+        self.set_has_connection(self.token is not None)
+        return self.token
+
+    async def init(self, reqs: Scheduling) -> bool:
+        """
+        Creates or updates the application requirements in the Cognit Frontend Engine.
+
+        Args:
+            reqs: 'Scheduling' object containing the requirements of the app
+
+        Returns:
+            True if the requirements were uploaded, False otherwise
+        """
+
+        if self.token is None:
+            self.logger.debug("Token is None, setting connection to False")
+            self.set_has_connection(False)
+            return False
+
+        if reqs.GEOLOCATION is None:
+            self.logger.error("GEOLOCATION is required to initialize Cognit")
+            return False
+
+        self.is_max_latency_activated = reqs.MAX_LATENCY is not None
+        header = self.get_header(self.token)
+        data = reqs.json(exclude_unset=True)
+
+        try:
+
+            if self.app_req_id is None:
+
+                uri = f'{self.endpoint}/v1/app_requirements'
+                self.logger.debug(f"Application requirements do not exist, creating them at {uri}")
+                response = await self.http_client.post(uri, headers=header, content=data)
+
+                if response.status_code == 200:
+                    self.app_req_id = response.json()
+
+            else:
+
+                uri = f'{self.endpoint}/v1/app_requirements/{self.app_req_id}'
+                self.logger.debug(f"Application requirements already exist, updating them at {uri}")
+                response = await self.http_client.put(uri, headers=header, content=data)
+
+        except httpx.HTTPError as e:
+
+            self.logger.error(f"Error in app requirements creation: {e}")
+            self.set_has_connection(False)
+            return False
+
+        if response.status_code != 200:
+            self.logger.error(f"App requirements upload returned {response.status_code}: {response.text}")
+
+        self.set_has_connection(response.status_code < 400)
+        return response.status_code == 200 and bool(self.app_req_id)
+
+    async def get_edge_cluster_address(self) -> str:
+        """
+        Gets the address of the Edge Cluster Frontend Engine with the lowest latency (If max latency is activated)
+        or the first one available otherwise.
+
+        Returns:
+            The address of the Edge Cluster Frontend Engine, None if none is available.
+        """
+
+        uri = f'{self.endpoint}/v1/app_requirements/{self.app_req_id}/ec_fe'
+
+        try:
+
+            response = await self.http_client.get(uri, headers=self.get_header(self.token))
+
+        except httpx.HTTPError as e:
+
+            self.logger.error(f"Error in getting Edge Cluster Frontend Engine addresses: {e}")
+            self.set_has_connection(False)
+            return None
+
+        self.set_has_connection(response.status_code < 400)
+
+        if response.status_code >= 300:
+            self.logger.warning(f"Getting Edge Cluster Frontend Engines returned {response.status_code}")
+            return None
+
+        self.available_ecfs = parse_edge_cluster_frontends(response.json(), self.logger)
+
+        if not self.available_ecfs:
+
+            self.logger.error("No Edge Cluster Frontend Engines available")
+            return None
+
+        if self.is_max_latency_activated:
+
+            # The latency calculator blocks, keep it out of the event loop
+            cluster_latencies = await asyncio.to_thread(self.latency_calculator.get_latency_for_clusters, self.available_ecfs)
+            cluster_latencies = {k: v for k, v in cluster_latencies.items() if k in self.available_ecfs}
+
+            if cluster_latencies:
+                return min(cluster_latencies, key=cluster_latencies.get)
+
+            self.logger.error("No valid latencies found for Edge Cluster Frontend Engines")
+            return None
+
+        return self.available_ecfs[0]
+
+    async def get_function_entry(self, function: Callable) -> RegisteredFunction:
+        """
+        Fingerprints the function out of the event loop, as it walks the whole function
+
+        Args:
+            function: Function to be offloaded
+
+        Returns:
+            Entry of the function in the function registry, with its hash
+        """
+
+        return await asyncio.to_thread(function_registry.get_entry, function)
+
+    async def upload_function_to_daas(self, function: Callable, entry: RegisteredFunction = None) -> int:
+        """
+        Serializes the function and uploads it to the Daas Gateway if it was not uploaded before
+
+        Args:
+            function: Function to be serialized and uploaded
+            entry: Entry of the function returned by get_function_entry(), fingerprinted now if None
+
+        Returns:
+            The ID of the function in the Daas Gateway if successful, None otherwise
+        """
+
+        entry = entry if entry is not None else await self.get_function_entry(function)
+        function_hash = entry.function_hash
+
+        if function_hash in self.offloaded_funs_hash_map:
+            self.logger.debug("Function already in local HASH map")
+            return self.offloaded_funs_hash_map[function_hash]
+
+        # Reuse the ID given to a previous process, it is validated by the first execution
+        if self.function_id_cache is not None:
+
+            function_id = self.function_id_cache.get(self.function_id_cache_namespace, function_hash)
+
+            if function_id is not None:
+                self.offloaded_funs_hash_map[function_hash] = function_id
+                return function_id
+
+        # Concurrent offloads of the same function share a single upload
+        upload = self.pending_uploads.get(function_hash)
+
+        if upload is None:
+            upload = asyncio.ensure_future(self._upload(function, entry))
+            self.pending_uploads[function_hash] = upload
+
+        # A cancelled caller must not cancel the upload awaited by the others
+        return await asyncio.shield(upload)
+
+    async def _upload(self, function: Callable, entry: RegisteredFunction) -> int:
+
+        function_hash = entry.function_hash
+
+        try:
+
+            # The function is pickled once per process, and so is its JSON body
+            data = await asyncio.to_thread(lambda: get_upload_function_data(function, entry).json())
+
+            uri = f'{self.endpoint}/v1/daas/upload'
+
+            try:
+
+                response = await self.http_client.post(uri, headers=self.get_header(self.token), content=data)
+
+            except httpx.HTTPError as e:
+
+                self.logger.error(f"Error uploading function: {e}")
+                return None
+
+            if response.status_code != 200:
+                self.logger.error(f"Function upload returned {response.status_code}: {response.text}")
+                return None
+
+            function_id = response.json()
+            self.offloaded_funs_hash_map[function_hash] = function_id
+
+            if self.function_id_cache is not None:
+                self.function_id_cache.put(self.function_id_cache_namespace, function_hash, function_id)
+
+            return function_id
+
+        finally:
+
+            self.pending_uploads.pop(function_hash, None)
+
+    def is_function_id_verified(self, function_hash: str) -> bool:
+        """
+        Checks if the ID of the function is known to be valid, that is, it was not
+        taken from the function ID cache or an execution has already accepted it.
+        The function is given by its hash, so it is not fingerprinted on the event loop
+        """
+
+        if self.function_id_cache is None:
+            return True
+
+        return self.function_id_cache.is_verified(self.function_id_cache_namespace, function_hash)
+
+    def set_function_id_verified(self, function_hash: str):
+        """
+        Records that an execution accepted the ID of the function given by its hash
+        """
+
+        if self.function_id_cache is not None:
+            self.function_id_cache.set_verified(self.function_id_cache_namespace, function_hash)
+
+    def forget_function(self, function_hash: str):
+        """
+        Forgets the ID of the function given by its hash so that the next offload uploads it again
+        """
+
+        self.offloaded_funs_hash_map.pop(function_hash, None)
+
+        if self.function_id_cache is not None:
+            self.function_id_cache.remove(self.function_id_cache_namespace, function_hash)
+
+    def get_header(self, token: str) -> dict:
+        """
+        Returns the header for the requests
+
+        Args:
+            token (str): Token for the communication with the Cognit Frontend
+
+        Returns:
+            dict: Dictionary with the header
+        """
+
+        return {
+            "token": token
+        }
+
+    def get_has_connection(self) -> bool:
+        """
+        Returns the connection status of the client
+        """
+        return self._has_connection
+
+    def set_has_connection(self, new_value: bool):
+        """
+        Sets the connection status of the client
+        """
+        self._has_connection = new_value
+
+    def get_app_requirements_id(self) -> int:
+        """
+        Get the app requirements id of the function
+        """
+        return self.app_req_id
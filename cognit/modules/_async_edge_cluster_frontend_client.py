@@ -0,0 +1,112 @@
+from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecutionMode
+from cognit.modules._edge_cluster_frontend_client import UNKNOWN_FUNCTION_STATUS_CODE, DEFAULT_EXECUTION_TIMEOUT, get_unknown_function_response, \
+    get_execute_uri, get_execute_qparams, serialize_params, parse_exec_response, deserialize_result
+from cognit.modules._tls_verification import tls_verification_cache
+from cognit.modules._faas_parser import FaasParser
+from cognit.modules._logger import CognitLogger
+import asyncio
+import httpx
+
+"""
+asyncio counterpart of EdgeClusterFrontendClient. Each execution is a single
+awaitable request, so many of them can be in flight from one event loop. The
+parameters and the result are (de)serialized in a worker thread, so a large
+payload does not stall the other coroutines.
+"""
+class AsyncEdgeClusterFrontendClient:
+
+    def __init__(self, token: str, address: str, http_client: httpx.AsyncClient, insecure_http_client: httpx.AsyncClient):
+        """
+        Args:
+            token (str): Token for the communication between the client and the Edge Cluster Frontend
+            address (str): address of the Edge Cluster Frontend
+            http_client (httpx.AsyncClient): Client that verifies the TLS certificates
+            insecure_http_client (httpx.AsyncClient): Client used when the Edge Cluster has a self-signed certificate
+        """
+
+        self.logger = CognitLogger()
+        self.parser = FaasParser()
+        self.http_client = http_client
+        self.insecure_http_client = insecure_http_client
+        self.set_has_connection(token is not None and address is not None)
+
+        if token is None:
+            self.logger.error("Token is Null")
+
+        if address is None:
+            self.logger.error("Address is not given")
+
+        self.token = token
+        self.address = address
+
+    async def execute_function(self, func_id: str, app_req_id: int, params_tuple: tuple, timeout: float = DEFAULT_EXECUTION_TIMEOUT) -> ExecResponse:
+        """
+        Executes a function described by its id and waits for its result
+
+        Args:
+            func_id (str): Identifier of the function to be executed
+            app_req_id (int): Identifier of the requirements associated to the function
+            params_tuple (tuple): Arguments needed to call the function
+            timeout (float): Maximum time in seconds for the request
+
+        Returns:
+            ExecResponse: Result of the execution with the result already deserialized
+        """
+
+        self.logger.debug(f"Execute function with ID {func_id}")
+        uri = get_execute_uri(self.address, func_id)
+        header = {"token": self.token}
+        qparams = get_execute_qparams(app_req_id, ExecutionMode.SYNC)
+        data = await asyncio.to_thread(serialize_params, self.parser, params_tuple)
+
+        try:
+
+            # Go straight to the client that worked for this host
+            if not tls_verification_cache.is_verified(uri):
+                response = await self.insecure_http_client.post(uri, headers=header, params=qparams, content=data, timeout=timeout)
+            else:
+                try:
+                    response = await self.http_client.post(uri, headers=header, params=qparams, content=data, timeout=timeout)
+                except httpx.ConnectError as e:
+                    if "CERTIFICATE_VERIFY_FAILED" not in str(e):
+                        raise e
+                    self.logger.info(f"SSL certificate verification failed, sending the next requests without verification for URI: {uri}")
+                    tls_verification_cache.set_unverified(uri)
+                    response = await self.insecure_http_client.post(uri, headers=header, params=qparams, content=data, timeout=timeout)
+
+            # The ECF is reachable, only the function ID is unknown to it
+            if response.status_code == UNKNOWN_FUNCTION_STATUS_CODE:
+                return get_unknown_function_response(func_id)
+
+            response.raise_for_status()
+
+        except httpx.ReadTimeout as e:
+            # The ECF accepted the request but did not answer before the deadline
+            self.logger.error(f"Timeout during execution: {e}")
+            raise e
+
+        except httpx.HTTPError as e:
+            self.logger.error(f"Error during execution: {e}")
+            self.set_has_connection(False)
+            raise e
+
+        # Parse the response to an ExecResponse model and deserialize the result
+        return await asyncio.to_thread(self._parse_response, response)
+
+    def _parse_response(self, response: httpx.Response) -> ExecResponse:
+
+        return deserialize_result(self.parser, parse_exec_response(response.json()))
+
+    def get_has_connection(self) -> bool:
+        """
+        Getter for the connection status
+        """
+
+        return self._has_connection
+
+    def set_has_connection(self, is_connected: bool):
+        """
+        Setter for the connection status
+        """
+
+        self._has_connection = is_connected
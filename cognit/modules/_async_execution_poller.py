@@ -0,0 +1,214 @@
+from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecReturnCode, AsyncExecStatus, AsyncExecId
+from cognit.modules._edge_cluster_frontend_client import EdgeClusterFrontendClient
+from cognit.modules._logger import CognitLogger
+from cognit.models._device_runtime import Call
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Condition, Event
+from typing import Callable
+import time
+
+# Consecutive failed status requests after which an execution is given up
+MAX_STATUS_ERRORS = 3
+
+# Seconds a status request waits for the ECF, less if the deadline of the call is closer
+STATUS_REQUEST_TIMEOUT = 10
+
+DEFAULT_POLL_CONCURRENCY = 4
+
+"""
+Collects the results of the executions submitted in ASYNC mode. A single thread
+sweeps all the outstanding executions every poll_interval seconds, so a long
+function does not hold a connection nor a dispatcher thread while it runs. The
+status requests of a sweep are sent concurrently, so a sweep takes about one
+round trip whatever the number of executions.
+"""
+class AsyncExecutionPoller:
+
+    def __init__(self, on_result: Callable[[Call, ExecResponse], None], poll_interval: float = 0.5, concurrency: int = DEFAULT_POLL_CONCURRENCY,
+                 on_release: Callable[[EdgeClusterFrontendClient], None] = None):
+        """
+        Args:
+            on_result (Callable): Function called with the call and its ExecResponse once the execution finishes
+            poll_interval (float): Seconds between two sweeps of the outstanding executions
+            concurrency (int): Maximum number of status requests sent at the same time
+            on_release (Callable): Function called with the client of the ECF once one of its executions
+            leaves the poller, whatever the outcome, e.g. to give its slot back to the balancer
+        """
+
+        self.on_result = on_result
+        self.on_release = on_release
+        self.poll_interval = poll_interval
+        self.concurrency = max(1, concurrency)
+        self.logger = CognitLogger()
+
+        self.condition = Condition()
+        self.stop_event = Event()
+        self.running = False
+        self.thread = None
+        self.executor = None
+
+        # Executions waiting for a result: faas_task_uuid -> [ecf, exec_id, call, errors]
+        self.outstanding = {}
+
+    def start(self):
+        """
+        Launches the polling thread
+        """
+
+        if self.running:
+            return
+
+        self.running = True
+        self.stop_event.clear()
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="cognit-async-poller")
+        self.thread = Thread(target=self._poll, name="cognit-async-poller")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the polling thread. The outstanding executions are completed with an ERROR
+        result, so that no caller waits for them forever.
+        """
+
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+        self.stop_event.set()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+        with self.condition:
+            pending = list(self.outstanding.items())
+
+        for task_uuid, (_, _, call, _) in pending:
+            self._finish(task_uuid, call, ExecResponse(ret_code=ExecReturnCode.ERROR, err=f"The Device Runtime stopped before execution {task_uuid} finished"))
+
+    def add(self, ecf: EdgeClusterFrontendClient, exec_id: AsyncExecId, call: Call):
+        """
+        Registers an execution whose result must be collected
+
+        Args:
+            ecf (EdgeClusterFrontendClient): Client of the ECF running the execution
+            exec_id (AsyncExecId): Identifier returned by the ECF
+            call (Call): Call that originated the execution
+        """
+
+        with self.condition:
+            self.outstanding[exec_id.faas_task_uuid] = [ecf, exec_id, call, 0]
+            self.condition.notify()
+
+    def __len__(self):
+        """
+        Returns the number of executions waiting for a result
+        """
+
+        return len(self.outstanding)
+
+    def _poll(self):
+
+        while True:
+
+            with self.condition:
+
+                # Sleep without wakeups while there is nothing to collect
+                while self.running and not self.outstanding:
+                    self.condition.wait()
+
+                if not self.running:
+                    return
+
+            # Give the executions time to progress
+            if self.stop_event.wait(self.poll_interval):
+                return
+
+            with self.condition:
+                pending = list(self.outstanding.items())
+
+            checks = []
+
+            for task_uuid, (ecf, exec_id, call, _) in pending:
+
+                # The caller no longer waits for this result
+                if call.deadline is not None and call.get_remaining_time() <= 0:
+                    self._finish(task_uuid, call, ExecResponse(ret_code=ExecReturnCode.ERROR, err=f"Timeout of {call.timeout} seconds expired before execution {task_uuid} finished"))
+                    continue
+
+                # Requests are sent without holding the lock so that add() never blocks
+                checks.append(self.executor.submit(self._check, task_uuid, ecf, exec_id, call))
+
+            # The next sweep starts once every request of this one is answered
+            for check in checks:
+                check.result()
+
+    def _check(self, task_uuid: str, ecf: EdgeClusterFrontendClient, exec_id: AsyncExecId, call: Call):
+
+        timeout = STATUS_REQUEST_TIMEOUT
+
+        if call.deadline is not None:
+            timeout = max(0.001, min(timeout, call.get_remaining_time()))
+
+        try:
+
+            status = ecf.get_async_execution_status(exec_id, timeout)
+
+        except Exception as e:
+
+            with self.condition:
+                entry = self.outstanding.get(task_uuid)
+                if entry is None:
+                    return
+                entry[3] += 1
+                errors = entry[3]
+
+            self.logger.error(f"Error getting status of execution {task_uuid} ({errors}/{MAX_STATUS_ERRORS}): {e}")
+
+            if errors >= MAX_STATUS_ERRORS:
+                self._finish(task_uuid, call, ExecResponse(ret_code=ExecReturnCode.ERROR, err=f"Status of execution {task_uuid} could not be retrieved: {e}"))
+
+            return
+
+        if status.status == AsyncExecStatus.WORKING:
+
+            with self.condition:
+                entry = self.outstanding.get(task_uuid)
+                if entry is not None:
+                    entry[3] = 0
+
+            return
+
+        if status.status == AsyncExecStatus.READY and status.res is not None:
+            result = status.res
+        else:
+            result = ExecResponse(ret_code=ExecReturnCode.ERROR, err=f"Execution {task_uuid} failed")
+
+        self._finish(task_uuid, call, result)
+
+    def _finish(self, task_uuid: str, call: Call, result: ExecResponse):
+
+        with self.condition:
+
+            # Delivered once, whoever finishes it first
+            entry = self.outstanding.pop(task_uuid, None)
+
+            if entry is None:
+                return
+
+        if self.on_release is not None:
+
+            try:
+                self.on_release(entry[0])
+            except Exception as e:
+                self.logger.error(f"Error releasing the Edge Cluster Frontend of execution {task_uuid}: {e}")
+
+        try:
+            self.on_result(call, result)
+        except Exception as e:
+            self.logger.error(f"Error delivering the result of execution {task_uuid}: {e}")
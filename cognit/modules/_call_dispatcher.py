@@ -0,0 +1,131 @@
+from cognit.modules._call_queue import CallQueue
+from cognit.modules._metrics import CALLS_IN_FLIGHT
+from cognit.modules._logger import CognitLogger
+from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecReturnCode
+from cognit.models._device_runtime import Call
+from threading import Thread, Event, Lock
+from typing import Callable
+
+"""
+Pool of worker threads that take calls from the CallQueue and offload them concurrently.
+The state machine resumes the pool when it enters the ready state and pauses it otherwise.
+"""
+class CallDispatcher:
+
+    def __init__(self, call_queue: CallQueue, execute: Callable[[Call], None], pool_size: int = 4):
+        """
+        Args:
+            call_queue (CallQueue): Queue from which the calls are taken
+            execute (Callable): Function that offloads a single call. It runs on the worker threads
+            pool_size (int): Number of calls that can be in flight at the same time
+        """
+
+        self.call_queue = call_queue
+        self.execute = execute
+        self.pool_size = max(1, pool_size)
+        self.logger = CognitLogger()
+
+        self.running = False
+        self.ready = Event()
+        self.workers = []
+
+        self.mutex = Lock()
+        self.in_flight = 0
+
+    def start(self):
+        """
+        Launches the worker threads. They wait until resume() is called.
+        """
+
+        if self.running:
+            return
+
+        self.running = True
+        self.call_queue.open()
+
+        for i in range(self.pool_size):
+
+            worker = Thread(target=self._work, name=f"cognit-dispatcher-{i}")
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        """
+        Stops the worker threads. Calls already taken from the queue are finished first.
+        """
+
+        self.running = False
+
+        # Release the workers waiting for the ready state or for a call
+        self.ready.set()
+        self.call_queue.close()
+
+        for worker in self.workers:
+            worker.join()
+
+        self.workers = []
+        self.ready.clear()
+
+    def resume(self):
+        """
+        Allows the workers to offload calls.
+        """
+
+        self.ready.set()
+
+    def pause(self):
+        """
+        Prevents the workers from offloading new calls. Calls in flight are not interrupted.
+        """
+
+        self.ready.clear()
+
+    def get_in_flight(self) -> int:
+        """
+        Returns the number of calls being offloaded right now
+        """
+
+        return self.in_flight
+
+    def _work(self):
+
+        while self.running:
+
+            # Do not take calls until the clients are ready
+            self.ready.wait()
+
+            if not self.running:
+                break
+
+            call = self.call_queue.get_call(timeout=None)
+
+            if call is None:
+                continue
+
+            # The state machine could have left the ready state while the worker was waiting
+            self.ready.wait()
+
+            with self.mutex:
+                self.in_flight += 1
+
+            CALLS_IN_FLIGHT.inc()
+
+            try:
+
+                self.execute(call)
+
+            except Exception as e:
+
+                self.logger.error(f"Unexpected error offloading call: {e}")
+
+                # The caller would otherwise wait forever for the result
+                if not call.future.done():
+                    call.future.set_result(ExecResponse(ret_code=ExecReturnCode.ERROR, err=f"Unexpected error offloading call: {e}"))
+
+            finally:
+
+                with self.mutex:
+                    self.in_flight -= 1
+
+                CALLS_IN_FLIGHT.dec()
@@ -1,22 +1,29 @@
+from cognit.modules._metrics import CALL_QUEUE_DEPTH, CALL_QUEUE_REJECTED
 from cognit.modules._logger import CognitLogger
 from cognit.models._device_runtime import Call
-from threading import Lock
+from threading import Lock, Condition
+from collections import deque
+import time
 
 """
-Class to manage the FIFO queue of functions to be executed. 
+Class to manage the FIFO queue of functions to be executed.
 """
 class CallQueue:
 
     def __init__(self, size_limit: int = 50):
 
-        self.queue = []
+        self.queue = deque()
         self.mutex = Lock()
+        self.not_empty = Condition(self.mutex)
         self.size_limit = size_limit
         self.cognit_logger = CognitLogger()
+        # Set by close() to release the consumers and reject new calls, checked under the lock
+        self.closed = False
 
     def add_call(self, call: Call) -> bool:
         """
-        Adds a call to the queue.
+        Adds a call to the queue and wakes up one of the consumers waiting for it.
+        Calls are rejected while the queue is closed, as nobody would take them.
 
         Args:
             call (Call): Call object to be added to the queue
@@ -25,46 +32,166 @@ class CallQueue:
             bool: True if the call was added successfully, False otherwise
         """
 
-        # Lock the queue
-        self.mutex.acquire()
+        with self.not_empty:
 
-        # Check if the queue is full
-        if len(self.queue) >= self.size_limit:
-            self.cognit_logger.error("CallQueue is full. Call will be discarded")
-            self.mutex.release()
-            return False
-        
-        # Add the call to the end of the queue
-        self.queue.append(call)
+            if self.closed:
+                self.cognit_logger.error("CallQueue is closed. Call will be discarded")
+                CALL_QUEUE_REJECTED.inc()
+                return False
+
+            # Check if the queue is full
+            if len(self.queue) >= self.size_limit:
+                self.cognit_logger.error("CallQueue is full. Call will be discarded")
+                CALL_QUEUE_REJECTED.inc()
+                return False
+
+            # Add the call to the end of the queue
+            self.queue.append(call)
+            CALL_QUEUE_DEPTH.set(len(self.queue))
+            self.not_empty.notify()
 
-        # Release the lock
-        self.mutex.release()
         return True
 
-    def get_call(self) -> Call:
+    def get_call(self, timeout: float = 0) -> Call:
         """
         Removes and returns the first call from the queue.
-        
+
+        Args:
+            timeout (float, optional): Seconds to wait for a call if the queue is empty.
+            0 returns immediately and None waits until a call arrives or close() is called.
+            Defaults to 0.
+
+        Returns:
+            Call: Call object removed from the queue. If the queue is still empty, returns None.
+        """
+
+        with self.not_empty:
+
+            # Wait until there is a call in the queue
+            if not self._wait_not_empty(timeout):
+
+                self.cognit_logger.debug("CallQueue is empty")
+                return None
+
+            # Remove the first element from the queue
+            call = self.queue.popleft()
+            CALL_QUEUE_DEPTH.set(len(self.queue))
+            return call
+
+    def get_many(self, max_n: int, timeout: float = 0) -> list[Call]:
+        """
+        Removes and returns up to max_n calls from the queue in a single lock acquisition.
+
+        Args:
+            max_n (int): Maximum number of calls to be returned
+            timeout (float, optional): Seconds to wait for the first call if the queue is empty.
+            Same semantics as in get_call(). Defaults to 0.
+
+        Returns:
+            list[Call]: Calls removed from the queue in FIFO order. Empty if there were none.
+        """
+
+        with self.not_empty:
+
+            if not self._wait_not_empty(timeout):
+                return []
+
+            n = min(max_n, len(self.queue))
+            calls = [self.queue.popleft() for _ in range(n)]
+            CALL_QUEUE_DEPTH.set(len(self.queue))
+            return calls
+
+    def remove_call(self, call: Call) -> bool:
+        """
+        Withdraws a call that has not been taken from the queue yet.
+
+        Args:
+            call (Call): Call object to be removed
+
+        Returns:
+            bool: True if the call was in the queue, False otherwise
+        """
+
+        with self.mutex:
+
+            # Compare by identity, different calls can hold equal values
+            for i, queued_call in enumerate(self.queue):
+
+                if queued_call is call:
+                    del self.queue[i]
+                    CALL_QUEUE_DEPTH.set(len(self.queue))
+                    return True
+
+        return False
+
+    def close(self) -> None:
+        """
+        Releases every consumer blocked in get_call() or get_many(), which return empty,
+        and makes those called later return empty too until open() is called. Calls are
+        rejected meanwhile, those left in the queue are taken with drain().
+        """
+
+        with self.not_empty:
+            self.closed = True
+            self.not_empty.notify_all()
+
+    def open(self) -> None:
+        """
+        Lets the consumers take calls again after close()
+        """
+
+        with self.not_empty:
+            self.closed = False
+
+    def drain(self) -> list[Call]:
+        """
+        Removes and returns every call in the queue, also when it is closed
+
+        Returns:
+            list[Call]: Calls removed from the queue in FIFO order
+        """
+
+        with self.mutex:
+
+            calls = list(self.queue)
+            self.queue.clear()
+            CALL_QUEUE_DEPTH.set(0)
+            return calls
+
+    def _wait_not_empty(self, timeout: float) -> bool:
+        """
+        Waits until the queue has at least one call. The lock must be held by the caller.
+
+        Args:
+            timeout (float): Seconds to wait. 0 does not wait and None waits with no limit.
+
         Returns:
-            Call: Call object removed from the queue. If the queue is empty, returns None.
+            bool: True if the queue has calls, False if the timeout expired or the queue is closed
         """
 
-        # Lock the queue
-        self.mutex.acquire()
+        if self.closed:
+            return False
+
+        if self.queue or timeout == 0:
+            return len(self.queue) > 0
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while not self.queue:
 
-        # Check if the queue is empty
-        if len(self.queue) == 0:
-            
-            self.cognit_logger.debug("CallQueue is empty")
-            self.mutex.release()
-            return None
-        
-        # Remove the first element from the queue
-        call = self.queue.pop(0)
+            # Read under the lock, a close() right before the wait is not missed
+            if self.closed:
+                return False
 
-        # Release the lock
-        self.mutex.release()
-        return call
+            if deadline is None:
+                self.not_empty.wait()
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.not_empty.wait(remaining)
+
+        return True
 
     def __len__(self):
         """
@@ -73,5 +200,5 @@ class CallQueue:
         Returns:
             int: Number of calls in the queue
         """
-        
-        return len(self.queue)
\ No newline at end of file
+
+        return len(self.queue)
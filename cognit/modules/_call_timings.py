@@ -0,0 +1,146 @@
+from cognit.models._call_timings import CallTimings, PHASES
+from threading import Lock
+from typing import Callable
+import bisect
+
+# Upper bounds of the histogram buckets, in milliseconds. The last bucket has no bound.
+HISTOGRAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+"""
+Histogram of the durations of one phase, in milliseconds, over fixed buckets
+"""
+class PhaseHistogram:
+
+    def __init__(self, buckets: tuple = HISTOGRAM_BUCKETS):
+
+        self.bounds = buckets
+        # One more for the durations above the last bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, duration: float):
+
+        self.counts[bisect.bisect_left(self.bounds, duration)] += 1
+        self.count += 1
+        self.sum += duration
+        self.max = max(self.max, duration)
+
+    def get_percentile(self, percentile: float) -> float | None:
+        """
+        Estimates the given percentile (0-100) by interpolating inside its bucket
+        """
+
+        if self.count == 0:
+            return None
+
+        rank = percentile / 100 * self.count
+        seen = 0
+
+        for i, count in enumerate(self.counts):
+
+            if count and seen + count >= rank:
+
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                # The durations above the last bound are at most the maximum seen
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+
+            seen += count
+
+        return self.max
+
+    def get_summary(self) -> dict:
+
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.get_percentile(50),
+            "p95": self.get_percentile(95),
+            "p99": self.get_percentile(99),
+            "max": self.max,
+        }
+
+"""
+Aggregates the timings of the finished calls into a histogram per function and phase,
+to tell whether the time of the slow calls goes to the device, the network or the
+Edge Cluster.
+"""
+class CallStats:
+
+    def __init__(self):
+
+        self.mutex = Lock()
+        # Function name -> phase -> PhaseHistogram
+        self.histograms = {}
+
+    def add(self, function: Callable, timings: CallTimings):
+        """
+        Adds the timings of a finished call
+
+        Args:
+            function (Callable): Offloaded function
+            timings (CallTimings): Timings of the call
+        """
+
+        durations = timings.get_durations()
+        name = get_function_name(function)
+
+        with self.mutex:
+
+            phases = self.histograms.setdefault(name, {})
+
+            for phase, duration in durations.items():
+
+                histogram = phases.get(phase)
+
+                if histogram is None:
+                    histogram = phases[phase] = PhaseHistogram()
+
+                histogram.add(duration)
+
+    def get_stats(self) -> dict:
+        """
+        Returns, per function and phase, the number of calls and the mean, p50, p95, p99
+        and maximum duration in milliseconds
+        """
+
+        with self.mutex:
+
+            return {name: {phase: phases[phase].get_summary() for phase in PHASES if phase in phases}
+                for name, phases in self.histograms.items()}
+
+    def get_histograms(self) -> dict[str, dict[str, PhaseHistogram]]:
+        """
+        Returns a copy of the histograms, per function and phase
+        """
+
+        with self.mutex:
+
+            histograms = {}
+
+            for name, phases in self.histograms.items():
+                histograms[name] = {}
+
+                for phase, histogram in phases.items():
+                    copy = histograms[name][phase] = PhaseHistogram(histogram.bounds)
+                    copy.counts = list(histogram.counts)
+                    copy.count, copy.sum, copy.max = histogram.count, histogram.sum, histogram.max
+
+            return histograms
+
+    def reset(self):
+
+        with self.mutex:
+            self.histograms = {}
+
+def get_function_name(function: Callable) -> str:
+    """
+    Returns the name under which the statistics of a function are kept, module.qualname
+    """
+
+    module = getattr(function, "__module__", None)
+    name = getattr(function, "__qualname__", None) or getattr(function, "__name__", None) or repr(function)
+
+    return f"{module}.{name}" if module else name
@@ -0,0 +1,207 @@
+from cognit.modules._metrics import CALLBACK_QUEUE_DEPTH, CALLBACK_DURATION
+from cognit.modules._logger import CognitLogger
+from threading import Thread, Condition
+from collections import deque
+from typing import Callable, Any
+import time
+
+"""
+Bounded pool of threads that runs the callbacks of the offloaded calls, so a slow
+callback never delays the dispatcher threads. Callbacks submitted with the same key
+run one after another in submission order; callbacks without a key run in parallel.
+"""
+class CallbackExecutor:
+
+    def __init__(self, pool_size: int = 2):
+        """
+        Args:
+            pool_size (int): Number of callbacks that can run at the same time
+        """
+
+        self.pool_size = max(1, pool_size)
+        self.logger = CognitLogger()
+
+        self.condition = Condition()
+        self.running = False
+        self.workers = []
+
+        # Callbacks ready to run: (key, callback, args, submission time)
+        self.queue = deque()
+        # Callbacks waiting for the previous one of their key to finish
+        self.key_backlog = {}
+        # Keys with a callback queued or running
+        self.active_keys = set()
+
+        # Metrics
+        self.pending = 0
+        self.running_callbacks = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_callback_time = 0.0
+        self.max_callback_time = 0.0
+        self.total_wait_time = 0.0
+
+    def start(self):
+        """
+        Launches the worker threads
+        """
+
+        with self.condition:
+
+            if self.running:
+                return
+
+            self.running = True
+
+        for i in range(self.pool_size):
+
+            worker = Thread(target=self._work, name=f"cognit-callback-{i}")
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        """
+        Stops the worker threads once the callbacks already submitted have run
+        """
+
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        for worker in self.workers:
+            worker.join()
+
+        self.workers = []
+
+    def submit(self, callback: Callable, *args: Any, key: Any = None):
+        """
+        Schedules a callback to be run by one of the workers
+
+        Args:
+            callback (Callable): Function to be run
+            args (Any): Arguments given to the callback
+            key (Any, optional): Callbacks with the same key are run in submission order. Defaults to None.
+        """
+
+        task = (key, callback, args, time.monotonic())
+
+        with self.condition:
+
+            self.pending += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.pending)
+            CALLBACK_QUEUE_DEPTH.inc()
+
+            # Hold the callback back while another one of its key is queued or running
+            if key is not None and key in self.active_keys:
+                self.key_backlog.setdefault(key, deque()).append(task)
+                return
+
+            if key is not None:
+                self.active_keys.add(key)
+
+            self.queue.append(task)
+            self.condition.notify()
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """
+        Waits until every submitted callback has run
+
+        Args:
+            timeout (float, optional): Maximum time to wait, None waits with no limit. Defaults to None.
+
+        Returns:
+            bool: True if there are no callbacks left, False if the timeout expired
+        """
+
+        with self.condition:
+            return self.condition.wait_for(lambda: self.pending == 0 and self.running_callbacks == 0, timeout)
+
+    def get_metrics(self) -> dict:
+        """
+        Returns a snapshot of the callback metrics
+
+        Returns:
+            dict: Queue depth, running and finished callbacks and time spent in them
+        """
+
+        with self.condition:
+
+            return {
+                "queue_depth": self.pending,
+                "max_queue_depth": self.max_queue_depth,
+                "running": self.running_callbacks,
+                "completed": self.completed,
+                "failed": self.failed,
+                "total_callback_time": self.total_callback_time,
+                "max_callback_time": self.max_callback_time,
+                "avg_callback_time": self.total_callback_time / self.completed if self.completed else 0.0,
+                "avg_wait_time": self.total_wait_time / self.completed if self.completed else 0.0,
+            }
+
+    def _work(self):
+
+        while True:
+
+            with self.condition:
+
+                while self.running and not self.queue:
+                    self.condition.wait()
+
+                # Submitted callbacks are not discarded when stopping
+                if not self.queue and self.pending == 0:
+                    return
+
+                # The remaining ones wait for a callback of their key to finish
+                if not self.queue:
+                    self.condition.wait()
+                    continue
+
+                key, callback, args, submitted_at = self.queue.popleft()
+                self.pending -= 1
+                self.running_callbacks += 1
+                CALLBACK_QUEUE_DEPTH.dec()
+
+            started_at = time.monotonic()
+            failed = False
+
+            try:
+
+                callback(*args)
+
+            except Exception as e:
+
+                failed = True
+                self.logger.error(f"Error in the callback of the call: {e}")
+
+            elapsed = time.monotonic() - started_at
+            CALLBACK_DURATION.observe(elapsed)
+
+            with self.condition:
+
+                self.running_callbacks -= 1
+                self.completed += 1
+                self.failed += int(failed)
+                self.total_callback_time += elapsed
+                self.max_callback_time = max(self.max_callback_time, elapsed)
+                self.total_wait_time += started_at - submitted_at
+
+                if key is not None:
+                    self._release_key(key)
+
+                self.condition.notify_all()
+
+    def _release_key(self, key: Any):
+        """
+        Queues the next callback of the key, if any. The lock must be held by the caller.
+        """
+
+        backlog = self.key_backlog.get(key)
+
+        if backlog:
+            self.queue.append(backlog.popleft())
+            if not backlog:
+                del self.key_backlog[key]
+        else:
+            self.active_keys.discard(key)
@@ -14,7 +14,7 @@ class CallbackTimer:
         self.interval = interval
         self.callback = callback
         self._stop_event = threading.Event()
-        self._thread = threading.Thread(target=self._execute)
+        self._thread = threading.Thread(target=self._execute, daemon=True)
 
     def _execute(self):
         """
@@ -1,5 +1,11 @@
 from cognit.models._cognit_frontend_client import Scheduling, UploadFunctionDaaS, FunctionLanguage, EdgeClusterFrontendResponse
 from cognit.modules._latency_calculator import LatencyCalculator
+from cognit.modules._latency_monitor import LatencyMonitor
+from cognit.modules._function_registry import function_registry, RegisteredFunction
+from cognit.modules._function_id_cache import get_function_id_cache
+from cognit.modules._http_session import create_http_session
+from cognit.models._call_timings import CallTimings, FUNCTION_SERIALIZATION, UPLOAD
+from cognit.modules._metrics import FUNCTION_UPLOADS, FUNCTION_ID_CACHE_HITS
 from cognit.modules._cognitconfig import CognitConfig
 from cognit.modules._faas_parser import FaasParser
 from cognit.modules._logger import CognitLogger
@@ -7,8 +13,8 @@ from requests.auth import HTTPBasicAuth
 from typing import Callable
 import requests as req
 import pydantic
-import hashlib
 import json
+import time
 
 import logging
 logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -20,25 +26,92 @@ def filter_empty_values(data):
     else:
         return data
     
+def parse_edge_cluster_frontends(data: list, logger: CognitLogger) -> list[str]:
+    """
+    Extracts the Edge Cluster Frontend addresses from the clusters returned by the Cognit Frontend.
+
+    Args:
+        data: List of clusters as returned by /v1/app_requirements/{id}/ec_fe
+        logger: Logger used to report malformed clusters
+
+    Returns:
+        List with the addresses of the clusters that have an Edge Cluster Frontend
+    """
+
+    available_ecfs = []
+
+    for item in data:
+
+        logger.debug(f"Item in response: {item}")
+
+        if not isinstance(item, dict):
+            logger.error(f"Item in response is not a dict: {item}")
+            return []
+        
+        template = item.get('TEMPLATE', None)
+        name = item.get('NAME', None)
+
+        if template is None:
+
+            logger.warning(f"TEMPLATE not found in item {name}")
+            continue
+        
+        edge_cluster_fe = template.get('EDGE_CLUSTER_FRONTEND', None)
+
+        if edge_cluster_fe is None:
+
+            logger.warning(f"EDGE_CLUSTER_FRONTEND not found in template of item {name}")
+            continue
+
+        logger.debug(f"Edge Cluster Frontend Engine: {edge_cluster_fe}")
+        
+        available_ecfs.append(edge_cluster_fe)
+
+    return available_ecfs
+
+def get_upload_function_data(function: Callable, entry: RegisteredFunction) -> UploadFunctionDaaS:
+    """
+    Builds the body of the upload of a function to the DaaS. The function is serialized only once per process.
+
+    Args:
+        function: Function to be uploaded
+        entry: Entry of the function in the function registry, with its fingerprint
+
+    Returns:
+        UploadFunctionDaaS object with the serialized function
+    """
+
+    return UploadFunctionDaaS(
+        LANG=FunctionLanguage.PY,
+        FC=function_registry.get_serialized(function, entry),
+        FC_HASH=entry.function_hash
+    )
+
 """
 Class to interact with the Cognit Frontend Engine.
 It is used to upload the requirements of the application, get the address of the Edge Cluster Frontend Engine
 """
 class CognitFrontendClient:
 
-    def __init__(self, config: CognitConfig):
+    def __init__(self, config: CognitConfig, session: req.Session = None, latency_monitor: LatencyMonitor = None):
         """
         Initializes app_req_id to None (it is updated when the user calls init())
         Initializes token to None (it is updated when the user calls init())
         
         Args:
             config: CognitConfig object containing a valid Cognit user and pwd
+            session: Pooled session used to send the requests. A new one is created if None,
+            pass the same one to the next client to keep its connections alive
+            latency_monitor: Cached latencies of the Edge Clusters. If None, they are probed every time
         """
 
         self.config = config
+        self.session = session if session is not None else create_http_session(config.http_pool_size)
         self.endpoint = self.config.cognit_frontend_engine_endpoint
-        self.latency_calculator = LatencyCalculator()
+        self.latency_calculator = LatencyCalculator(self.config.latency_probe_samples, self.config.latency_probe_timeout)
+        self.latency_monitor = latency_monitor
         self.is_max_latency_activated = False
+        self.max_latency = None
         self.logger = CognitLogger()
         self._has_connection = False
         self.parser = FaasParser()
@@ -48,6 +121,13 @@ class CognitFrontendClient:
         # Storage
         self.offloaded_funs_hash_map = {}
         self.available_ecfs = []
+
+        # IDs of the functions uploaded by previous processes, they are only valid for this endpoint and user
+        self.function_id_cache = None
+        self.function_id_cache_namespace = f"{self.endpoint}|{self.config.cognit_frontend_engine_cfe_usr}"
+
+        if self.config.function_id_cache_path:
+            self.function_id_cache = get_function_id_cache(self.config.function_id_cache_path, self.config.function_id_cache_size)
     
     def init(self, reqs: Scheduling) -> bool:
         """
@@ -82,6 +162,8 @@ class CognitFrontendClient:
             self.logger.debug("Max latency is not activated, setting is_max_latency_activated to False")
             self.is_max_latency_activated = False
 
+        self.max_latency = reqs.MAX_LATENCY
+
         header = self.get_header(self.token)
         
         try:
@@ -91,7 +173,7 @@ class CognitFrontendClient:
                 uri = f'{self.endpoint}/v1/app_requirements'
 
                 self.logger.debug(f"Application requirements do not exist, creating them at {uri}")
-                response = req.post(uri, headers=header, data=reqs.json(exclude_unset=True))
+                response = self.session.post(uri, headers=header, data=reqs.json(exclude_unset=True))
 
                 self.app_req_id = response.json()
 
@@ -99,7 +181,7 @@ class CognitFrontendClient:
 
                 uri = f'{self.endpoint}/v1/app_requirements/{self.app_req_id}'
                 self.logger.debug(f"Application requirements already exist, updating them at {uri}")
-                response = req.put(uri, headers=header, data=reqs.json(exclude_unset=True))   
+                response = self.session.put(uri, headers=header, data=reqs.json(exclude_unset=True))   
 
         except Exception as e:
             
@@ -130,7 +212,7 @@ class CognitFrontendClient:
 
         try:
 
-            response = req.get(uri, headers=headers)
+            response = self.session.get(uri, headers=headers)
 
         except req.exceptions.RequestException as e:
 
@@ -149,37 +231,8 @@ class CognitFrontendClient:
         try:
             
             data = response.json()
-            self.available_ecfs = []
             self.logger.debug(f"Response from get_ECFE: {data}")
-
-            for item in data:
-
-                self.logger.debug(f"Item in response: {item}")
-
-                if not isinstance(item, dict):
-                    self.logger.error(f"Item in response is not a dict: {item}")
-                    return []
-                
-                template = item.get('TEMPLATE', None)
-                name = item.get('NAME', None)
-
-                if template is None:
-
-                    self.logger.warning(f"TEMPLATE not found in item {name}")
-                    continue
-                
-                edge_cluster_fe = template.get('EDGE_CLUSTER_FRONTEND', None)
-
-                if edge_cluster_fe is None:
-
-                    self.logger.warning(f"EDGE_CLUSTER_FRONTEND not found in template of item {name}")
-                    continue
-
-                self.logger.debug(f"Edge Cluster Frontend Engine: {edge_cluster_fe}")
-                
-                self.available_ecfs.append(edge_cluster_fe)
-            
-            return self.available_ecfs
+            return parse_edge_cluster_frontends(data, self.logger)
         
         except Exception as e:
 
@@ -191,29 +244,47 @@ class CognitFrontendClient:
         Gets the address of the Edge Cluster Frontend Engine with the lowest latency (If max latency is activated).
         
         If max latency is not activated, it returns the first Edge Cluster Frontend Engine available (the nearest).
+        The Edge Cluster Frontend Engines to spread the calls among are kept in available_ecfs.
         
         Returns:
             The address of the Edge Cluster Frontend Engine with the lowest latency, or the first one if max latency is not activated.
             Returns None if no Edge Cluster Frontend Engines are available.
         """
 
-        self.available_ecfs = self.get_edge_cluster_frontends_available()
+        self.available_ecfs = self.get_edge_cluster_candidates()
+
+        return self.available_ecfs[0] if self.available_ecfs else None
 
-        if not self.available_ecfs:
+    def get_edge_cluster_candidates(self) -> list[str]:
+        """
+        Gets the Edge Cluster Frontend Engines available for the current application requirements, the
+        chosen one first. If max latency is activated, it is the one with the lowest latency and only
+        those that meet the max latency follow, fastest first. Otherwise they keep the order of the
+        Cognit Frontend Engine (the nearest first).
+
+        It does not change available_ecfs, so it can run while the calls are offloaded.
+
+        Returns:
+            The addresses of the Edge Cluster Frontend Engines, empty if none is available
+        """
+
+        available_ecfs = self.get_edge_cluster_frontends_available()
+
+        if not available_ecfs:
 
             self.logger.error("No Edge Cluster Frontend Engines available")
-            return None
+            return []
         
         if self.is_max_latency_activated:
 
             self.logger.debug("Max latency is activated, calculating latency for Edge Cluster Frontend Engines")
             # Calculate latency for each Edge Cluster Frontend Engine
-            cluster_latencies = self.latency_calculator.get_latency_for_clusters(self.available_ecfs)
+            cluster_latencies = self.get_cluster_latencies(available_ecfs)
 
             if not cluster_latencies:
 
                 self.logger.error("No valid latencies found for Edge Cluster Frontend Engines")
-                return None
+                return []
             
             self.logger.debug(f"Latencies for Edge Cluster Frontend Engines: {cluster_latencies}")
 
@@ -221,14 +292,34 @@ class CognitFrontendClient:
             lowest_latency_ecfe = min(cluster_latencies, key=cluster_latencies.get)
             self.logger.debug(f"Edge Cluster Frontend Engine with lowest latency: {lowest_latency_ecfe}")
 
-            return lowest_latency_ecfe
+            # Keep the others that meet the max latency, fastest first, to spread the calls among them
+            return [lowest_latency_ecfe] + sorted(
+                (ecf for ecf, latency in cluster_latencies.items() if ecf != lowest_latency_ecfe and ecf in available_ecfs and latency <= self.max_latency),
+                key=cluster_latencies.get
+            )
         
         else:
 
-            self.logger.debug(f"Max latency is not activated, returning first Edge Cluster Frontend Engine: {self.available_ecfs[0]}")
-            # Return the first Edge Cluster Frontend Engine
-            return self.available_ecfs[0] if self.available_ecfs else None
+            self.logger.debug(f"Max latency is not activated, returning first Edge Cluster Frontend Engine: {available_ecfs[0]}")
+            # The first Edge Cluster Frontend Engine is the chosen one
+            return available_ecfs
         
+    def get_cluster_latencies(self, addresses: list[str]) -> dict:
+        """
+        Gets the latency of the Edge Cluster Frontend Engines, from the latency monitor if there is one
+
+        Args:
+            addresses: Addresses of the Edge Cluster Frontend Engines
+
+        Returns:
+            Dictionary with the latency in milliseconds of each reachable Edge Cluster Frontend Engine
+        """
+
+        if self.latency_monitor is not None:
+            return self.latency_monitor.get_latencies(addresses)
+
+        return self.latency_calculator.get_latency_for_clusters(addresses)
+
     def _authenticate(self) -> str:
         """
         Authenticate against Cognit FE to get a valid JWT Token
@@ -237,12 +328,9 @@ class CognitFrontendClient:
             Token: JSON dict containing the JWT Token
         """
 
-        self.logger.debug(f"Requesting token for {self.config._cognit_frontend_engine_usr}")
-        uri = f'{self.endpoint}/v1/authenticate'
-
         # Authenticate using HTTPBasicAuth if username and password are provided
         try:
-            response = req.post(url=uri, auth=HTTPBasicAuth(self.config._cognit_frontend_engine_usr, self.config.cognit_frontend_engine_cfe_pwd))
+            response = self._request_token()
 
             if response.status_code not in [200, 201]:
                 self.logger.critical(f"Token creation failed with status code: {response.status_code}")
@@ -264,6 +352,48 @@ class CognitFrontendClient:
             self.set_has_connection(False)
             return None
         
+    def refresh_token(self) -> str | None:
+        """
+        Gets a new JWT Token before the current one expires. If it fails, the current token
+        and the connection status are kept, the current token is still valid
+
+        Returns:
+            The new token if successful, None otherwise
+        """
+
+        try:
+
+            response = self._request_token()
+
+            if response.status_code not in [200, 201]:
+                self._inspect_response(response, "refresh_token.error")
+                return None
+
+            token = response.json()
+
+        except (req.exceptions.RequestException, ValueError) as e:
+
+            self.logger.warning(f"Token refresh failed with exception: {e}")
+            return None
+
+        if token:
+            self.token = token
+
+        return token or None
+
+    def _request_token(self) -> req.Response:
+        """
+        Sends the credentials to the Cognit FE to get a new JWT Token
+
+        Returns:
+            Response of the authentication request
+        """
+
+        self.logger.debug(f"Requesting token for {self.config._cognit_frontend_engine_usr}")
+        uri = f'{self.endpoint}/v1/authenticate'
+
+        return self.session.post(url=uri, auth=HTTPBasicAuth(self.config._cognit_frontend_engine_usr, self.config.cognit_frontend_engine_cfe_pwd))
+
     def _app_req_read(self) -> Scheduling | None:
         """
         Reads the app requirements using the application ID
@@ -274,7 +404,7 @@ class CognitFrontendClient:
 
         uri = f'{self.endpoint}/v1/app_requirements/{self.app_req_id}'
         headers = {"token": self.token}
-        response = req.get(uri, headers=headers)
+        response = self.session.get(uri, headers=headers)
         
         if response.status_code != 200: # something went wrong
 
@@ -304,73 +434,103 @@ class CognitFrontendClient:
         uri = f'{self.endpoint}/v1/app_requirements/{self.app_req_id}'
         headers = {"token": self.token}
 
-        response = req.delete(uri, headers=headers)
+        response = self.session.delete(uri, headers=headers)
         if response.status_code >= 300:
             self.logger.warning(f"App req delete returned {response.status_code} with body: {response.json()}")
         
         self.set_has_connection(response.status_code < 400)
         return response.status_code == 204
     
-    def upload_function_to_daas(self, function: Callable) -> int:
+    def upload_function_to_daas(self, function: Callable, timeout: float = None, timings: CallTimings = None) -> int:
         """
         Serializes the function and uploads it to the Daas Gateway
 
         Args:
             func: Function to be serialized and uploaded
+            timeout: Maximum time in seconds for the upload request. Defaults to None (no limit)
+            timings: Timings of the call, where the time of the serialization and of the upload is recorded
 
         Returns:
             The ID of the function in the Daas Gateway if successful, None otherwise
         """
 
-        # Serialize function
-        serialized_fc = self.parser.serialize(function)
+        timings = timings if timings is not None else CallTimings()
 
-        # Get hash of the function
-        function_hash = hashlib.sha256(function.__code__.co_code).hexdigest()
+        # Get hash of the function, computed once per function
+        start = time.monotonic()
+        entry = function_registry.get_entry(function)
+        function_hash = entry.function_hash
+        timings.record(FUNCTION_SERIALIZATION, start)
 
         # Check if the function is already uploaded
         if self.is_function_uploaded(function_hash):
             self.logger.debug("Function already in local HASH map")
+            FUNCTION_ID_CACHE_HITS.labels("memory").inc()
             return self.offloaded_funs_hash_map[function_hash]
+
+        # Reuse the ID given to a previous process, it is validated by the first execution
+        if self.function_id_cache is not None:
+
+            cognit_fc_id = self.function_id_cache.get(self.function_id_cache_namespace, function_hash)
+
+            if cognit_fc_id is not None:
+                self.logger.debug("Function found in the function ID cache with ID: %s", cognit_fc_id)
+                self.offloaded_funs_hash_map[function_hash] = cognit_fc_id
+                FUNCTION_ID_CACHE_HITS.labels("persistent").inc()
+                return cognit_fc_id
         
-        # Create UploadFunctionDaaS object
-        function_data = UploadFunctionDaaS (
-            LANG=FunctionLanguage.PY,
-            FC=serialized_fc,
-            FC_HASH=function_hash
-        )
+        # Create UploadFunctionDaaS object, the function is serialized only once per process
+        start = time.monotonic()
+        function_data = get_upload_function_data(function, entry)
+        timings.record(FUNCTION_SERIALIZATION, start)
 
         # Send function to Daas
-        cognit_fc_id = self.send_funtion_to_daas(function_data)
-        self.logger.debug(f"Function uploaded with ID: {cognit_fc_id}")
+        start = time.monotonic()
+        cognit_fc_id = self.send_funtion_to_daas(function_data, timeout)
+        timings.record(UPLOAD, start)
+        self.logger.debug("Function uploaded with ID: %s", cognit_fc_id)
 
         # Check if the function was uploaded
+        FUNCTION_UPLOADS.labels("success" if cognit_fc_id is not None else "failure").inc()
+
         if cognit_fc_id != None:
             # Add function to local HASH map
             self.offloaded_funs_hash_map[function_hash] = cognit_fc_id
+
+            if self.function_id_cache is not None:
+                self.function_id_cache.put(self.function_id_cache_namespace, function_hash, cognit_fc_id)
+
             return cognit_fc_id
         else:
             self.logger.error("Function could not be uploaded")
             return None
     
-    def send_funtion_to_daas(self, data: UploadFunctionDaaS) -> int:
+    def send_funtion_to_daas(self, data: UploadFunctionDaaS, timeout: float = None) -> int:
         """
         Uploads the function to the Daas Gateway
         
         Args:
             data: UploadFunctionDaaS object containing the function data
+            timeout: Maximum time in seconds for the request. Defaults to None (no limit)
 
         Returns:
             The ID of the function in the Daas Gateway if successful, None otherwise
         """
 
-        self.logger.debug(f"Uploading function: {data}")
+        self.logger.debug("Uploading function: %s", data)
 
         uri = f'{self.endpoint}/v1/daas/upload'
         header = self.get_header(self.token)
 
         # Send data to DaaS
-        response = req.post(uri, headers=header, data=data.json())
+        try:
+
+            response = self.session.post(uri, headers=header, data=data.json(), timeout=timeout)
+
+        except req.exceptions.RequestException as e:
+
+            self.logger.error(f"Error uploading function: {e}")
+            return None
 
         if response.status_code != 200:
             self._inspect_response(response)
@@ -396,7 +556,7 @@ class CognitFrontendClient:
 
         try:
 
-            response = req.post(uri, headers=header, json=json.loads(latencies))
+            response = self.session.post(uri, headers=header, json=json.loads(latencies))
 
             if response.status_code != 200:
                 self._inspect_response(response, "_send_latency_measurements.error")
@@ -435,6 +595,48 @@ class CognitFrontendClient:
         """
 
         return func_hash in self.offloaded_funs_hash_map.keys()
+
+    def is_function_id_verified(self, function: Callable) -> bool:
+        """
+        Checks if the ID of the function is known to be valid, that is, it was not
+        taken from the function ID cache or an execution has already accepted it
+
+        Args:
+            function: Function already uploaded
+
+        Returns:
+            True if the ID of the function is valid, False if it has not been checked yet
+        """
+
+        if self.function_id_cache is None:
+            return True
+
+        return self.function_id_cache.is_verified(self.function_id_cache_namespace, function_registry.get_hash(function))
+
+    def set_function_id_verified(self, function: Callable):
+        """
+        Records that an execution accepted the ID of the function
+
+        Args:
+            function: Function already uploaded
+        """
+
+        if self.function_id_cache is not None:
+            self.function_id_cache.set_verified(self.function_id_cache_namespace, function_registry.get_hash(function))
+
+    def forget_function(self, function: Callable):
+        """
+        Forgets the ID of the function so that the next offload uploads it again
+
+        Args:
+            function: Function whose ID is not valid anymore
+        """
+
+        function_hash = function_registry.get_hash(function)
+        self.offloaded_funs_hash_map.pop(function_hash, None)
+
+        if self.function_id_cache is not None:
+            self.function_id_cache.remove(self.function_id_cache_namespace, function_hash)
     
     def get_header(self, token: str) -> dict:
         """
@@ -1,10 +1,28 @@
 import yaml
 
-from cognit.modules._logger import CognitLogger
+from cognit.modules._logger import CognitLogger, parse_log_level, DEFAULT_LOG_LEVEL, DEFAULT_LOG_CONSOLE_LEVEL, DEFAULT_LOG_FILE, DEFAULT_LOG_MAX_BYTES, DEFAULT_LOG_BACKUP_COUNT, DEFAULT_LOG_ROTATE_INTERVAL, DEFAULT_LOG_QUEUE_SIZE
 
 cognit_logger = CognitLogger()
 
 DEFAULT_CONFIG_PATH = "./examples/cognit-template.yml"
+DEFAULT_DISPATCHER_POOL_SIZE = 4
+DEFAULT_ASYNC_POLL_INTERVAL = 0.5
+DEFAULT_ASYNC_POLL_CONCURRENCY = 4
+DEFAULT_CALLBACK_POOL_SIZE = 2
+DEFAULT_ECF_BALANCING_POLICY = "least_outstanding"
+DEFAULT_MAX_EDGE_CLUSTERS = 0
+DEFAULT_FUNCTION_ID_CACHE_PATH = ""
+DEFAULT_FUNCTION_ID_CACHE_SIZE = 256
+DEFAULT_LATENCY_PROBE_SAMPLES = 3
+DEFAULT_LATENCY_PROBE_TIMEOUT = 1.0
+DEFAULT_LATENCY_PROBE_INTERVAL = 30.0
+DEFAULT_LATENCY_REPORT_INTERVAL = 60.0
+DEFAULT_ECF_RESELECTION_INTERVAL = 600.0
+DEFAULT_ECF_SWITCH_MIN_IMPROVEMENT = 5.0
+DEFAULT_ECF_SWITCH_MIN_RATIO = 0.2
+DEFAULT_TOKEN_REFRESH_MARGIN = 60.0
+DEFAULT_METRICS_HOST = "127.0.0.1"
+DEFAULT_METRICS_PORT = 0
 
 class CognitConfig: 
     ## dann1 code uses JSON, but going to keep YAML and modify conf.yml file
@@ -14,6 +32,34 @@ class CognitConfig:
         self._cognit_frontend_engine_usr = None
         self._cognit_frontend_engine_pwd = None
         self._servl_runt_port = None
+        self._dispatcher_pool_size = None
+        self._ecf_async_mode = None
+        self._async_poll_interval = None
+        self._async_poll_concurrency = None
+        self._callback_pool_size = None
+        self._function_id_cache_path = None
+        self._function_id_cache_size = None
+        self._http_pool_size = None
+        self._ecf_ca_bundle = None
+        self._ecf_balancing_policy = None
+        self._max_edge_clusters = None
+        self._latency_probe_samples = None
+        self._latency_probe_timeout = None
+        self._latency_probe_interval = None
+        self._latency_report_interval = None
+        self._ecf_reselection_interval = None
+        self._ecf_switch_min_improvement = None
+        self._ecf_switch_min_ratio = None
+        self._token_refresh_margin = None
+        self._log_level = None
+        self._log_console_level = None
+        self._log_file = None
+        self._log_max_bytes = None
+        self._log_backup_count = None
+        self._log_rotate_interval = None
+        self._log_queue_size = None
+        self._metrics_host = None
+        self._metrics_port = None
         with open(config_path, "r") as file:
             try:
                 self.cf = yaml.safe_load(file)
@@ -62,6 +108,202 @@ class CognitConfig:
             self._cognit_frontend_engine_pwd = self.cf['credentials'].split(':')[1]
         return self._cognit_frontend_engine_pwd
     
+    @property
+    def dispatcher_pool_size(self): # Number of calls offloaded concurrently
+        # Lazy read value
+        if self._dispatcher_pool_size is None:
+            self._dispatcher_pool_size = int(self.cf.get("dispatcher_pool_size", DEFAULT_DISPATCHER_POOL_SIZE))
+        return self._dispatcher_pool_size
+
+    @property
+    def ecf_async_mode(self): # Submit call_async() executions in ASYNC mode and poll their results
+        # Lazy read value
+        if self._ecf_async_mode is None:
+            self._ecf_async_mode = bool(self.cf.get("ecf_async_mode", False))
+        return self._ecf_async_mode
+
+    @property
+    def async_poll_interval(self): # Seconds between two polls of the ASYNC executions
+        # Lazy read value
+        if self._async_poll_interval is None:
+            self._async_poll_interval = float(self.cf.get("async_poll_interval", DEFAULT_ASYNC_POLL_INTERVAL))
+        return self._async_poll_interval
+
+    @property
+    def async_poll_concurrency(self): # Status requests of the ASYNC executions sent at the same time
+        # Lazy read value
+        if self._async_poll_concurrency is None:
+            self._async_poll_concurrency = int(self.cf.get("async_poll_concurrency", DEFAULT_ASYNC_POLL_CONCURRENCY))
+        return self._async_poll_concurrency
+
+    @property
+    def callback_pool_size(self): # Number of call_async() callbacks run concurrently
+        # Lazy read value
+        if self._callback_pool_size is None:
+            self._callback_pool_size = int(self.cf.get("callback_pool_size", DEFAULT_CALLBACK_POOL_SIZE))
+        return self._callback_pool_size
+
+    @property
+    def function_id_cache_path(self): # File that keeps the DaaS function IDs across restarts, disabled if empty
+        # Lazy read value
+        if self._function_id_cache_path is None:
+            self._function_id_cache_path = self.cf.get("function_id_cache_path", DEFAULT_FUNCTION_ID_CACHE_PATH) or ""
+        return self._function_id_cache_path
+
+    @property
+    def function_id_cache_size(self): # Maximum number of function IDs kept in the file
+        # Lazy read value
+        if self._function_id_cache_size is None:
+            self._function_id_cache_size = int(self.cf.get("function_id_cache_size", DEFAULT_FUNCTION_ID_CACHE_SIZE))
+        return self._function_id_cache_size
+
+    @property
+    def http_pool_size(self): # Connections kept alive per host, one per dispatcher thread plus those of the poller by default
+        # Lazy read value
+        if self._http_pool_size is None:
+            self._http_pool_size = int(self.cf.get("http_pool_size", self.dispatcher_pool_size + self.async_poll_concurrency))
+        return self._http_pool_size
+
+    @property
+    def ecf_ca_bundle(self): # CA certificate(s) that sign the Edge Cluster Frontend certificates, None to use the system ones
+        # Lazy read value
+        if self._ecf_ca_bundle is None:
+            self._ecf_ca_bundle = self.cf.get("ecf_ca_bundle") or ""
+        return self._ecf_ca_bundle or None
+
+    @property
+    def ecf_balancing_policy(self): # round_robin, least_outstanding or latency_weighted
+        # Lazy read value
+        if self._ecf_balancing_policy is None:
+            self._ecf_balancing_policy = str(self.cf.get("ecf_balancing_policy", DEFAULT_ECF_BALANCING_POLICY))
+        return self._ecf_balancing_policy
+
+    @property
+    def max_edge_clusters(self): # Number of Edge Clusters among which the calls are spread, 0 for all of them
+        # Lazy read value
+        if self._max_edge_clusters is None:
+            self._max_edge_clusters = int(self.cf.get("max_edge_clusters", DEFAULT_MAX_EDGE_CLUSTERS))
+        return self._max_edge_clusters
+
+    @property
+    def latency_probe_samples(self): # Probes sent to each Edge Cluster when MAX_LATENCY is set, the median is kept
+        # Lazy read value
+        if self._latency_probe_samples is None:
+            self._latency_probe_samples = int(self.cf.get("latency_probe_samples", DEFAULT_LATENCY_PROBE_SAMPLES))
+        return self._latency_probe_samples
+
+    @property
+    def latency_probe_timeout(self): # Seconds given to probe all the Edge Clusters
+        # Lazy read value
+        if self._latency_probe_timeout is None:
+            self._latency_probe_timeout = float(self.cf.get("latency_probe_timeout", DEFAULT_LATENCY_PROBE_TIMEOUT))
+        return self._latency_probe_timeout
+
+    @property
+    def latency_probe_interval(self): # Seconds between two background probes of the known Edge Clusters
+        # Lazy read value
+        if self._latency_probe_interval is None:
+            self._latency_probe_interval = float(self.cf.get("latency_probe_interval", DEFAULT_LATENCY_PROBE_INTERVAL))
+        return self._latency_probe_interval
+
+    @property
+    def latency_report_interval(self): # Seconds between two latency reports to the Cognit Frontend, 0 to not report them
+        # Lazy read value
+        if self._latency_report_interval is None:
+            self._latency_report_interval = float(self.cf.get("latency_report_interval", DEFAULT_LATENCY_REPORT_INTERVAL))
+        return self._latency_report_interval
+
+    @property
+    def ecf_reselection_interval(self): # Seconds between two re-evaluations of the chosen Edge Cluster, 0 to keep it
+        # Lazy read value
+        if self._ecf_reselection_interval is None:
+            self._ecf_reselection_interval = float(self.cf.get("ecf_reselection_interval", DEFAULT_ECF_RESELECTION_INTERVAL))
+        return self._ecf_reselection_interval
+
+    @property
+    def ecf_switch_min_improvement(self): # Milliseconds of latency another Edge Cluster must save to switch to it
+        # Lazy read value
+        if self._ecf_switch_min_improvement is None:
+            self._ecf_switch_min_improvement = float(self.cf.get("ecf_switch_min_improvement", DEFAULT_ECF_SWITCH_MIN_IMPROVEMENT))
+        return self._ecf_switch_min_improvement
+
+    @property
+    def ecf_switch_min_ratio(self): # Fraction of the current latency another Edge Cluster must save to switch to it
+        # Lazy read value
+        if self._ecf_switch_min_ratio is None:
+            self._ecf_switch_min_ratio = float(self.cf.get("ecf_switch_min_ratio", DEFAULT_ECF_SWITCH_MIN_RATIO))
+        return self._ecf_switch_min_ratio
+
+    @property
+    def token_refresh_margin(self): # Seconds before its expiry at which the token is renewed, 0 to wait for it to expire
+        # Lazy read value
+        if self._token_refresh_margin is None:
+            self._token_refresh_margin = float(self.cf.get("token_refresh_margin", DEFAULT_TOKEN_REFRESH_MARGIN))
+        return self._token_refresh_margin
+
+    @property
+    def log_level(self): # Minimum level of the log records, e.g. DEBUG or INFO
+        # Lazy read value
+        if self._log_level is None:
+            self._log_level = parse_log_level(self.cf.get("log_level", DEFAULT_LOG_LEVEL), DEFAULT_LOG_LEVEL)
+        return self._log_level
+
+    @property
+    def log_console_level(self): # Minimum level of the log records written to the console
+        # Lazy read value
+        if self._log_console_level is None:
+            self._log_console_level = parse_log_level(self.cf.get("log_console_level", DEFAULT_LOG_CONSOLE_LEVEL), DEFAULT_LOG_CONSOLE_LEVEL)
+        return self._log_console_level
+
+    @property
+    def log_file(self): # File the log records are written to, empty to not write one
+        # Lazy read value
+        if self._log_file is None:
+            self._log_file = self.cf.get("log_file", DEFAULT_LOG_FILE) or ""
+        return self._log_file
+
+    @property
+    def log_max_bytes(self): # Size at which the log file is rotated, 0 to not rotate it by size
+        # Lazy read value
+        if self._log_max_bytes is None:
+            self._log_max_bytes = int(self.cf.get("log_max_bytes", DEFAULT_LOG_MAX_BYTES))
+        return self._log_max_bytes
+
+    @property
+    def log_backup_count(self): # Rotated log files kept
+        # Lazy read value
+        if self._log_backup_count is None:
+            self._log_backup_count = int(self.cf.get("log_backup_count", DEFAULT_LOG_BACKUP_COUNT))
+        return self._log_backup_count
+
+    @property
+    def log_rotate_interval(self): # Seconds after which the log file is rotated, 0 to not rotate it by time
+        # Lazy read value
+        if self._log_rotate_interval is None:
+            self._log_rotate_interval = float(self.cf.get("log_rotate_interval", DEFAULT_LOG_ROTATE_INTERVAL))
+        return self._log_rotate_interval
+
+    @property
+    def log_queue_size(self): # Log records waiting to be written beyond which new ones are dropped
+        # Lazy read value
+        if self._log_queue_size is None:
+            self._log_queue_size = int(self.cf.get("log_queue_size", DEFAULT_LOG_QUEUE_SIZE))
+        return self._log_queue_size
+
+    @property
+    def metrics_host(self): # Address on which the metrics are served
+        # Lazy read value
+        if self._metrics_host is None:
+            self._metrics_host = str(self.cf.get("metrics_host", DEFAULT_METRICS_HOST))
+        return self._metrics_host
+
+    @property
+    def metrics_port(self): # Port on which the metrics are served, 0 to not serve them
+        # Lazy read value
+        if self._metrics_port is None:
+            self._metrics_port = int(self.cf.get("metrics_port", DEFAULT_METRICS_PORT))
+        return self._metrics_port
+
     @property
     def servl_runt_port(self): # TODO: Remove
         # Lazy read value
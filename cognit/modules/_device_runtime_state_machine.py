@@ -1,12 +1,27 @@
-from cognit.modules._edge_cluster_frontend_client import EdgeClusterFrontendClient
+from cognit.modules._edge_cluster_frontend_client import EdgeClusterFrontendClient, is_connect_error, is_unknown_function_error
+from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecReturnCode, AsyncExecStatus
+from cognit.modules._async_execution_poller import AsyncExecutionPoller
 from cognit.modules._cognit_frontend_client import CognitFrontendClient, Scheduling
-from cognit.modules._sync_result_queue import SyncResultQueue
+from cognit.modules._callback_executor import CallbackExecutor
+from cognit.modules._call_dispatcher import CallDispatcher
 from cognit.modules._callback_timer import CallbackTimer
+from cognit.modules._edge_cluster_balancer import EdgeClusterBalancer
+from cognit.modules._latency_calculator import LatencyCalculator
+from cognit.modules._latency_monitor import LatencyMonitor
+from cognit.modules._token_refresher import TokenRefresher
+from cognit.modules._call_timings import CallStats
+from cognit.models._call_timings import QUEUE_WAIT
+from cognit.modules._metrics import STATE_TRANSITIONS, REINITS
+from cognit.modules._http_session import create_http_session
 from cognit.modules._cognitconfig import CognitConfig
 from cognit.modules._call_queue import CallQueue
 from cognit.modules._logger import CognitLogger
-from cognit.models._device_runtime import Call
+from cognit.models._device_runtime import Call, ExecutionMode
 from statemachine import StateMachine, State
+from threading import Event
+import requests as req
+import json
+import time
 
 import sys
 
@@ -60,20 +75,25 @@ class DeviceRuntimeStateMachine(StateMachine):
 
     # 4.1 Request another function if the clients are connected
     result_given = ready.to.itself(cond=["is_cfc_connected", "is_ecf_connected"], unless=["have_requirements_changed", "is_new_ecf_address_set"])
-    # 4.2 Request new token if the one of the clients lost its connection
+    # 4.2 Request new token if the CFC client lost its connection
     token_not_valid_ready = ready.to(init, unless=["is_cfc_connected"])
-    token_not_valid_ready_2 = ready.to(init, unless=["is_ecf_connected"])
+    # 4.2.1 Every ECF lost its connection, get the ECFs again keeping the token and the uploaded functions
+    ecf_lost_ready = ready.to(get_ecf_address, cond=["is_cfc_connected"], unless=["is_ecf_connected"])
     # 4.3 The requirements have changed, therefore, the requirements are uploaded again
     ready_update_requirements = ready.to(send_init_request, cond=["is_cfc_connected", "is_ecf_connected", "have_requirements_changed"])
     # 4.4 Connect to the Edge Cluster Frontend Client if the address has changed
     ready_update_ecf_address = ready.to(get_ecf_address, cond=["is_cfc_connected", "is_ecf_connected", "is_new_ecf_address_set"], unless=["have_requirements_changed"])
   
-    def __init__(self, config: CognitConfig, requirements: Scheduling, call_queue: CallQueue, sync_result_queue: SyncResultQueue):
+    def __init__(self, config: CognitConfig, requirements: Scheduling, call_queue: CallQueue, call_stats: CallStats = None):
         
-        # Clients
+        # Clients, the calls are spread among the Edge Clusters by the balancer
+        self.balancer = EdgeClusterBalancer(config.ecf_balancing_policy)
         self.cfc = None
         self.ecf = None
         self.new_ecf_address = None
+        # Edge Clusters offered along with new_ecf_address, the chosen one first
+        self.new_available_ecfs = []
+        self.ecc_address = None
 
         # Communication parameters
         self.token = None
@@ -82,6 +102,9 @@ class DeviceRuntimeStateMachine(StateMachine):
         self.config = config
         self.timer = None
 
+        # Shared by every client created, so that the connections survive a re-init
+        self.http_session = create_http_session(config.http_pool_size)
+
         # Counters
         self.up_req_counter = 0
         self.get_address_counter = 0
@@ -93,12 +116,42 @@ class DeviceRuntimeStateMachine(StateMachine):
         self.requirements_uploaded = False
         self.requirements_changed = False
 
-        # Get queues
+        # Get queue
         self.call_queue = call_queue
-        self.sync_results_queue = sync_result_queue
+
+        # Set whenever something happens that may enable a transition
+        self.wakeup_event = Event()
+
+        # Workers that offload the calls while the state machine is ready
+        self.dispatcher = CallDispatcher(call_queue, self.execute_call, config.dispatcher_pool_size)
+
+        # Collects the results of the executions submitted in ASYNC mode
+        self.poller = AsyncExecutionPoller(self.deliver_polled_result, config.async_poll_interval, config.async_poll_concurrency, self.release_polled_ecf)
+
+        # Runs the callbacks of the calls
+        self.callback_executor = CallbackExecutor(config.callback_pool_size)
+
+        # Keeps the latency of the known Edge Clusters, it outlives the clients
+        latency_calculator = LatencyCalculator(config.latency_probe_samples, config.latency_probe_timeout)
+        self.latency_monitor = LatencyMonitor(latency_calculator, config.latency_probe_interval, config.latency_report_interval, self.report_latencies)
+
+        # Time spent by the finished calls in each phase, per function
+        self.call_stats = call_stats if call_stats is not None else CallStats()
+
+        # Renews the token before it expires, for every client at once
+        self.token_refresher = TokenRefresher(self.refresh_token, self.set_token, config.token_refresh_margin)
 
         super().__init__()
 
+    # Called after every transition, it counts them
+    def after_transition(self, source: State, target: State):
+
+        STATE_TRANSITIONS.labels(source.id, target.id).inc()
+
+        # Authenticating again after having left the init state
+        if target.id == "init" and source.id != "init":
+            REINITS.inc()
+
     # Get credentials by instantiating a CognitFrontendClient and authenticates to the Cognit Frontend  
     def on_enter_init(self):
 
@@ -111,11 +164,14 @@ class DeviceRuntimeStateMachine(StateMachine):
         self.get_address_counter = 0
 
         # Instantiate Cognit Frontend Client
-        self.cfc = CognitFrontendClient(self.config)
+        self.cfc = CognitFrontendClient(self.config, self.http_session, self.latency_monitor)
 
         # This function will return if the client successfull authenticates or not
         self.token = self.cfc._authenticate()
-        self.logger.debug("Token: " + str(self.token))
+        self.logger.debug("Token: %s", self.token)
+
+        if self.token is not None and self.config.token_refresh_margin > 0:
+            self.token_refresher.schedule(self.token)
 
     # Upload processing requirements 
     def on_enter_send_init_request(self):
@@ -132,7 +188,7 @@ class DeviceRuntimeStateMachine(StateMachine):
             self.requirements = self.new_requirements
 
         # Upload requirements
-        self.logger.debug("Uploading requirements: " + str(self.requirements))
+        self.logger.debug("Uploading requirements: %s", self.requirements)
         self.requirements_uploaded = self.cfc.init(self.requirements)
 
         if self.requirements_uploaded:
@@ -155,88 +211,507 @@ class DeviceRuntimeStateMachine(StateMachine):
         # Get Edge Cluster Frontend
         if self.new_ecf_address is not None:
 
-            self.logger.debug("Using new ECF address: " + str(self.new_ecf_address))
+            self.logger.debug("Using new ECF address: %s", self.new_ecf_address)
             self.ecc_address = self.new_ecf_address
+            # Found by the reselection timer, only this thread changes the ones the CFC offers
+            self.cfc.available_ecfs = self.new_available_ecfs
             
         else:
 
             self.logger.debug("Getting Edge Cluster address from CFC")
             self.ecc_address = self.cfc._get_edge_cluster_address()
 
-        # Initialize Edge Cluster client
-        self.ecf = EdgeClusterFrontendClient(self.token, self.ecc_address)
+        # Initialize a client for the chosen Edge Cluster and for the others to spread the calls
+        addresses = self.get_ecf_addresses(self.ecc_address)
+        self.logger.debug("Balancing calls among Edge Clusters: %s", addresses)
+        self.balancer.set_clients([EdgeClusterFrontendClient(self.token, address, self.http_session, self.config.ecf_ca_bundle) for address in addresses])
+
+        # Every cluster offered is monitored, not only those in use, to choose among them later
+        self.latency_monitor.set_addresses(addresses + (self.cfc.available_ecfs or []))
 
         self.new_ecf_address = None
+        self.new_available_ecfs = []
 
         # Reset attemps counter
         self.get_address_counter += 1
 
-    # State that waits for user functions offloading
+    # State in which the dispatcher offloads the user functions
     def on_enter_ready(self):
 
-        if self.timer is not None:
+        # Look for a better Edge Cluster from time to time
+        if self.timer is None and self.config.ecf_reselection_interval > 0:
 
-            self.timer = CallbackTimer(600, self.get_new_ecf_address)
+            self.timer = CallbackTimer(self.config.ecf_reselection_interval, self.get_new_ecf_address)
             self.timer.start()
 
         # Reset counter
         self.get_address_counter = 0
 
-        # Get Call
-        call = self.call_queue.get_call()  # type: Call
+        # Let the dispatcher offload the queued calls
+        self.dispatcher.resume()
+
+    # The dispatcher must not use the clients while they are being renewed
+    def on_exit_ready(self):
+
+        self.dispatcher.pause()
+
+    def execute_call(self, call: Call):
+        """
+        Uploads the function of the call and executes it in the Edge Cluster.
+        It runs on the dispatcher threads, concurrently with the state machine.
+
+        Args:
+            call (Call): Call to be offloaded
+        """
+
+        # The caller withdrew the call, do not waste an ECF slot on it
+        if not call.future.set_running_or_notify_cancel():
+            self.logger.debug("Call was cancelled before being offloaded")
+            return
+
+        call.timings.record(QUEUE_WAIT, call.timings.created_at)
 
-        # If there is a call, offload it
-        if call is not None:
+        # Keep the clients of the moment the call was taken
+        cfc = self.cfc
+        ecf = None
+
+        if self.is_deadline_expired(call):
+
+            # The caller is no longer waiting for the result
+            self.logger.debug("Call deadline expired before being offloaded")
+            result = ExecResponse(ret_code=ExecReturnCode.ERROR, err="Call deadline expired before being offloaded")
+
+        else:
 
             # Get the app requirements id
-            app_req_id = self.cfc.get_app_requirements_id()
+            app_req_id = cfc.get_app_requirements_id()
 
             # Upload function to the ECF
-            function_id = self.cfc.upload_function_to_daas(call.function)
-            
+            function_id = cfc.upload_function_to_daas(call.function, timeout=call.get_remaining_time(), timings=call.timings)
+
             # Execute function
             if function_id is None:
 
                 self.logger.error("Function could not be uploaded")
-                
+                result = ExecResponse(ret_code=ExecReturnCode.ERROR, err="Function could not be uploaded")
+
+            elif self.is_deadline_expired(call):
+
+                self.logger.debug("Call deadline expired while uploading the function")
+                result = ExecResponse(ret_code=ExecReturnCode.ERROR, err="Call deadline expired while uploading the function")
+
             else:
 
-                try:
+                result = self.offload_to_ecf(cfc, function_id, app_req_id, call)
+
+        # The result of a submitted ASYNC execution is delivered by the poller
+        if result is not None:
+            self.deliver_result(call, result)
+
+        # Let the state machine react if the call broke the CFC connection or the last ECF one
+        if not cfc.get_has_connection() or not self.balancer.get_has_connection():
+            self.notify_event()
+
+    def offload_to_ecf(self, cfc: CognitFrontendClient, function_id: int, app_req_id: int, call: Call) -> ExecResponse | None:
+        """
+        Executes the call in the Edge Cluster chosen by the balancer. If the connection to
+        the Edge Cluster cannot be opened, the call fails over to the next connected one right
+        away. Once the request may have been sent, it is not sent again, as the function
+        could run twice.
+
+        Returns:
+            ExecResponse | None: The result of the call, None if the poller will collect it
+        """
+
+        failed_ecfs = []
+
+        while True:
+
+            # Edge Cluster that takes this call
+            ecf = self.balancer.acquire(exclude=failed_ecfs)
+
+            if ecf is None:
+
+                self.logger.error("No Edge Cluster Frontend is connected")
+                return ExecResponse(ret_code=ExecReturnCode.ERROR, err="No Edge Cluster Frontend is connected")
+
+            start = time.monotonic()
+            result = None
+            submitted = False
 
-                    if call.mode == "sync":
+            try:
 
-                        # Execute function
-                        result = self.ecf.execute_function(function_id, app_req_id, call.mode, call.callback, call.params, call.timeout) 
-                        # Add result to the queue
-                        self.sync_results_queue.add_sync_result(result)
+                result = self.run_execution(ecf, function_id, app_req_id, call)
 
-                    else:
+                # IDs reused from a previous process are validated by their first execution
+                if not cfc.is_function_id_verified(call.function):
+                    result = self.validate_function_id(cfc, ecf, app_req_id, call, result)
 
-                        self.ecf.execute_function(function_id, app_req_id, call.mode, call.callback, call.params, call.timeout)
+                # The execution still runs in the Edge Cluster, the poller releases it when it finishes
+                submitted = result is None
+                return result
 
-                except Exception as e:
-                    
-                    self.logger.error("There was a request error. Detailed message: {0}".format(e))
+            except req.exceptions.ConnectionError as e:
+
+                self.logger.warning(f"Edge Cluster Frontend {ecf.address} could not be reached, failing over: {e}")
+                failed_ecfs.append(ecf)
+
+                if self.is_deadline_expired(call):
+                    return ExecResponse(ret_code=ExecReturnCode.ERROR, err=str(e))
+
+            finally:
+
+                if not submitted:
+
+                    # Only complete executions tell how fast the Edge Cluster is
+                    elapsed = time.monotonic() - start if result is not None else None
+                    self.balancer.release(ecf, elapsed)
+
+                    if elapsed is not None:
+                        self.latency_monitor.add_call_sample(ecf.address, elapsed * 1000)
+
+    def run_execution(self, ecf: EdgeClusterFrontendClient, function_id: int, app_req_id: int, call: Call) -> ExecResponse | None:
+        """
+        Executes an uploaded function in the Edge Cluster.
+
+        Returns:
+            ExecResponse | None: The result of the call, None if the poller will collect it
+        """
+
+        # Whatever is left of the deadline is given to the execution request
+        timeout = call.timeout if call.deadline is None else call.get_remaining_time()
+
+        try:
+
+            if call.mode == ExecutionMode.ASYNC and self.config.ecf_async_mode:
+                return self.submit_async_execution(ecf, function_id, app_req_id, call, timeout)
+            else:
+                return ecf.execute_function(function_id, app_req_id, call.params, timeout, timings=call.timings)
+
+        except req.exceptions.RequestException as e:
+
+            # The request did not reach the ECF, the call can be sent to another one
+            if is_connect_error(e):
+                raise e
+
+            self.logger.error("The connection to the Edge Cluster Frontend failed once the request could have been sent: {0}".format(e))
+            return ExecResponse(ret_code=ExecReturnCode.ERROR, err=str(e))
+
+        except Exception as e:
+
+            self.logger.error("There was a request error. Detailed message: {0}".format(e))
+            return ExecResponse(ret_code=ExecReturnCode.ERROR, err=str(e))
+
+    def validate_function_id(self, cfc: CognitFrontendClient, ecf: EdgeClusterFrontendClient, app_req_id: int, call: Call, result: ExecResponse | None) -> ExecResponse | None:
+        """
+        Checks the result of the first execution of a function ID taken from the function ID cache.
+        If the ECF tells that the DaaS does not know the ID, the function is uploaded and executed
+        again. Any other result, failed or not, tells that the ID is valid.
+
+        Returns:
+            ExecResponse | None: The result of the call, None if the poller will collect it
+        """
+
+        # The result of a submitted ASYNC execution validates the ID when the poller collects it
+        if result is None:
+            return result
+
+        if not is_unknown_function_error(result):
+            cfc.set_function_id_verified(call.function)
+            return result
+
+        self.logger.warning("The DaaS does not know the cached function ID, uploading the function again")
+        cfc.forget_function(call.function)
+
+        function_id = cfc.upload_function_to_daas(call.function, timeout=call.get_remaining_time(), timings=call.timings)
+
+        if function_id is None or self.is_deadline_expired(call):
+            return result
+
+        return self.run_execution(ecf, function_id, app_req_id, call)
+
+    def submit_async_execution(self, ecf: EdgeClusterFrontendClient, function_id: int, app_req_id: int, call: Call, timeout: float) -> ExecResponse | None:
+        """
+        Submits the call to the ECF in ASYNC mode and hands its execution id to the poller.
+
+        Returns:
+            ExecResponse | None: The result if the ECF already gave it, None if the poller will collect it
+        """
+
+        status = ecf.execute_function_async(function_id, app_req_id, call.params, timeout, timings=call.timings)
+
+        if status.status == AsyncExecStatus.WORKING:
+
+            self.logger.debug("Execution %s submitted", status.exec_id.faas_task_uuid)
+            self.poller.add(ecf, status.exec_id, call)
+            return None
+
+        # READY with the result, or FAILED with the reason
+        if status.status != AsyncExecStatus.WORKING and status.res is not None:
+            return status.res
+
+        return ExecResponse(ret_code=ExecReturnCode.ERROR, err="Execution failed")
+
+    def release_polled_ecf(self, ecf: EdgeClusterFrontendClient):
+        """
+        Gives back to the balancer the Edge Cluster of an ASYNC execution that left the poller.
+        The time it took is not a latency sample, it depends on the poll interval.
+
+        Args:
+            ecf (EdgeClusterFrontendClient): Client of the Edge Cluster that ran the execution
+        """
+
+        self.balancer.release(ecf)
+
+        # Let the state machine react if the last Edge Cluster lost its connection
+        if not self.balancer.get_has_connection():
+            self.notify_event()
+
+    def deliver_polled_result(self, call: Call, result: ExecResponse):
+        """
+        Delivers the result of an ASYNC execution collected by the poller. If the function ID was
+        taken from the function ID cache, the result tells whether the DaaS knows it.
+
+        Args:
+            call (Call): Call that has finished
+            result (ExecResponse): Result of the call
+        """
+
+        cfc = self.cfc
+
+        if cfc is not None and not cfc.is_function_id_verified(call.function):
+
+            # The call is not executed again, the next one uploads the function
+            if is_unknown_function_error(result):
+                self.logger.warning("The DaaS does not know the cached function ID, the next call uploads the function again")
+                cfc.forget_function(call.function)
+            # Errors raised by the poller itself, as an expired deadline, tell nothing about the ID
+            elif result.ret_code.value == ExecReturnCode.SUCCESS.value:
+                cfc.set_function_id_verified(call.function)
+
+        self.deliver_result(call, result)
+
+    def deliver_result(self, call: Call, result: ExecResponse):
+        """
+        Gives the result of a call to its callback, if any, and to its future.
+        The time spent in each phase is attached to the result and added to the statistics.
+
+        Args:
+            call (Call): Call that has finished
+            result (ExecResponse): Result of the call
+        """
+
+        call.timings.finish()
+        result.timings = call.timings.get_durations()
+        self.call_stats.add(call.function, call.timings)
+
+        # Deliver the result to the caller that submitted this call
+        call.future.set_result(result)
+
+        # The callback runs in its own pool so that it does not delay the next offloads
+        if call.callback is not None:
+            self.callback_executor.submit(call.callback, result, key=call.callback_key)
+
+    def fail_queued_calls(self):
+        """
+        Completes with an ERROR result the calls left in the queue once the dispatcher has
+        stopped, so that no caller waits for them forever.
+        """
+
+        for call in self.call_queue.drain():
+
+            # The caller already withdrew it
+            if not call.future.set_running_or_notify_cancel():
+                continue
+
+            self.deliver_result(call, ExecResponse(ret_code=ExecReturnCode.ERROR, err="The Device Runtime stopped before the call was offloaded"))
+
+    def refresh_token(self) -> str | None:
+        """
+        Gets a new token from the CFC. It runs on the token refresher thread.
+
+        Returns:
+            str | None: The new token, None if it could not be obtained
+        """
+
+        cfc = self.cfc
+
+        if cfc is None or not cfc.get_has_connection():
+            return None
+
+        return cfc.refresh_token()
+
+    def set_token(self, token: str):
+        """
+        Hands a new token to the CFC client and to every ECF client. The requests read the
+        token once when they are built, so each one carries either the old or the new one.
+
+        Args:
+            token (str): Token that replaces the current one
+        """
+
+        self.token = token
+        self.cfc.set_token(token)
+
+        for client in self.balancer.get_clients():
+            client.token = token
+
+    def report_latencies(self, latencies: dict) -> bool:
+        """
+        Sends a batch of Edge Cluster latencies to the CFC. It runs on the latency monitor thread.
+
+        Args:
+            latencies (dict): Latency in milliseconds of each Edge Cluster Frontend
+
+        Returns:
+            bool: True if the CFC accepted them
+        """
+
+        cfc = self.cfc
+
+        if cfc is None or not cfc.get_has_connection():
+            return False
+
+        return cfc._send_latency_measurements(json.dumps(latencies))
+
+    def get_ecf_addresses(self, primary_address: str) -> list[str]:
+        """
+        Returns the addresses of the Edge Clusters among which the calls are spread: the
+        chosen one first, then the others offered by the CFC, up to max_edge_clusters.
+
+        Args:
+            primary_address (str): Address of the chosen Edge Cluster
+
+        Returns:
+            list[str]: Addresses of the Edge Clusters
+        """
+
+        addresses = [primary_address]
+
+        for address in self.cfc.available_ecfs or []:
+            if address not in addresses:
+                addresses.append(address)
+
+        if self.config.max_edge_clusters > 0:
+            addresses = addresses[:self.config.max_edge_clusters]
+
+        return addresses
+
+    # Client of the preferred Edge Cluster
+    @property
+    def ecf(self) -> EdgeClusterFrontendClient | None:
+        return self.balancer.get_primary()
+
+    @ecf.setter
+    def ecf(self, client: EdgeClusterFrontendClient | None):
+        self.balancer.set_clients([client] if client is not None else [])
 
     def get_new_ecf_address(self):
         """
-        Get the new Edge Cluster Frontend address from the CFC.
+        Re-evaluates the Edge Cluster chosen by the CFC. It runs periodically on the timer thread
+        while the device runtime is ready. The calls switch to the new one if the current one is
+        no longer offered or if the new one is faster by the configured thresholds, and only
+        once a connection to it is open. Calls in flight finish on their Edge Cluster.
         """
-        self.new_ecf_address = self.cfc._get_edge_cluster_address()
 
-        if self.new_ecf_address == self.ecc_address:
+        cfc = self.cfc
+        current_address = self.ecc_address
+        # The Edge Clusters in use are not changed from this thread
+        candidates = cfc.get_edge_cluster_candidates()
+        candidate_address = candidates[0] if candidates else None
+
+        if candidate_address is None or candidate_address == current_address:
             self.logger.debug("New ECF address is the same as the current one")
-            self.new_ecf_address = None
+            return
+
+        if current_address in candidates and not self.is_ecf_better(current_address, candidate_address):
+            self.logger.debug("Keeping ECF %s, %s is not fast enough to switch", current_address, candidate_address)
+            return
+
+        # Connect before cutting over, the connection is kept alive in the shared session
+        candidate = EdgeClusterFrontendClient(self.token, candidate_address, self.http_session, self.config.ecf_ca_bundle)
+
+        if not candidate.warm_up():
+            return
+
+        self.logger.info(f"Switching from ECF {current_address} to {candidate_address}")
+        self.new_available_ecfs = candidates
+        self.new_ecf_address = candidate_address
+        self.notify_event()
+
+    def is_ecf_better(self, current_address: str, candidate_address: str) -> bool:
+        """
+        Compares the measured latencies of two Edge Clusters. The candidate must save both
+        ecf_switch_min_improvement milliseconds and the ecf_switch_min_ratio fraction of the
+        current latency, so that the calls do not move back and forth between similar ones.
+
+        Returns:
+            bool: True if the calls should switch to the candidate
+        """
+
+        latencies = self.latency_monitor.get_latencies([current_address, candidate_address])
+        current_latency = latencies.get(current_address)
+        candidate_latency = latencies.get(candidate_address)
+
+        if candidate_latency is None:
+            return False
+
+        # The current one no longer answers
+        if current_latency is None:
+            return True
+
+        improvement = current_latency - candidate_latency
+
+        return improvement >= self.config.ecf_switch_min_improvement and improvement >= current_latency * self.config.ecf_switch_min_ratio
+
+    def notify_event(self):
+        """
+        Wakes up the thread waiting in wait_for_event() so the conditions are re-evaluated.
+        """
+        self.wakeup_event.set()
+
+    def clear_events(self):
+        """
+        Discards the pending notifications. Must be called before evaluating the conditions
+        so that any event happening during the evaluation is not lost.
+        """
+        self.wakeup_event.clear()
+
+    def wait_for_event(self, timeout: float = None) -> bool:
+        """
+        Blocks until notify_event() is called or the timeout expires.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds. Defaults to None (no limit).
+
+        Returns:
+            bool: True if an event was notified, False if the timeout expired
+        """
+        return self.wakeup_event.wait(timeout)
+
+    # Checks if there is nothing to do until a new event arrives
+    def is_idle(self):
+        return self.current_state.id == "ready" \
+            and self.is_cfc_connected() \
+            and self.is_ecf_connected() \
+            and not self.have_requirements_changed() \
+            and not self.is_new_ecf_address_set()
                          
+    # Checks if the caller of the call has stopped waiting for its result
+    def is_deadline_expired(self, call: Call):
+        return call.deadline is not None and call.get_remaining_time() <= 0
+
     # Checks if CF client has connection with the CF
     def is_cfc_connected(self):
-        self.logger.debug("Cognit Frontend Client connected: " + str(self.cfc.get_has_connection()))
-        return self.cfc.get_has_connection()
+        is_connected = self.cfc.get_has_connection()
+        self.logger.debug("Cognit Frontend Client connected: %s", is_connected)
+        return is_connected
 
-    # Checks if ECF client has connection with the ECF
+    # Checks if at least one ECF client has connection with its ECF
     def is_ecf_connected(self):
-        self.logger.debug("Edge Cluster Frontend connected: " + str(self.ecf.get_has_connection()))
-        return self.ecf.get_has_connection()
+        is_connected = self.balancer.get_has_connection()
+        self.logger.debug("Edge Cluster Frontend connected: %s", is_connected)
+        return is_connected
     
     # Check if the token received is empty
     def is_token_empty(self):
@@ -244,29 +719,29 @@ class DeviceRuntimeStateMachine(StateMachine):
     
     # Check if three requirement upload attemps have been made 
     def is_requirement_upload_limit_reached(self):
-        self.logger.debug("Number of attempts uploading requirements: " + str(self.up_req_counter))
+        self.logger.debug("Number of attempts uploading requirements: %d", self.up_req_counter)
         self.has_requirements_upload_limit_reached = self.up_req_counter == 3
         return self.has_requirements_upload_limit_reached 
     
     # Check if the requirements are uploaded or not
     def are_requirements_uploaded(self):
-        self.logger.debug("Requirements uploaded: " + str(self.requirements_uploaded))
+        self.logger.debug("Requirements uploaded: %s", self.requirements_uploaded)
         return self.requirements_uploaded
     
     # Check if three attemps have been made for getting the address
     def is_get_address_limit_reached(self):
-        self.logger.debug("Number of attempts getting Edge Cluster address: " + str(self.get_address_counter))
+        self.logger.debug("Number of attempts getting Edge Cluster address: %d", self.get_address_counter)
         self.has_address_request_limit_reached = self.get_address_counter == 3
         return self.has_address_request_limit_reached
     
     # Check if the requirements have changed
     def have_requirements_changed(self):
-        self.logger.debug("Requirements changed: " + str(self.requirements_changed))
+        self.logger.debug("Requirements changed: %s", self.requirements_changed)
         return self.requirements_changed
     
     # Check if the new ECF address has been set
     def is_new_ecf_address_set(self):
-        self.logger.debug("New ECF address set: " + str(self.new_ecf_address is not None))
+        self.logger.debug("New ECF address set: %s", self.new_ecf_address is not None)
         return self.new_ecf_address is not None
 
     # Change the requirements of the Device Runtime
@@ -287,6 +762,7 @@ class DeviceRuntimeStateMachine(StateMachine):
             self.logger.debug("Changing requirements")
             self.new_requirements = new_requirements
             self.requirements_changed = True
+            self.notify_event()
             return True
         
 
@@ -0,0 +1,236 @@
+from cognit.modules._edge_cluster_frontend_client import EdgeClusterFrontendClient
+from cognit.modules._logger import CognitLogger
+from threading import Lock
+from enum import Enum
+import random
+import time
+
+# Weight of the last execution in the latency average of an Edge Cluster
+LATENCY_EWMA_ALPHA = 0.2
+# Seconds after which an Edge Cluster that lost its connection is tried again
+DEFAULT_RETRY_INTERVAL = 30.0
+
+class BalancingPolicy(str, Enum):
+    ROUND_ROBIN = "round_robin"
+    LEAST_OUTSTANDING = "least_outstanding"
+    LATENCY_WEIGHTED = "latency_weighted"
+
+"""
+Bookkeeping of a single Edge Cluster Frontend: requests in flight, average latency of
+its executions and when it was last seen failing.
+"""
+class EdgeClusterState:
+
+    def __init__(self, client: EdgeClusterFrontendClient):
+
+        self.client = client
+        self.outstanding = 0
+        self.latency = None
+        self.failures = 0
+        self.failed_at = None
+
+    def update_latency(self, elapsed: float):
+
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency = LATENCY_EWMA_ALPHA * elapsed + (1 - LATENCY_EWMA_ALPHA) * self.latency
+
+"""
+Spreads the offloaded calls across the clients of all the Edge Cluster Frontends given
+by the Cognit Frontend. The clients that lose their connection are left out until the
+retry interval expires, the others keep taking the calls.
+"""
+class EdgeClusterBalancer:
+
+    def __init__(self, policy: BalancingPolicy = BalancingPolicy.LEAST_OUTSTANDING, retry_interval: float = DEFAULT_RETRY_INTERVAL):
+        """
+        Args:
+            policy (BalancingPolicy): How the Edge Cluster of each call is chosen
+            retry_interval (float): Seconds after which a disconnected Edge Cluster is tried again
+        """
+
+        self.policy = BalancingPolicy(policy)
+        self.retry_interval = retry_interval
+        self.logger = CognitLogger()
+        self.mutex = Lock()
+        self.states = []
+        self.next_index = 0
+
+    def set_clients(self, clients: list[EdgeClusterFrontendClient]):
+        """
+        Replaces the clients among which the calls are spread. Calls in flight keep their client.
+        The Edge Clusters that were already known keep their requests in flight, latency and
+        failures, so the releases of those requests still count.
+
+        Args:
+            clients (list[EdgeClusterFrontendClient]): Clients of the Edge Clusters, the preferred one first
+        """
+
+        with self.mutex:
+
+            previous = {state.client.address: state for state in self.states}
+            states = []
+
+            for client in clients:
+
+                if client is None:
+                    continue
+
+                state = previous.pop(client.address, None)
+
+                if state is None:
+                    state = EdgeClusterState(client)
+                else:
+                    state.client = client
+
+                states.append(state)
+
+            self.states = states
+            self.next_index = 0
+
+    def get_clients(self) -> list[EdgeClusterFrontendClient]:
+        """
+        Returns the clients of all the Edge Clusters, the preferred one first
+        """
+
+        return [state.client for state in self.states]
+
+    def get_primary(self) -> EdgeClusterFrontendClient | None:
+        """
+        Returns the client of the preferred Edge Cluster, None if there is none
+        """
+
+        states = self.states
+        return states[0].client if states else None
+
+    def get_has_connection(self) -> bool:
+        """
+        Returns True if at least one of the Edge Clusters can take calls
+        """
+
+        return any(state.client.get_has_connection() for state in self.states)
+
+    def acquire(self, exclude: list[EdgeClusterFrontendClient] = None) -> EdgeClusterFrontendClient | None:
+        """
+        Chooses the Edge Cluster of the next call according to the policy. It must be
+        followed by release() once the request to the Edge Cluster has finished.
+
+        Args:
+            exclude (list[EdgeClusterFrontendClient]): Clients that must not be chosen, e.g. because they just failed
+
+        Returns:
+            EdgeClusterFrontendClient | None: Client of the chosen Edge Cluster, None if none is connected
+        """
+
+        with self.mutex:
+
+            candidates = [state for state in self._get_candidates() if exclude is None or state.client not in exclude]
+
+            if not candidates:
+                return None
+
+            if self.policy == BalancingPolicy.ROUND_ROBIN:
+                state = candidates[self.next_index % len(candidates)]
+                self.next_index += 1
+
+            elif self.policy == BalancingPolicy.LATENCY_WEIGHTED:
+                state = self._choose_by_latency(candidates)
+
+            else:
+                # Ties go to the fastest one, then to the preferred one
+                state = min(candidates, key=lambda s: (s.outstanding, s.latency if s.latency is not None else 0))
+
+            state.outstanding += 1
+            return state.client
+
+    def release(self, client: EdgeClusterFrontendClient, elapsed: float = None):
+        """
+        Records the outcome of a request sent to an Edge Cluster chosen by acquire()
+
+        Args:
+            client (EdgeClusterFrontendClient): Client returned by acquire()
+            elapsed (float): Duration of the request in seconds, None if it should not count for the latency
+        """
+
+        with self.mutex:
+
+            state = self._get_state(client)
+
+            if state is None:
+                # The Edge Cluster was dropped while the request was in flight
+                return
+
+            state.outstanding = max(0, state.outstanding - 1)
+
+            if not client.get_has_connection():
+
+                state.failures += 1
+                state.failed_at = time.monotonic()
+                self.logger.warning(f"Edge Cluster Frontend {client.address} lost its connection, {state.failures} consecutive failures")
+
+            else:
+
+                state.failures = 0
+
+                if elapsed is not None:
+                    state.update_latency(elapsed)
+
+    def get_status(self) -> list[dict]:
+        """
+        Returns the bookkeeping of every Edge Cluster, the preferred one first
+        """
+
+        with self.mutex:
+
+            return [{
+                "address": state.client.address,
+                "connected": state.client.get_has_connection(),
+                "outstanding": state.outstanding,
+                "latency": state.latency,
+                "failures": state.failures,
+            } for state in self.states]
+
+    def _get_candidates(self) -> list[EdgeClusterState]:
+
+        now = time.monotonic()
+        candidates = []
+
+        for state in self.states:
+
+            if not state.client.get_has_connection():
+
+                # It may have failed outside acquire() and release(), e.g. polling a result
+                if state.failed_at is None:
+                    state.failed_at = now
+
+                if now - state.failed_at < self.retry_interval:
+                    continue
+
+                # Give it another chance, the next release() tells if it recovered
+                self.logger.info(f"Retrying Edge Cluster Frontend {state.client.address}")
+                state.failed_at = now
+                state.client.set_has_connection(True)
+
+            candidates.append(state)
+
+        return candidates
+
+    def _choose_by_latency(self, candidates: list[EdgeClusterState]) -> EdgeClusterState:
+
+        measured = [state.latency for state in candidates if state.latency is not None]
+
+        # Unmeasured Edge Clusters are given the weight of the fastest one so that they get measured
+        fastest = min(measured) if measured else 1.0
+        weights = [1.0 / max(state.latency if state.latency is not None else fastest, 1e-6) for state in candidates]
+
+        return random.choices(candidates, weights=weights)[0]
+
+    def _get_state(self, client: EdgeClusterFrontendClient) -> EdgeClusterState | None:
+
+        # A client replaced by set_clients() still matches the state of its Edge Cluster
+        for state in self.states:
+            if state.client is client or state.client.address == client.address:
+                return state
+
+        return None
@@ -1,18 +1,120 @@
-from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecutionMode
+from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecReturnCode, ExecutionMode, AsyncExecResponse, AsyncExecStatus, AsyncExecId
 from cognit.modules._faas_parser import FaasParser
+from cognit.modules._tls_verification import tls_verification_cache
+from cognit.modules._http_session import create_http_session
+from cognit.models._call_timings import CallTimings, PARAMS_SERIALIZATION, EXECUTE, RESPONSE_PARSING, RESULT_DESERIALIZATION
+from cognit.modules._metrics import ECF_REQUEST_DURATION
 from cognit.modules._logger import CognitLogger
 import requests as req
 import pydantic
 import json
+import time
+import re
 
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 import logging
 logging.getLogger("urllib3").setLevel(logging.WARNING)
 
+# Endpoint that gives the status of an execution submitted in ASYNC mode
+ASYNC_EXECUTION_STATUS_PATH = "/v1/faas/{faas_task_uuid}/status"
+
+# Status the ECF answers with when the function ID is unknown to the DaaS
+UNKNOWN_FUNCTION_STATUS_CODE = 404
+# Error of the result when the DaaS does not know the function ID
+UNKNOWN_FUNCTION_ERROR = re.compile(r"^function( \S+)? not found", re.IGNORECASE)
+
+# Seconds an execution request waits for the ECF when the call has no timeout
+DEFAULT_EXECUTION_TIMEOUT = 120
+
+def get_execute_uri(address: str, func_id) -> str:
+    """
+    Returns the URI to execute a function in the ECF
+    """
+
+    return f"{address}/v1/functions/{func_id}/execute"
+
+def get_execute_qparams(app_req_id: int, exec_mode: ExecutionMode) -> dict:
+    """
+    Returns the query parameters of an execution request
+    """
+
+    return {
+        "app_req_id": app_req_id,
+        "mode": exec_mode.value
+    }
+
+def serialize_params(parser: FaasParser, params_tuple: tuple) -> str:
+    """
+    Returns the body of an execution request, the list of the serialized parameters in JSON
+    """
+
+    return json.dumps([parser.serialize(param) for param in params_tuple])
+
+def parse_exec_response(data: dict) -> ExecResponse:
+    """
+    Parses the JSON answered by the ECF to an execution request
+    """
+
+    return pydantic.parse_obj_as(ExecResponse, data)
+
+def deserialize_result(parser: FaasParser, result: ExecResponse) -> ExecResponse:
+    """
+    Deserializes the result of an execution in place, failed executions have none
+    """
+
+    if result.res is not None:
+        result.res = parser.deserialize(result.res)
+
+    return result
+
+def get_unknown_function_response(func_id) -> ExecResponse:
+    """
+    Returns the result of an execution whose function ID is unknown to the DaaS
+    """
+
+    return ExecResponse(ret_code=ExecReturnCode.ERROR, err=f"Function {func_id} not found")
+
+def is_unknown_function_error(result: ExecResponse | None) -> bool:
+    """
+    Tells whether an execution failed because the DaaS does not know the function ID,
+    and not because of the function itself or the Edge Cluster
+
+    Args:
+        result (ExecResponse | None): Result of the execution
+    """
+
+    if result is None or result.ret_code.value != ExecReturnCode.ERROR.value:
+        return False
+
+    return result.err is not None and UNKNOWN_FUNCTION_ERROR.match(result.err) is not None
+
+def is_connect_error(e: Exception) -> bool:
+    """
+    Tells whether a request failed before the connection to the server was open, so the
+    request was never sent and can be safely sent to another server.
+
+    Args:
+        e (Exception): Exception raised by the request
+    """
+
+    if isinstance(e, req.exceptions.ConnectTimeout):
+        return True
+
+    if not isinstance(e, req.exceptions.ConnectionError):
+        return False
+
+    # requests wraps the urllib3 error, the reason tells the phase the request failed in
+    reason = e.args[0] if e.args else None
+
+    if isinstance(reason, urllib3.exceptions.MaxRetryError):
+        reason = reason.reason
+
+    return isinstance(reason, (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError))
+
 class EdgeClusterFrontendClient:
 
-    def __init__(self, token: str, address: str):
+    def __init__(self, token: str, address: str, session: req.Session = None, ca_bundle: str = None):
         """
         Initializes EdgeClusterFrontendClient. 
 
@@ -20,9 +122,13 @@ class EdgeClusterFrontendClient:
             token (str): Token for the communication between the client 
             and the Edge Cluster Frontend
             address (str): address of the Edge Cluster Frontend
+            session (req.Session): Pooled session used to send the requests. A new one is created if None
+            ca_bundle (str): CA certificate(s) used to verify the Edge Cluster Frontend instead of the
+            system ones. If given, the requests are never sent without verification
         """
         
         self.logger = CognitLogger()
+        self.session = session if session is not None else create_http_session()
         self.set_has_connection(True)
         self.parser = FaasParser()
 
@@ -37,68 +143,237 @@ class EdgeClusterFrontendClient:
 
         self.token = token
         self.address = address
+        self.ca_bundle = ca_bundle
         
-    def execute_function(self, func_id: str, app_req_id: int, exec_mode: ExecutionMode, callback: callable, params_tuple: tuple, timeout: int = 120) -> None | ExecResponse:
+    def execute_function(self, func_id: str, app_req_id: int, params_tuple: tuple, timeout: int = DEFAULT_EXECUTION_TIMEOUT, timings: CallTimings = None) -> ExecResponse:
         """
-        Triggers the execution of a function described by its id in a certain mode using certain paramters for its execution
+        Triggers the execution of a function described by its id in SYNC mode using certain paramters for its execution.
+        Executions in ASYNC mode are submitted with execute_function_async()
 
         Args:
             func_id (str): Identifier of the function to be executed
             app_req_id (int): Identifier of the requirements associated to the function
-            exec_mode (ExecutionMode): Selected mode for offloading (SYNC OR ASYNC)
-            params (List[Any]): Arguments needed to call the function
+            params_tuple (tuple): Arguments needed to call the function
+            timeout (int): Maximum time in seconds to wait for the result
+            timings (CallTimings): Timings of the call, where the time of each phase is recorded
 
         Returns:
-            None | ExecResponse: If the execution mode is ASYNC, the function returns None. If the execution mode is SYNC, the function returns an ExecResponse object.
+            ExecResponse: Result of the execution
         """
 
         # Create request
-        self.logger.debug(f"Execute function with ID {func_id}")
-        uri = f"{self.address}/v1/functions/{func_id}/execute"
+        self.logger.debug("Execute function with ID %s", func_id)
+        uri = get_execute_uri(self.address, func_id)
 
         # Header
         header = self.get_header(self.token)
         # Query parameters
-        qparams = self.get_qparams(app_req_id, ExecutionMode.SYNC) # Temporaly set to SYNC in order to get the response
+        qparams = self.get_qparams(app_req_id, ExecutionMode.SYNC)
         # Encoded parameters
-        serialized_params = self.get_serialized_params(params_tuple)
+        start = time.monotonic()
+        data = serialize_params(self.parser, params_tuple)
+        timings = timings if timings is not None else CallTimings()
+        timings.record(PARAMS_SERIALIZATION, start)
 
         # Send request
         try:
-            try:
-                response = req.post(uri, headers=header, params=qparams, data=json.dumps(serialized_params), timeout=timeout)
-            except req.exceptions.SSLError as e:
-                if "CERTIFICATE_VERIFY_FAILED" not in str(e):
-                    raise e
-                self.logger.info(f"SSL certificate verification failed, retrying with verify=False for URI: {uri}")
-                # Send request with verify=False because the uri uses a self-signed certificate
-                response = req.post(uri, headers=header, params=qparams, data=json.dumps(serialized_params), verify=False, timeout=timeout)
-            
-            # Check if the response is successful
-            response.raise_for_status() 
-            response_data = response.json()
+            start = time.monotonic()
+            response = self._send_request(self.session.post, uri, headers=header, params=qparams, data=data, timeout=timeout)
+            self.record_request_duration(timings, start)
 
-            # Parse the response to an ExecResponse model
-            result = pydantic.parse_obj_as(ExecResponse, response_data)
-            
-            # Deserialize the response
-            result.res = self.parser.deserialize(result.res)
+            # The ECF is reachable, only the function ID is unknown to it
+            if response.status_code == UNKNOWN_FUNCTION_STATUS_CODE:
+                result = get_unknown_function_response(func_id)
+            else:
+                # Check if the response is successful
+                response.raise_for_status()
 
-            # Evaluate response
-            self.evaluate_response(result)
+                # Parse the response to an ExecResponse model
+                start = time.monotonic()
+                result = parse_exec_response(response.json())
+                timings.record(RESPONSE_PARSING, start)
+
+                # Deserialize the response
+                start = time.monotonic()
+                deserialize_result(self.parser, result)
+                timings.record(RESULT_DESERIALIZATION, start)
+
+                # Evaluate response
+                self.evaluate_response(result)
+
+        except req.exceptions.ReadTimeout as e:
+            # The ECF accepted the request but did not answer before the deadline
+            self.logger.error(f"Timeout during execution: {e}")
+            raise e
 
         except req.exceptions.RequestException as e:
             self.logger.error(f"Error during execution: {e}")
             self.set_has_connection(False)
             raise e
 
-        if exec_mode == ExecutionMode.ASYNC:
-            # Execute the callback function
-            callback(result)
-            return None
-        else:
-            return result
+        return result
     
+    def execute_function_async(self, func_id: str, app_req_id: int, params_tuple: tuple, timeout: int = DEFAULT_EXECUTION_TIMEOUT, timings: CallTimings = None) -> AsyncExecResponse:
+        """
+        Submits the execution of a function in ASYNC mode. The ECF answers with the
+        identifier of the execution, whose result is collected with get_async_execution_status()
+
+        Args:
+            func_id (str): Identifier of the function to be executed
+            app_req_id (int): Identifier of the requirements associated to the function
+            params_tuple (tuple): Arguments needed to call the function
+            timeout (int): Maximum time in seconds for the submission request
+            timings (CallTimings): Timings of the call, where the time of each phase is recorded
+
+        Returns:
+            AsyncExecResponse: Status of the execution. If the ECF already answered with the
+            result, the status is READY and the result is deserialized
+        """
+
+        self.logger.debug("Execute function with ID %s in ASYNC mode", func_id)
+        uri = get_execute_uri(self.address, func_id)
+
+        header = self.get_header(self.token)
+        qparams = self.get_qparams(app_req_id, ExecutionMode.ASYNC)
+
+        start = time.monotonic()
+        data = serialize_params(self.parser, params_tuple)
+        timings = timings if timings is not None else CallTimings()
+        timings.record(PARAMS_SERIALIZATION, start)
+
+        try:
+            start = time.monotonic()
+            response = self._send_request(self.session.post, uri, headers=header, params=qparams, data=data, timeout=timeout)
+            self.record_request_duration(timings, start)
+
+            if response.status_code == UNKNOWN_FUNCTION_STATUS_CODE:
+                return AsyncExecResponse(status=AsyncExecStatus.FAILED, res=get_unknown_function_response(func_id))
+
+            response.raise_for_status()
+        except req.exceptions.RequestException as e:
+            self.logger.error(f"Error during async execution submission: {e}")
+            self.set_has_connection(False)
+            raise e
+
+        start = time.monotonic()
+        response_data = response.json()
+
+        # ECFs without async support answer with the result itself
+        if "exec_id" not in response_data:
+            status = AsyncExecResponse(status=AsyncExecStatus.READY, res=parse_exec_response(response_data))
+        else:
+            status = pydantic.parse_obj_as(AsyncExecResponse, response_data)
+
+        timings.record(RESPONSE_PARSING, start)
+
+        start = time.monotonic()
+        status = self.parse_async_response(status)
+        timings.record(RESULT_DESERIALIZATION, start)
+
+        return status
+
+    def get_async_execution_status(self, exec_id: AsyncExecId, timeout: int = 10) -> AsyncExecResponse:
+        """
+        Gets the status of an execution submitted with execute_function_async()
+
+        Args:
+            exec_id (AsyncExecId): Identifier of the execution
+            timeout (int): Maximum time in seconds for the request
+
+        Returns:
+            AsyncExecResponse: Status of the execution, with the result deserialized if it is READY
+        """
+
+        uri = self.address + ASYNC_EXECUTION_STATUS_PATH.format(faas_task_uuid=exec_id.faas_task_uuid)
+
+        response = self._send_request(self.session.get, uri, headers=self.get_header(self.token), timeout=timeout)
+        response.raise_for_status()
+
+        return self.parse_async_response(pydantic.parse_obj_as(AsyncExecResponse, response.json()))
+
+    def parse_async_response(self, response: AsyncExecResponse) -> AsyncExecResponse:
+        """
+        Deserializes the result of a finished asynchronous execution
+
+        Args:
+            response (AsyncExecResponse): Status received from the ECF
+
+        Returns:
+            AsyncExecResponse: The same status, with the result deserialized
+        """
+
+        if response.status == AsyncExecStatus.READY and response.res is not None:
+
+            deserialize_result(self.parser, response.res)
+            self.evaluate_response(response.res)
+
+        return response
+
+    def record_request_duration(self, timings: CallTimings, start: float):
+        """
+        Records the round trip of an execution request in the timings of the call and in the metrics
+
+        Args:
+            timings (CallTimings): Timings of the call
+            start (float): time.monotonic() when the request was sent
+        """
+
+        end = time.monotonic()
+        timings.record(EXECUTE, start, end)
+        ECF_REQUEST_DURATION.labels(self.address).observe(end - start)
+
+    def warm_up(self, timeout: float = 5) -> bool:
+        """
+        Opens a connection to the Edge Cluster Frontend before its first call. The connection,
+        handshakes included, is kept alive in the session for the next requests.
+
+        Args:
+            timeout (float): Maximum time in seconds to get an answer
+
+        Returns:
+            bool: True if the Edge Cluster Frontend answered, whatever the status code
+        """
+
+        try:
+            self._send_request(self.session.head, self.address, timeout=timeout)
+        except req.exceptions.RequestException as e:
+            self.logger.warning(f"Edge Cluster Frontend {self.address} could not be reached: {e}")
+            return False
+
+        return True
+
+    def _send_request(self, method: callable, uri: str, **kwargs) -> req.Response:
+        """
+        Sends a request, retrying without certificate verification if the ECF uses a self-signed certificate.
+        The outcome is remembered per host, so only the first request to such an ECF fails its handshake.
+
+        Args:
+            method (callable): Session method of the HTTP method
+            uri (str): URI of the request
+            kwargs: Arguments of the request
+
+        Returns:
+            req.Response: Response of the request
+        """
+
+        # The certificate is checked against the pinned CA only
+        if self.ca_bundle is not None:
+            return method(uri, verify=self.ca_bundle, **kwargs)
+
+        # Go straight to the mode that worked for this host
+        if not tls_verification_cache.is_verified(uri):
+            return method(uri, verify=False, **kwargs)
+
+        try:
+            return method(uri, **kwargs)
+        except req.exceptions.SSLError as e:
+            if "CERTIFICATE_VERIFY_FAILED" not in str(e):
+                raise e
+            self.logger.info(f"SSL certificate verification failed, sending the next requests with verify=False for URI: {uri}")
+            tls_verification_cache.set_unverified(uri)
+            # Send request with verify=False because the uri uses a self-signed certificate
+            return method(uri, verify=False, **kwargs)
+
     def evaluate_response(self, response: ExecResponse): 
         """
         Evaluates the response of the request
@@ -143,27 +418,7 @@ class EdgeClusterFrontendClient:
         Returns:
             dict: Dictionary with the query parameters
         """
-        return {
-            "app_req_id": app_req_id,
-            "mode": exec_mode.value
-        }
-    
-    def get_serialized_params(self, params_tuple: tuple):
-        """
-        Serializes the parameters to be sent in the request
-
-        Args:
-            params_tuple (tuple): Arguments needed to call the function
-
-        Returns:
-            List[Any]: List of serialized parameters
-        """
-
-        serialized_params = []
-        for param in params_tuple:
-            serialized_param = self.parser.serialize(param)
-            serialized_params.append(serialized_param)
-        return serialized_params
+        return get_execute_qparams(app_req_id, exec_mode)
 
     def get_has_connection(self) -> bool:
         """
@@ -0,0 +1,291 @@
+from cognit.modules._logger import CognitLogger
+from collections import OrderedDict
+from threading import Lock, Timer
+import tempfile
+import atexit
+import json
+import os
+
+# Version of the layout of the cache file, older files are discarded
+FUNCTION_ID_CACHE_VERSION = 1
+
+# Seconds the changes are held in memory so that a burst of uploads is written once
+DEFAULT_FLUSH_DELAY = 1.0
+
+"""
+Bounded (LRU) map of function fingerprint to DaaS function ID that is kept on local disk,
+so that a restarted process does not upload again the functions it already uploaded.
+The entries are grouped by namespace (Cognit Frontend endpoint and user) because the
+IDs are only valid for the DaaS that gave them.
+
+The IDs read from disk are trusted but not verified: the first execution that fails with
+one of them must report it through remove() so that the function is uploaded again.
+
+Changes are not written right away: the file is rewritten by a background timer flush_delay
+seconds after the first change, with every change made in the meantime, and on stop().
+"""
+class FunctionIdCache:
+
+    def __init__(self, path: str, max_entries: int = 256, flush_delay: float = DEFAULT_FLUSH_DELAY):
+        """
+        Args:
+            path (str): File in which the cache is stored. It is created if it does not exist
+            max_entries (int): Maximum number of IDs kept per namespace
+            flush_delay (float): Seconds between a change and the write of the file, 0 to write it right away
+        """
+
+        self.path = os.path.expanduser(path)
+        self.max_entries = max(1, max_entries)
+        self.flush_delay = flush_delay
+        self.logger = CognitLogger()
+        self.mutex = Lock()
+        # Held while the file is written, so that two flushes never interleave
+        self.write_mutex = Lock()
+        # Changes not written yet and the timer that writes them
+        self.dirty = False
+        self.flush_timer = None
+        # Loaded on first use
+        self.namespaces = None
+        # IDs read from disk that no execution has accepted yet in this process
+        self.unverified = set()
+
+    def get(self, namespace: str, function_hash: str) -> int | None:
+        """
+        Returns the ID of the function and marks it as the most recently used
+
+        Args:
+            namespace (str): Endpoint and user the ID belongs to
+            function_hash (str): Fingerprint of the function
+
+        Returns:
+            int | None: ID of the function in the DaaS, None if it is not cached
+        """
+
+        with self.mutex:
+
+            entries = self._get_namespace(namespace)
+            function_id = entries.get(function_hash)
+
+            if function_id is not None:
+                entries.move_to_end(function_hash)
+
+            return function_id
+
+    def put(self, namespace: str, function_hash: str, function_id: int):
+        """
+        Stores the ID of a function just uploaded. The least recently used ID is evicted
+        if the namespace is full.
+
+        Args:
+            namespace (str): Endpoint and user the ID belongs to
+            function_hash (str): Fingerprint of the function
+            function_id (int): ID given by the DaaS
+        """
+
+        with self.mutex:
+
+            entries = self._get_namespace(namespace)
+            entries[function_hash] = function_id
+            entries.move_to_end(function_hash)
+
+            while len(entries) > self.max_entries:
+                evicted, _ = entries.popitem(last=False)
+                self.unverified.discard((namespace, evicted))
+
+            # It comes straight from the DaaS
+            self.unverified.discard((namespace, function_hash))
+            self._set_dirty()
+
+        if self.flush_delay <= 0:
+            self.flush()
+
+    def remove(self, namespace: str, function_hash: str):
+        """
+        Forgets the ID of a function, e.g. because the ECF does not know it anymore
+
+        Args:
+            namespace (str): Endpoint and user the ID belongs to
+            function_hash (str): Fingerprint of the function
+        """
+
+        with self.mutex:
+
+            self.unverified.discard((namespace, function_hash))
+
+            if self._get_namespace(namespace).pop(function_hash, None) is not None:
+                self._set_dirty()
+
+        if self.flush_delay <= 0:
+            self.flush()
+
+    def is_verified(self, namespace: str, function_hash: str) -> bool:
+        """
+        Returns False if the ID was read from disk and no execution has accepted it yet
+        """
+
+        return (namespace, function_hash) not in self.unverified
+
+    def set_verified(self, namespace: str, function_hash: str):
+        """
+        Records that an execution accepted the ID
+        """
+
+        self.unverified.discard((namespace, function_hash))
+
+    def flush(self):
+        """
+        Writes the changes not written yet to the file
+        """
+
+        with self.write_mutex:
+
+            with self.mutex:
+
+                if not self.dirty:
+                    return
+
+                self.dirty = False
+                data = {
+                    "version": FUNCTION_ID_CACHE_VERSION,
+                    "namespaces": {namespace: list(entries.items()) for namespace, entries in self.namespaces.items() if entries}
+                }
+
+            self._save(data)
+
+    def stop(self):
+        """
+        Cancels the pending timer and writes the changes not written yet
+        """
+
+        with self.mutex:
+
+            if self.flush_timer is not None:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+
+        self.flush()
+
+    def __len__(self):
+        """
+        Returns the number of IDs stored for all the namespaces
+        """
+
+        with self.mutex:
+            return sum(len(self._get_namespace(namespace)) for namespace in self._load())
+
+    def _get_namespace(self, namespace: str) -> OrderedDict:
+
+        return self._load().setdefault(namespace, OrderedDict())
+
+    def _load(self) -> dict:
+
+        if self.namespaces is not None:
+            return self.namespaces
+
+        self.namespaces = {}
+
+        try:
+
+            with open(self.path, "r") as file:
+                data = json.load(file)
+
+            if data.get("version") != FUNCTION_ID_CACHE_VERSION:
+                self.logger.warning(f"Discarding function ID cache {self.path} with an unknown version")
+                return self.namespaces
+
+            # Entries are stored from the least to the most recently used
+            for namespace, entries in data.get("namespaces", {}).items():
+                self.namespaces[namespace] = OrderedDict((function_hash, function_id) for function_hash, function_id in entries[-self.max_entries:])
+                self.unverified.update((namespace, function_hash) for function_hash in self.namespaces[namespace])
+
+        except FileNotFoundError:
+
+            self.logger.debug(f"Function ID cache {self.path} does not exist yet")
+
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+
+            self.logger.warning(f"Function ID cache {self.path} could not be read, starting empty: {e}")
+            self.namespaces = {}
+            self.unverified = set()
+
+        return self.namespaces
+
+    def _set_dirty(self):
+
+        # Called with the mutex held
+        self.dirty = True
+
+        # A timer already pending writes this change too
+        if self.flush_delay > 0 and self.flush_timer is None:
+            self.flush_timer = Timer(self.flush_delay, self._flush_on_timer)
+            self.flush_timer.daemon = True
+            self.flush_timer.start()
+
+    def _flush_on_timer(self):
+
+        with self.mutex:
+            self.flush_timer = None
+
+        self.flush()
+
+    def _save(self, data: dict):
+
+        directory = os.path.dirname(self.path) or "."
+
+        try:
+
+            os.makedirs(directory, exist_ok=True)
+
+            # Write a temporary file and rename it, a crash never leaves a truncated cache
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".function_ids.")
+
+            try:
+                with os.fdopen(fd, "w") as file:
+                    json.dump(data, file)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+        except OSError as e:
+
+            # Not fatal, the functions are uploaded again after a restart
+            self.logger.warning(f"Function ID cache {self.path} could not be written: {e}")
+
+_caches = {}
+_caches_mutex = Lock()
+
+def get_function_id_cache(path: str, max_entries: int = 256) -> FunctionIdCache:
+    """
+    Returns the cache stored in the given file. All the clients of the process that use
+    the same file share the same instance.
+
+    Args:
+        path (str): File in which the cache is stored
+        max_entries (int): Maximum number of IDs kept per namespace
+
+    Returns:
+        FunctionIdCache: Cache stored in the file
+    """
+
+    path = os.path.abspath(os.path.expanduser(path))
+
+    with _caches_mutex:
+
+        cache = _caches.get(path)
+
+        if cache is None:
+            cache = FunctionIdCache(path, max_entries)
+            _caches[path] = cache
+
+        return cache
+
+@atexit.register
+def _flush_caches():
+
+    # Changes still held by a timer are written before the process exits
+    with _caches_mutex:
+        caches = list(_caches.values())
+
+    for cache in caches:
+        cache.stop()
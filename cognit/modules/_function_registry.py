@@ -0,0 +1,317 @@
+from cognit.modules._faas_parser import FaasParser
+from typing import Callable, Any
+from threading import Lock
+from types import CodeType, FunctionType
+import cloudpickle as cp
+import hashlib
+import weakref
+import sys
+
+# Attributes of a code object that define its behaviour. The line numbers and the source
+# file are left out so that a harmless re-definition keeps the same fingerprint
+CODE_ATTRIBUTES = (
+    "co_argcount", "co_posonlyargcount", "co_kwonlyargcount", "co_flags",
+    "co_names", "co_varnames", "co_freevars", "co_cellvars",
+)
+
+def fingerprint_function(function: Callable) -> str:
+    """
+    Computes a hash of everything that is shipped when the function is offloaded: the
+    bytecode and constants of its code and of the nested code objects, its default
+    arguments and the values captured in its closure.
+
+    Args:
+        function (Callable): Function to be fingerprinted
+
+    Returns:
+        str: Hex digest of the function
+    """
+
+    digest = hashlib.sha256()
+    # The bytecode is not portable across interpreter versions
+    digest.update(f"py{sys.version_info.major}.{sys.version_info.minor}".encode())
+    _update_with_value(digest, function, set())
+    return digest.hexdigest()
+
+def _update_with_code(digest, code: CodeType, seen: set):
+
+    digest.update(code.co_code)
+    digest.update(getattr(code, "co_exceptiontable", b""))
+
+    for attribute in CODE_ATTRIBUTES:
+        digest.update(repr(getattr(code, attribute, None)).encode())
+
+    # Constants include the code of the nested functions, lambdas and comprehensions
+    _update_with_value(digest, code.co_consts, seen)
+
+def _update_with_value(digest, value: Any, seen: set):
+
+    # Tag every value with its type so that e.g. 1 and "1" differ
+    digest.update(type(value).__qualname__.encode())
+
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        digest.update(repr(value).encode())
+
+    elif isinstance(value, CodeType):
+        _update_with_code(digest, value, seen)
+
+    elif isinstance(value, FunctionType):
+
+        # Recursive closures refer back to functions already being fingerprinted
+        if id(value) in seen:
+            digest.update(b"<recursive>")
+            return
+
+        seen.add(id(value))
+        _update_with_code(digest, value.__code__, seen)
+        _update_with_value(digest, value.__defaults__, seen)
+        _update_with_value(digest, value.__kwdefaults__, seen)
+        _update_with_value(digest, tuple(_cell_contents(cell) for cell in value.__closure__ or ()), seen)
+
+    elif isinstance(value, (tuple, list, dict, set, frozenset)):
+
+        # Containers that hold themselves, as l = [1]; l.append(l), refer back to a container being fingerprinted
+        if id(value) in seen:
+            digest.update(b"<recursive>")
+            return
+
+        # Only the containers being walked are kept, the id of a finished temporary may be reused
+        seen.add(id(value))
+
+        try:
+            _update_with_container(digest, value, seen)
+        finally:
+            seen.discard(id(value))
+
+    else:
+
+        # Any other object goes through the same pickler used for the upload
+        try:
+            digest.update(cp.dumps(value))
+        except Exception:
+            # It could not be offloaded either, keep it apart from any other object
+            digest.update(f"<unpicklable {id(value)}>".encode())
+
+def _update_with_container(digest, value: tuple | list | dict | set | frozenset, seen: set):
+
+    if isinstance(value, (tuple, list)):
+
+        digest.update(str(len(value)).encode())
+        for item in value:
+            _update_with_value(digest, item, seen)
+
+    elif isinstance(value, dict):
+
+        digest.update(str(len(value)).encode())
+        for key, item in value.items():
+            _update_with_value(digest, key, seen)
+            _update_with_value(digest, item, seen)
+
+    elif isinstance(value, (set, frozenset)):
+
+        # Iteration order of a set is not stable, sort the digests of the items
+        items = []
+        for item in value:
+            item_digest = hashlib.sha256()
+            _update_with_value(item_digest, item, seen)
+            items.append(item_digest.digest())
+        for item in sorted(items):
+            digest.update(item)
+
+def _cell_contents(cell) -> Any:
+
+    try:
+        return cell.cell_contents
+    except ValueError:
+        # Cell of a variable not assigned yet
+        return "<empty cell>"
+
+def _get_closure_contents(function: Callable) -> tuple:
+
+    return tuple(_cell_contents(cell) for cell in getattr(function, "__closure__", None) or ())
+
+def _is_immutable(value: Any, seen: set) -> bool:
+
+    # Classes are left out, their attributes can be reassigned and are pickled by value
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes, CodeType)):
+        return True
+
+    if isinstance(value, (tuple, frozenset)):
+        return all(_is_immutable(item, seen) for item in value)
+
+    # The captured functions are fingerprinted with their own closures
+    if isinstance(value, FunctionType):
+        return is_cacheable(value, seen)
+
+    return False
+
+def is_cacheable(function: Callable, seen: set = None) -> bool:
+    """
+    Tells whether the fingerprint of the function can be kept while its attributes are the
+    same objects. A list or any other mutable value captured in its closure or its default
+    arguments can change in place, so the function must be fingerprinted on every offload.
+
+    Args:
+        function (Callable): Function to be offloaded
+    """
+
+    seen = set() if seen is None else seen
+
+    # Recursive closures refer back to functions already being checked
+    if id(function) in seen:
+        return True
+
+    seen.add(id(function))
+
+    values = _get_closure_contents(function) \
+        + (getattr(function, "__defaults__", None) or ()) \
+        + tuple((getattr(function, "__kwdefaults__", None) or {}).values())
+
+    return all(_is_immutable(value, seen) for value in values)
+
+"""
+Fingerprint and serialized form of a registered function, together with the attributes
+they were computed from so that a later change of the function can be detected.
+"""
+class RegisteredFunction:
+
+    def __init__(self, function: Callable, function_hash: str):
+
+        self.function_hash = function_hash
+        self.serialized = None
+        self.code = getattr(function, "__code__", None)
+        self.defaults = getattr(function, "__defaults__", None)
+        self.kwdefaults = getattr(function, "__kwdefaults__", None)
+        self.closure_contents = _get_closure_contents(function)
+
+    def is_stale(self, function: Callable) -> bool:
+        """
+        Returns True if the code, the default arguments or the values captured in the closure
+        of the function were replaced
+        """
+
+        if self.code is not getattr(function, "__code__", None) \
+            or self.defaults is not getattr(function, "__defaults__", None) \
+            or self.kwdefaults is not getattr(function, "__kwdefaults__", None):
+            return True
+
+        # A nonlocal assignment keeps the cell but replaces its contents
+        closure_contents = _get_closure_contents(function)
+
+        return len(closure_contents) != len(self.closure_contents) \
+            or any(value is not previous for value, previous in zip(closure_contents, self.closure_contents))
+
+"""
+Process wide cache of the hash and the serialized form of the offloaded functions,
+keyed by the function object. Offloading the same function again costs a dictionary
+lookup instead of a new cloudpickle of it. Functions that capture mutable values are
+fingerprinted on every offload instead, see is_cacheable().
+"""
+class FunctionRegistry:
+
+    def __init__(self):
+
+        self.parser = FaasParser()
+        self.mutex = Lock()
+        # Serialization clears the globals of the function, so it is never run concurrently
+        self.serialize_mutex = Lock()
+        # Entries disappear with the function they belong to
+        self.functions = weakref.WeakKeyDictionary()
+
+    def get_hash(self, function: Callable) -> str:
+        """
+        Returns the hash that identifies the function in the DaaS
+
+        Args:
+            function (Callable): Function to be offloaded
+
+        Returns:
+            str: Hex digest of the function
+        """
+
+        return self.get_entry(function).function_hash
+
+    def get_serialized(self, function: Callable, entry: RegisteredFunction = None) -> str:
+        """
+        Returns the function serialized to be uploaded to the DaaS. It is computed only once.
+
+        Args:
+            function (Callable): Function to be offloaded
+            entry (RegisteredFunction): Entry of the function returned by get_entry(), so that a
+            function that cannot be cached is not fingerprinted again
+
+        Returns:
+            str: Function pickled and encoded in base64
+        """
+
+        entry = entry if entry is not None else self.get_entry(function)
+
+        if entry.serialized is None:
+
+            with self.serialize_mutex:
+
+                if entry.serialized is None:
+                    entry.serialized = self.parser.serialize(function)
+
+        return entry.serialized
+
+    def get_entry(self, function: Callable) -> RegisteredFunction:
+        """
+        Returns the hash of the function and, once computed, its serialized form. The entry of
+        a function that cannot be cached is computed again on every call, and only lives as
+        long as the caller keeps it.
+
+        Args:
+            function (Callable): Function to be offloaded
+
+        Returns:
+            RegisteredFunction: Entry of the function
+        """
+
+        cacheable = is_cacheable(function)
+
+        with self.mutex:
+
+            try:
+                entry = self.functions.get(function)
+            except TypeError:
+                # Not weak referenceable, it cannot be cached
+                entry, cacheable = None, False
+
+            if cacheable and entry is not None and not entry.is_stale(function):
+                return entry
+
+            # Its captured values may have changed in place since it was registered
+            if not cacheable and entry is not None:
+                del self.functions[function]
+
+        # Fingerprinting a large closure must not hold back the threads offloading other functions
+        new_entry = RegisteredFunction(function, self._compute_hash(function))
+
+        if not cacheable:
+            return new_entry
+
+        with self.mutex:
+
+            # Another thread may have registered it meanwhile
+            entry = self.functions.get(function)
+
+            if entry is not None and not entry.is_stale(function):
+                return entry
+
+            self.functions[function] = new_entry
+            return new_entry
+
+    def __len__(self):
+        """
+        Returns the number of registered functions
+        """
+
+        return len(self.functions)
+
+    def _compute_hash(self, function: Callable) -> str:
+
+        return fingerprint_function(function)
+
+# Shared by all the clients of the process
+function_registry = FunctionRegistry()
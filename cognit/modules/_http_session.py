@@ -0,0 +1,136 @@
+from cognit.modules._metrics import HTTP_BYTES_SENT, HTTP_BYTES_RECEIVED
+from requests.adapters import HTTPAdapter, DEFAULT_CA_BUNDLE_PATH
+from requests.utils import extract_zipped_paths, select_proxy
+from urllib3.util.ssl_ import create_urllib3_context
+from urllib.parse import urlsplit
+from threading import Lock, local
+import requests as req
+import ssl
+import os
+
+DEFAULT_HTTP_POOL_SIZE = 5
+
+def create_http_session(pool_size: int = DEFAULT_HTTP_POOL_SIZE) -> req.Session:
+    """
+    Creates a session that keeps the connections alive and reuses them, so that the
+    requests sent to the same host do not open a new TCP + TLS connection each time.
+
+    Args:
+        pool_size (int): Maximum number of connections kept open per host. It should
+        match the number of requests sent at the same time to the same host
+
+    Returns:
+        req.Session: Session to be shared by the clients. It is safe to use it from several threads
+    """
+
+    pool_size = max(1, pool_size)
+    session = req.Session()
+
+    # Connections over the pool size are still opened, but closed after the request
+    adapter = SSLContextAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    session.hooks["response"].append(count_bytes)
+
+    return session
+
+"""
+HTTPAdapter that opens the HTTPS connections with prebuilt SSL contexts, one per value
+of the verify argument of the requests: the default CAs (True), a CA bundle such as
+ecf_ca_bundle (its path) or no verification (False) for the hosts with a self-signed
+certificate. The CA certificates are loaded once per process instead of on every new
+connection, and each verification mode keeps its own connection pools, so a request is
+never sent over a connection opened with another mode.
+"""
+class SSLContextAdapter(HTTPAdapter):
+
+    def __init__(self, *args, **kwargs):
+
+        # SSL context of the request being sent by each thread
+        self.local = local()
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+
+        # get_connection() is not given the verify argument
+        self.local.ssl_context = get_ssl_context(verify) if request.url.lower().startswith("https") else None
+
+        try:
+            return super().send(request, stream, timeout, verify, cert, proxies)
+        finally:
+            self.local.ssl_context = None
+
+    def get_connection(self, url, proxies=None):
+
+        ssl_context = getattr(self.local, "ssl_context", None)
+
+        # Proxied requests keep the default behaviour
+        if ssl_context is None or select_proxy(url, proxies):
+            return super().get_connection(url, proxies)
+
+        return self.poolmanager.connection_from_url(url, pool_kwargs={"ssl_context": ssl_context})
+
+    def cert_verify(self, conn, url, verify, cert):
+
+        super().cert_verify(conn, url, verify, cert)
+
+        # The CA certificates are already loaded in the SSL context of the pool
+        if getattr(conn, "conn_kw", {}).get("ssl_context") is not None:
+            conn.ca_certs = None
+            conn.ca_cert_dir = None
+
+ssl_contexts = {}
+ssl_contexts_mutex = Lock()
+
+def get_ssl_context(verify: bool | str) -> ssl.SSLContext:
+    """
+    Returns the SSL context shared by the connections opened with the given verify argument
+
+    Args:
+        verify (bool | str): True to verify with the default CAs, a path to a CA bundle to
+        verify with it, False to not verify the certificates
+
+    Returns:
+        ssl.SSLContext: SSL context, created on the first call
+    """
+
+    with ssl_contexts_mutex:
+
+        ssl_context = ssl_contexts.get(verify)
+
+        if ssl_context is None:
+            ssl_context = ssl_contexts[verify] = create_ssl_context(verify)
+
+        return ssl_context
+
+def create_ssl_context(verify: bool | str) -> ssl.SSLContext:
+
+    if not verify:
+        return create_urllib3_context(cert_reqs=ssl.CERT_NONE)
+
+    ssl_context = create_urllib3_context(cert_reqs=ssl.CERT_REQUIRED)
+    # The same CAs requests uses by default
+    ca_path = extract_zipped_paths(DEFAULT_CA_BUNDLE_PATH) if verify is True else verify
+
+    if os.path.isdir(ca_path):
+        ssl_context.load_verify_locations(capath=ca_path)
+    else:
+        ssl_context.load_verify_locations(cafile=ca_path)
+
+    return ssl_context
+
+def count_bytes(response: req.Response, *args, **kwargs):
+    """
+    Adds the size of the bodies of a request and of its response to the metrics. The
+    body of the response is already read, the requests are not streamed.
+    """
+
+    host = urlsplit(response.url).netloc
+    body = response.request.body
+
+    # The JSON bodies are ASCII, their length is their size
+    if isinstance(body, (bytes, str)):
+        HTTP_BYTES_SENT.labels(host).inc(len(body))
+
+    HTTP_BYTES_RECEIVED.labels(host).inc(len(response.content or b""))
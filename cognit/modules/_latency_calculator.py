@@ -1,106 +1,176 @@
 from cognit.modules._logger import CognitLogger
-from subprocess import Popen, PIPE, STDOUT
-import shlex  
-import sys
-
-sys.path.append(".")
-
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+import statistics
+import socket
+import time
+
+DEFAULT_LATENCY_PROBE_SAMPLES = 3
+DEFAULT_LATENCY_PROBE_TIMEOUT = 1.0
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+"""
+Latency of an Edge Cluster Frontend measured by several probes, in milliseconds
+"""
+class LatencyMeasurement:
+
+    def __init__(self, samples: list[float]):
+
+        self.samples = samples
+        self.median = statistics.median(samples)
+        # Mean difference between consecutive samples, as the interarrival jitter of RFC 3550
+        self.jitter = statistics.mean(abs(b - a) for a, b in zip(samples, samples[1:])) if len(samples) > 1 else 0.0
+
+    def __repr__(self):
+        return f"LatencyMeasurement(median={self.median:.2f}, jitter={self.jitter:.2f}, samples={len(self.samples)})"
+
+"""
+Measures the latency to the Edge Cluster Frontends with the time of the TCP handshake
+to the host and port of their address, that is, the same path that the offloaded calls
+take. All the clusters are probed in parallel and within a single deadline, so the
+measurement of N clusters takes about as long as that of the slowest one.
+"""
 class LatencyCalculator:
 
-    def __init__(self):
+    def __init__(self, samples: int = DEFAULT_LATENCY_PROBE_SAMPLES, timeout: float = DEFAULT_LATENCY_PROBE_TIMEOUT):
+        """
+        Args:
+            samples (int): Probes sent to each cluster, the median is kept
+            timeout (float): Seconds given to the whole measurement, the clusters that do not answer in time are left out
+        """
 
+        self.samples = max(1, samples)
+        self.timeout = timeout
         self.logger = CognitLogger()
 
-    def get_simple_cmd_output(self, cmd, stderr=STDOUT) -> str:
+    def get_latency_for_clusters(self, edge_clusters: list) -> dict:
         """
-        Executes a simple command and returns its output as a string.
-        
+        Calculate the latency for a list of edge clusters.
+
         Args:
-            cmd (str): Command to be executed.
-            stderr: Standard error handling (default: STDOUT).
+            edge_clusters (list): List of edge cluster addresses, IPs or domain names.
 
         Returns:
-            str: Output of the command as a string.
+            dict: Dictionary with the edge cluster as key and its median latency in milliseconds as value.
+            Empty if no cluster could be reached.
         """
 
-        args = shlex.split(cmd)
-        return Popen(args, stdout=PIPE, stderr=stderr).communicate()[0].decode()
-    
-    def get_latency_for_clusters(self, edge_clusters: list) -> dict:
+        measurements = self.measure(edge_clusters)
+
+        if not measurements:
+            self.logger.error("No valid edge clusters found.")
+
+        return {cluster: measurement.median for cluster, measurement in measurements.items()}
+
+    def measure(self, edge_clusters: list) -> dict[str, LatencyMeasurement]:
         """
-        Calculate the latency for a list of edge clusters.
+        Probes all the edge clusters in parallel.
 
         Args:
-            edge_clusters (list): List of edge cluster IPs or domain names.
+            edge_clusters (list): List of edge cluster addresses, IPs or domain names.
 
         Returns:
-            dict: Dictionary with the edge cluster as key and its latency in milliseconds as value.
+            dict[str, LatencyMeasurement]: Measurement of each cluster that answered before the deadline
         """
 
-        latency_by_cluster = {}
+        if not edge_clusters:
+            return {}
 
-        for cluster_ip in edge_clusters:
-                
-                # Extract http:// or https:// from the cluster_ip if present and remove what is after ip or domain name
-                if cluster_ip.startswith("http://"):
+        deadline = time.monotonic() + self.timeout
+        executor = ThreadPoolExecutor(max_workers=len(edge_clusters), thread_name_prefix="latency-probe")
 
-                    ip = cluster_ip[7:].split("/")[0]
+        try:
 
-                elif cluster_ip.startswith("https://"):
+            futures = {executor.submit(self._probe, cluster, deadline): cluster for cluster in edge_clusters}
+            done, not_done = wait(futures, timeout=self.timeout)
 
-                    ip = cluster_ip[8:].split("/")[0]
+        finally:
 
-                else:
-                    
-                    ip = cluster_ip.split("/")[0]
+            # The probes still running give up at the deadline, do not wait for them
+            executor.shutdown(wait=False)
 
-                # Remove port if present
-                if ":" in ip:
-                    ip = ip.split(":")[0]
+        measurements = {}
 
-                # Latency of cluster_ip
-                latency = self.calculate(ip)
+        for future in done:
 
-                if latency < 0:
+            cluster = futures[future]
+            samples = future.result()
 
-                    self.logger.error(f"Failed to calculate latency for {ip}")
-                    continue
+            if not samples:
+                self.logger.error(f"Failed to calculate latency for {cluster}")
+                continue
 
-                latency_by_cluster[cluster_ip] = latency
+            measurements[cluster] = LatencyMeasurement(samples)
+            self.logger.info(f"Latency for {cluster}: {measurements[cluster]}")
 
-        # Return lowest latency cluster as JSON string
-        if not latency_by_cluster:
+        for future in not_done:
+            self.logger.error(f"Latency for {futures[future]} could not be measured within {self.timeout} s")
 
-            self.logger.error("No valid edge clusters found.")
-            return {"error": "No valid edge clusters found."}
-        
-        return latency_by_cluster
+        return measurements
 
-    def calculate(self, ip: str) -> float:
+    def calculate(self, address: str) -> float:
         """
-        Calculate the latency of the given ip.
+        Calculate the latency of the given address.
 
         Args:
-            ip (str): IP or domain name to calculate the latency.
+            address (str): Address, IP or domain name to calculate the latency.
 
         Returns:
-            float: Latency in milliseconds. If the latency cannot be calculated, returns -1.
+            float: Median latency in milliseconds. If the latency cannot be calculated, returns -1.
         """
 
-        latency_line = None
+        measurement = self.measure([address]).get(address)
+        return measurement.median if measurement is not None else -1.0
+
+    def _probe(self, cluster: str, deadline: float) -> list[float]:
 
         try:
+            host, port = get_host_and_port(cluster)
+            # Resolved once, the samples measure the network and not the resolver
+            family, kind, proto, _, sockaddr = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Failed to resolve {cluster}: {e}")
+            return []
+
+        samples = []
+
+        for _ in range(self.samples):
+
+            remaining = deadline - time.monotonic()
+
+            if remaining <= 0:
+                break
+
+            start = time.perf_counter()
+
+            try:
+                with socket.socket(family, kind, proto) as sock:
+                    sock.settimeout(remaining)
+                    sock.connect(sockaddr)
+            except OSError as e:
+                self.logger.debug(f"Latency probe to {cluster} failed: {e}")
+                continue
+
+            samples.append((time.perf_counter() - start) * 1000)
+
+        return samples
+
+def get_host_and_port(address: str) -> tuple[str, int]:
+    """
+    Extracts the host and port of an Edge Cluster Frontend address. The port defaults to
+    that of the scheme, or 80 if the address has no scheme.
+
+    Args:
+        address (str): Address such as https://host:port/path, host:port or host
 
-            cmd = f"ping -c 1 {ip}"
-            output = self.get_simple_cmd_output(cmd)
-            latency_line = output.strip().split("\n")[1]
-            latency = float(latency_line.split("time=")[-1].split()[0])
-            self.logger.info(f"Latency for {ip}: {latency} ms")
+    Returns:
+        tuple[str, int]: Host and port to connect to
+    """
 
-        except Exception as e:
+    parts = urlsplit(address if "://" in address else f"http://{address}")
 
-            self.logger.error(f"Failed to parse latency for {ip}: {e}")
-            return -1.0
+    if not parts.hostname:
+        raise ValueError(f"No host in address {address}")
 
-        return latency
-    
\ No newline at end of file
+    return parts.hostname, parts.port or DEFAULT_PORTS.get(parts.scheme, 80)
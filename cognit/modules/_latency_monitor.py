@@ -0,0 +1,311 @@
+from cognit.modules._latency_calculator import LatencyCalculator
+from cognit.modules._edge_cluster_balancer import LATENCY_EWMA_ALPHA
+from cognit.modules._logger import CognitLogger
+from threading import Thread, Lock, Event
+from typing import Callable
+from array import array
+import math
+import time
+
+# Samples kept per Edge Cluster and kind of measurement to compute the percentiles
+LATENCY_WINDOW = 128
+
+# Probe intervals without an answer after which the network latency of an Edge Cluster is unknown
+STALE_PROBE_INTERVALS = 3
+
+"""
+Latency samples of one Edge Cluster, in milliseconds. The last LATENCY_WINDOW samples
+are kept in a fixed ring buffer for the percentiles, the EWMA covers all of them.
+"""
+class LatencyStats:
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+
+        self.samples = array("d", bytes(8 * window))
+        self.index = 0
+        self.count = 0
+        self.ewma = None
+        self.updated_at = None
+        # Probes in a row that got no answer
+        self.failures = 0
+
+    def add(self, latency: float):
+
+        self.samples[self.index] = latency
+        self.index = (self.index + 1) % len(self.samples)
+        self.count += 1
+        self.failures = 0
+        self.updated_at = time.monotonic()
+
+        if self.ewma is None:
+            self.ewma = latency
+        else:
+            self.ewma = LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * self.ewma
+
+    def get_percentile(self, percentile: float) -> float | None:
+        """
+        Returns the given percentile (0-100) of the samples in the window, nearest rank
+        """
+
+        window = sorted(self.samples[:min(self.count, len(self.samples))])
+
+        if not window:
+            return None
+
+        rank = max(1, math.ceil(percentile / 100 * len(window)))
+        return window[rank - 1]
+
+    def is_fresh(self, max_age: float) -> bool:
+        """
+        Tells whether the last sample is at most max_age seconds old
+        """
+
+        return self.updated_at is not None and time.monotonic() - self.updated_at <= max_age
+
+    def get_summary(self) -> dict:
+
+        return {
+            "ewma": self.ewma,
+            "p50": self.get_percentile(50),
+            "p95": self.get_percentile(95),
+            "p99": self.get_percentile(99),
+            "samples": self.count,
+            "failures": self.failures,
+        }
+
+"""
+Keeps the latency of every known Edge Cluster Frontend up to date in the background.
+Two series are kept per Edge Cluster: the network latency, sampled by low-rate TCP
+probes, and the round trip of the offloaded calls, recorded as they finish (it
+includes the execution of the function). The network latencies are reported to the
+Cognit Frontend in batches.
+
+The selection of the Edge Clusters reads the cached latencies, only the clusters never
+measured before are probed on the spot. The network latency of a cluster that has not
+answered the probes for STALE_PROBE_INTERVALS probe intervals is unknown: it is neither
+used nor reported until the cluster answers again.
+"""
+class LatencyMonitor:
+
+    def __init__(self, calculator: LatencyCalculator, probe_interval: float = 30.0, report_interval: float = 60.0, report: Callable[[dict], bool] = None):
+        """
+        Args:
+            calculator (LatencyCalculator): Prober of the network latency
+            probe_interval (float): Seconds between two probes of all the known Edge Clusters
+            report_interval (float): Seconds between two reports of the latencies, 0 to not report them
+            report (Callable): Function that sends a batch of latencies, {address: milliseconds}
+        """
+
+        self.calculator = calculator
+        self.probe_interval = probe_interval
+        self.report_interval = report_interval
+        self.report = report
+        self.logger = CognitLogger()
+
+        # Age in seconds after which a network latency is no longer used
+        self.max_age = STALE_PROBE_INTERVALS * probe_interval
+
+        self.mutex = Lock()
+        self.stop_event = Event()
+        self.thread = None
+
+        # Address -> LatencyStats
+        self.network = {}
+        self.calls = {}
+        # Addresses probed by the background thread
+        self.addresses = []
+        # Network samples taken since the last report
+        self.pending_report = False
+
+    def start(self):
+        """
+        Launches the monitoring thread
+        """
+
+        if self.thread is not None:
+            return
+
+        self.stop_event.clear()
+        self.thread = Thread(target=self._monitor, name="cognit-latency-monitor")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the monitoring thread
+        """
+
+        self.stop_event.set()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def set_addresses(self, addresses: list[str]):
+        """
+        Sets the Edge Clusters to monitor. The samples of those no longer known are discarded.
+
+        Args:
+            addresses (list[str]): Addresses of the Edge Cluster Frontends
+        """
+
+        with self.mutex:
+
+            self.addresses = list(dict.fromkeys(addresses))
+
+            for stats in (self.network, self.calls):
+                for address in list(stats):
+                    if address not in self.addresses:
+                        del stats[address]
+
+    def add_call_sample(self, address: str, latency: float):
+        """
+        Records the round trip of a call offloaded to an Edge Cluster
+
+        Args:
+            address (str): Address of the Edge Cluster Frontend
+            latency (float): Milliseconds from the request to the result
+        """
+
+        with self.mutex:
+            self._get_stats(self.calls, address).add(latency)
+
+    def get_latencies(self, addresses: list[str]) -> dict[str, float]:
+        """
+        Returns the network latency of the given Edge Clusters from the cached samples.
+        The clusters never measured, or whose latency is stale, are probed now and
+        monitored from now on.
+
+        Args:
+            addresses (list[str]): Addresses of the Edge Cluster Frontends
+
+        Returns:
+            dict[str, float]: Average latency in milliseconds of each reachable cluster
+        """
+
+        with self.mutex:
+
+            unknown = [address for address in addresses if not self._is_fresh(address)]
+            self.addresses += [address for address in addresses if address not in self.addresses]
+
+        if unknown:
+            self.probe(unknown)
+
+        with self.mutex:
+            return {address: self.network[address].ewma for address in addresses if self._is_fresh(address)}
+
+    def get_stats(self) -> dict:
+        """
+        Returns the latency statistics of every Edge Cluster: EWMA, p50, p95 and p99 in
+        milliseconds, number of samples and of failed probes in a row, for the network and
+        for the calls
+        """
+
+        with self.mutex:
+
+            return {address: {
+                "network": self.network[address].get_summary() if address in self.network else None,
+                "call": self.calls[address].get_summary() if address in self.calls else None,
+            } for address in dict.fromkeys(list(self.network) + list(self.calls))}
+
+    def probe(self, addresses: list[str] = None):
+        """
+        Measures the network latency of the given Edge Clusters, all the monitored ones by default
+
+        Args:
+            addresses (list[str]): Addresses of the Edge Cluster Frontends
+        """
+
+        if addresses is None:
+            with self.mutex:
+                addresses = list(self.addresses)
+
+        if not addresses:
+            return
+
+        measurements = self.calculator.measure(addresses)
+
+        with self.mutex:
+
+            for address in addresses:
+
+                # The cluster may have been dropped while it was being probed
+                if address not in self.addresses:
+                    continue
+
+                measurement = measurements.get(address)
+
+                # Not answering keeps the last latency until it is stale
+                if measurement is None:
+                    if address in self.network:
+                        self.network[address].failures += 1
+                    continue
+
+                stats = self._get_stats(self.network, address)
+                for sample in measurement.samples:
+                    stats.add(sample)
+
+            self.pending_report = self.pending_report or bool(measurements)
+
+    def send_report(self) -> bool:
+        """
+        Sends the network latency of every measured Edge Cluster in a single batch,
+        but for those whose latency is stale
+
+        Returns:
+            bool: True if there was nothing new to report or the report was accepted
+        """
+
+        with self.mutex:
+
+            if not self.pending_report or self.report is None:
+                return True
+
+            latencies = {address: round(stats.ewma, 3) for address, stats in self.network.items() if self._is_fresh(address)}
+            self.pending_report = False
+
+            if not latencies:
+                return True
+
+        if self.report(latencies):
+            return True
+
+        # Try again with the next report
+        with self.mutex:
+            self.pending_report = True
+
+        return False
+
+    def _is_fresh(self, address: str) -> bool:
+
+        stats = self.network.get(address)
+
+        return stats is not None and stats.is_fresh(self.max_age)
+
+    def _get_stats(self, series: dict, address: str) -> LatencyStats:
+
+        stats = series.get(address)
+
+        if stats is None:
+            stats = series[address] = LatencyStats()
+
+        return stats
+
+    def _monitor(self):
+
+        last_report = time.monotonic()
+
+        while not self.stop_event.wait(self.probe_interval):
+
+            try:
+
+                self.probe()
+
+                if self.report_interval > 0 and time.monotonic() - last_report >= self.report_interval:
+                    last_report = time.monotonic()
+                    self.send_report()
+
+            except Exception as e:
+
+                # The monitor must outlive any error of a single round
+                self.logger.error(f"Latency monitoring round failed: {e}")
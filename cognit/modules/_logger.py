@@ -1,78 +1,264 @@
-import inspect
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from threading import Lock
 import logging
-import os
+import atexit
+import queue
+import time
 
 LOGGER_NAME = "cognit-logger"
+LOG_FORMAT = "[%(asctime)5s] [%(levelname)-s] %(message)s"
 
-class CognitLogger:
+DEFAULT_LOG_LEVEL = logging.DEBUG
+DEFAULT_LOG_CONSOLE_LEVEL = logging.WARNING
+DEFAULT_LOG_FILE = "/tmp/device_runtime.log"
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT = 3
+DEFAULT_LOG_ROTATE_INTERVAL = 0
+DEFAULT_LOG_QUEUE_SIZE = 10000
 
-    def __init__(self, verbose=True):
-        
-        logging.basicConfig(level=logging.DEBUG)
-        self.logger = logging.getLogger(LOGGER_NAME)
-        self.logger.propagate = False
-        self.verbose = verbose
+# Fraction of the queue above which the records below WARNING are dropped
+LOG_QUEUE_HIGH_WATER = 0.8
+
+"""
+Formatter of the Cognit handlers. The messages of verbose loggers are prefixed with
+the file and line that logged them, which the logging module already records.
+"""
+class CognitFormatter(logging.Formatter):
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+
+        if getattr(record, "verbose", False):
+            record.message = f"[{record.filename}::{record.lineno}] {record.message}"
+
+        return super().formatMessage(record)
+
+"""
+Hands the records to the writer thread through a bounded queue, it never blocks the
+thread that logs. Under pressure the records below WARNING are dropped first, and once
+the queue is full every record is dropped. The number of dropped records is logged as
+soon as there is room again.
+"""
+class DroppingQueueHandler(QueueHandler):
+
+    def __init__(self, queue_size: int = DEFAULT_LOG_QUEUE_SIZE):
+
+        super().__init__(queue.Queue(max(1, queue_size)))
+        self.high_water = max(1, int(queue_size * LOG_QUEUE_HIGH_WATER))
+        self.mutex = Lock()
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+
+        if record.levelno < logging.WARNING and self.queue.qsize() >= self.high_water:
+            self._drop()
+            return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._drop()
+            return
+
+        if self.dropped:
+            self._report_dropped()
+
+    def _drop(self):
+
+        with self.mutex:
+            self.dropped += 1
+
+    def _report_dropped(self):
+
+        with self.mutex:
+            dropped, self.dropped = self.dropped, 0
+
+        record = logging.makeLogRecord({
+            "name": LOGGER_NAME,
+            "levelno": logging.WARNING,
+            "levelname": logging.getLevelName(logging.WARNING),
+            "msg": f"{dropped} log records were dropped, the log writer could not keep up",
+        })
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.mutex:
+                self.dropped += dropped
+
+"""
+Log file rotated when it reaches max_bytes or, if interval is set, when it has been
+written for interval seconds. The file is opened on the first record.
+"""
+class RotatingLogFileHandler(RotatingFileHandler):
+
+    def __init__(self, filename: str, max_bytes: int = DEFAULT_LOG_MAX_BYTES, backup_count: int = DEFAULT_LOG_BACKUP_COUNT, interval: float = DEFAULT_LOG_ROTATE_INTERVAL):
+
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        self.interval = interval
+        self.rollover_at = time.time() + interval if interval > 0 else None
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+
+        super().doRollover()
 
-        if not self.logger.hasHandlers():
+        if self.rollover_at is not None:
+            self.rollover_at = time.time() + self.interval
 
-            # Add stream handler
-            stream_handler = self.get_stream_handler()
-            self.logger.addHandler(stream_handler)
+def parse_log_level(level, default: int = DEFAULT_LOG_LEVEL) -> int:
+    """
+    Returns the logging level of a name such as "debug" or "INFO", or of a number
 
-            # Add file handler
-            file_handler = self.get_file_handler()
-            self.logger.addHandler(file_handler)
+    Args:
+        level: Name or number of the level
+        default (int): Level returned if the given one is not valid
 
-    def get_stream_handler(self):
+    Returns:
+        int: Logging level
+    """
+
+    if isinstance(level, int):
+        return level
+
+    value = logging.getLevelName(str(level).strip().upper())
+    return value if isinstance(value, int) else default
+
+_mutex = Lock()
+_queue_handler = None
+_listener = None
+
+def configure_logging(
+        level: int = DEFAULT_LOG_LEVEL,
+        console_level: int = DEFAULT_LOG_CONSOLE_LEVEL,
+        file: str = DEFAULT_LOG_FILE,
+        max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+        backup_count: int = DEFAULT_LOG_BACKUP_COUNT,
+        rotate_interval: float = DEFAULT_LOG_ROTATE_INTERVAL,
+        queue_size: int = DEFAULT_LOG_QUEUE_SIZE
+    ):
+    """
+    Sets up the handlers of the Cognit logger. The records are written to the console and
+    to the log file by a background thread. Calling it again replaces the previous setup,
+    the records already queued are written first.
+
+    Args:
+        level (int): Minimum level of the records, checked before any work is done
+        console_level (int): Minimum level of the records written to the console
+        file (str): Log file, empty to not write one
+        max_bytes (int): Size at which the log file is rotated, 0 to not rotate it by size
+        backup_count (int): Rotated log files kept
+        rotate_interval (float): Seconds after which the log file is rotated, 0 to not rotate it by time
+        queue_size (int): Records waiting to be written beyond which new ones are dropped
+    """
+
+    global _queue_handler, _listener
+
+    with _mutex:
+
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.propagate = False
+        logger.setLevel(level)
+
+        formatter = CognitFormatter(LOG_FORMAT)
 
-        # Set level
         stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.WARNING)
-        
-        # Set log format
-        formatter = logging.Formatter("[%(asctime)5s] [%(levelname)-s] %(message)s")
+        stream_handler.setLevel(console_level)
         stream_handler.setFormatter(formatter)
-            
-        return stream_handler
+        handlers = [stream_handler]
+
+        if file:
+            file_handler = RotatingLogFileHandler(file, max_bytes, max(1, backup_count), rotate_interval)
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+
+        queue_handler = DroppingQueueHandler(queue_size)
+        listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        listener.start()
+
+        # The new handler takes the records before the old one is removed, none is lost
+        logger.addHandler(queue_handler)
+
+        if _queue_handler is not None:
+            logger.removeHandler(_queue_handler)
+
+        if _listener is not None:
+            _stop_listener(_listener)
+
+        _queue_handler, _listener = queue_handler, listener
 
-    def get_file_handler(self):
+def _stop_listener(listener: QueueListener):
 
-        # Set level
-        file_handler = logging.FileHandler('/tmp/device_runtime.log')
-        file_handler.setLevel(logging.DEBUG)
+    # Writes the queued records before stopping
+    listener.stop()
 
-        # Set log format
-        formatter = logging.Formatter("[%(asctime)5s] [%(levelname)-s] %(message)s")
-        file_handler.setFormatter(formatter)
+    for handler in listener.handlers:
+        handler.close()
+
+@atexit.register
+def _flush_logging():
+
+    global _listener
+
+    with _mutex:
+        if _listener is not None:
+            _stop_listener(_listener)
+            _listener = None
+
+"""
+Logger of the Device Runtime. The messages accept lazy %-style arguments, which are
+only formatted if the level is enabled:
+
+    logger.debug("Execution %s submitted", exec_id)
+
+A disabled level costs a single check. The caller location is recorded by the logging
+module itself, without inspecting the whole stack. The records are written by a
+background thread, see configure_logging().
+"""
+class CognitLogger:
+
+    def __init__(self, verbose=True):
+
+        self.logger = logging.getLogger(LOGGER_NAME)
+        self.verbose = verbose
+        # Passed to every record, built once
+        self.extra = {"verbose": verbose}
+
+        # The default setup until the configuration is read
+        if _queue_handler is None and not self.logger.handlers:
+            configure_logging()
 
-        return file_handler
-    
     def set_level(self, level: int):
         self.logger.setLevel(level)
-    
-    def _log(self, level: int, message):
-
-        if self.verbose:
 
-            frame = inspect.stack()[2]
-            filename = os.path.basename(frame.filename)
-            line = frame.lineno
-            self.logger.log(level, f"[{filename}::{line}] {message}")
-        else:
-            self.logger.log(level, message)
+    def is_enabled_for(self, level: int) -> bool:
+        """
+        Checks if the messages of the level are emitted, to skip building costly ones
+        """
+        return self.logger.isEnabledFor(level)
 
-    def debug(self, message):
-        self._log(logging.DEBUG, message)
-        return
+    # Each level checks before doing any work, the location is found through stacklevel
+    def debug(self, message, *args):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.log(logging.DEBUG, message, *args, extra=self.extra, stacklevel=2)
 
-    def info(self, message):
-        self._log(logging.INFO, message)
+    def info(self, message, *args):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.log(logging.INFO, message, *args, extra=self.extra, stacklevel=2)
 
-    def warning(self, message):
-        self._log(logging.WARNING, message)
+    def warning(self, message, *args):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.logger.log(logging.WARNING, message, *args, extra=self.extra, stacklevel=2)
 
-    def error(self, message):
-        self._log(logging.ERROR, message)
+    def error(self, message, *args):
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.log(logging.ERROR, message, *args, extra=self.extra, stacklevel=2)
 
-    def critical(self, message):
-        self._log(logging.CRITICAL, message)
+    def critical(self, message, *args):
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self.logger.log(logging.CRITICAL, message, *args, extra=self.extra, stacklevel=2)
@@ -0,0 +1,351 @@
+from cognit.modules._call_timings import PhaseHistogram
+from cognit.modules._logger import CognitLogger
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread, Lock
+from typing import Callable
+import abc
+
+DEFAULT_METRICS_HOST = "127.0.0.1"
+DEFAULT_METRICS_PORT = 0
+
+# Upper bounds of the buckets of the request duration histograms, in seconds
+REQUEST_DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+
+    if extra:
+        pairs.append(extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+"""
+Base of the metrics. The children of a labelled metric, one per combination of label
+values, are created on first use and kept, so the hot path only looks them up in a dict.
+"""
+class Metric(abc.ABC):
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.mutex = Lock()
+        self.children = {}
+
+        if not self.label_names:
+            self.children[()] = self._new_child()
+
+    def labels(self, *values: str):
+        """
+        Returns the child of the given label values, in the order the labels were declared
+        """
+
+        child = self.children.get(values)
+
+        if child is None:
+
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects the labels {self.label_names}")
+
+            with self.mutex:
+                child = self.children.setdefault(values, self._new_child())
+
+        return child
+
+    def render(self) -> list[str]:
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+        for values, child in list(self.children.items()):
+            lines += child.render(self.name, self.label_names, values)
+
+        return lines
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """
+        Returns the value of one combination of label values
+        """
+
+class _CounterChild:
+
+    def __init__(self):
+
+        self.mutex = Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+
+        with self.mutex:
+            self.value += amount
+
+    def render(self, name: str, label_names: tuple, values: tuple) -> list[str]:
+        return [f"{name}{_format_labels(label_names, values)} {_format_value(self.value)}"]
+
+"""
+Value that only goes up, such as a number of requests
+"""
+class Counter(Metric):
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1):
+        self.children[()].inc(amount)
+
+    def get(self, *values) -> float:
+        return self.labels(*values).value
+
+    def _new_child(self):
+        return _CounterChild()
+
+class _GaugeChild(_CounterChild):
+
+    def __init__(self):
+
+        super().__init__()
+        self.function = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """
+        Reads the value from the function when the metrics are collected instead
+        """
+        self.function = function
+
+    def get(self) -> float:
+
+        function = self.function
+        return function() if function is not None else self.value
+
+    def render(self, name: str, label_names: tuple, values: tuple) -> list[str]:
+        return [f"{name}{_format_labels(label_names, values)} {_format_value(self.get())}"]
+
+"""
+Value that goes up and down, such as the number of calls in flight
+"""
+class Gauge(Metric):
+
+    kind = "gauge"
+
+    def set(self, value: float):
+        self.children[()].set(value)
+
+    def inc(self, amount: float = 1):
+        self.children[()].inc(amount)
+
+    def dec(self, amount: float = 1):
+        self.children[()].dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self.children[()].set_function(function)
+
+    def get(self, *values) -> float:
+        return self.labels(*values).get()
+
+    def _new_child(self):
+        return _GaugeChild()
+
+class _HistogramChild:
+
+    def __init__(self, buckets: tuple):
+
+        self.mutex = Lock()
+        self.histogram = PhaseHistogram(buckets)
+
+    def observe(self, value: float):
+
+        with self.mutex:
+            self.histogram.add(value)
+
+    def render(self, name: str, label_names: tuple, values: tuple) -> list[str]:
+
+        with self.mutex:
+            counts, total, count = list(self.histogram.counts), self.histogram.sum, self.histogram.count
+
+        lines = []
+        cumulative = 0
+
+        for bound, bucket_count in zip(self.histogram.bounds + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(f"{name}_bucket{_format_labels(label_names, values, le)} {cumulative}")
+
+        labels = _format_labels(label_names, values)
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {count}")
+
+        return lines
+
+"""
+Distribution of observed values over fixed buckets, such as request durations
+"""
+class Histogram(Metric):
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = REQUEST_DURATION_BUCKETS):
+
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labels)
+
+    def observe(self, value: float):
+        self.children[()].observe(value)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+"""
+Set of the metrics of the Device Runtime, rendered in the Prometheus text exposition format
+"""
+class MetricsRegistry:
+
+    def __init__(self):
+
+        self.mutex = Lock()
+        self.metrics = {}
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = REQUEST_DURATION_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        """
+        Returns the current value of every metric in the Prometheus text exposition format
+        """
+
+        with self.mutex:
+            metrics = list(self.metrics.values())
+
+        lines = []
+
+        for metric in metrics:
+            lines += metric.render()
+
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: Metric) -> Metric:
+
+        with self.mutex:
+
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+
+            self.metrics[metric.name] = metric
+
+        return metric
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+
+        payload = self.server.registry.render().encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+"""
+Serves the metrics over HTTP at /metrics, to be scraped by Prometheus. It runs on a
+thread of its own and only reads the metrics when it is scraped.
+"""
+class MetricsServer:
+
+    def __init__(self, registry: "MetricsRegistry" = None, host: str = DEFAULT_METRICS_HOST, port: int = DEFAULT_METRICS_PORT):
+        """
+        Args:
+            registry (MetricsRegistry): Metrics to serve, those of the Device Runtime by default
+            host (str): Address to listen on
+            port (int): Port to listen on, 0 to pick a free one
+        """
+
+        self.registry = registry if registry is not None else metrics
+        self.host = host
+        self.port = port
+        self.logger = CognitLogger()
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        """
+        Starts listening. The port given by the system, if any, is set in the port attribute.
+        """
+
+        if self.server is not None:
+            return
+
+        self.server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.registry = self.registry
+        self.port = self.server.server_address[1]
+
+        self.thread = Thread(target=self.server.serve_forever, name="cognit-metrics-server")
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.logger.info("Serving metrics at http://%s:%d/metrics", self.host, self.port)
+
+    def stop(self):
+        """
+        Stops listening
+        """
+
+        if self.server is None:
+            return
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.server = None
+        self.thread = None
+
+# Metrics of the Device Runtime, shared by all its components
+metrics = MetricsRegistry()
+
+CALL_QUEUE_DEPTH = metrics.gauge("cognit_call_queue_depth", "Calls waiting in the queue to be offloaded")
+CALL_QUEUE_REJECTED = metrics.counter("cognit_call_queue_rejected_total", "Calls discarded because the queue was full")
+CALLS_IN_FLIGHT = metrics.gauge("cognit_calls_in_flight", "Calls being offloaded right now")
+CALLBACK_QUEUE_DEPTH = metrics.gauge("cognit_callback_queue_depth", "Callbacks of the offloaded calls waiting to be run")
+CALLBACK_DURATION = metrics.histogram("cognit_callback_duration_seconds", "Duration of the callbacks of the offloaded calls")
+ECF_REQUEST_DURATION = metrics.histogram("cognit_ecf_request_duration_seconds", "Duration of the execution requests sent to each Edge Cluster Frontend", ("ecf",))
+FUNCTION_UPLOADS = metrics.counter("cognit_function_uploads_total", "Functions uploaded to the DaaS, by result", ("result",))
+FUNCTION_ID_CACHE_HITS = metrics.counter("cognit_function_id_cache_hits_total", "Uploads avoided because the function ID was known, by cache", ("cache",))
+STATE_TRANSITIONS = metrics.counter("cognit_state_transitions_total", "Transitions of the Device Runtime state machine", ("source", "target"))
+REINITS = metrics.counter("cognit_reinits_total", "Times the Device Runtime went back to authenticate")
+TOKEN_REFRESHES = metrics.counter("cognit_token_refreshes_total", "Refreshes of the Cognit Frontend token, by result", ("result",))
+HTTP_BYTES_SENT = metrics.counter("cognit_http_bytes_sent_total", "Bytes of the request bodies sent, by host", ("host",))
+HTTP_BYTES_RECEIVED = metrics.counter("cognit_http_bytes_received_total", "Bytes of the response bodies received, by host", ("host",))
@@ -1,14 +1,13 @@
 from cognit.modules._device_runtime_state_machine import DeviceRuntimeStateMachine
-from cognit.modules._sync_result_queue import SyncResultQueue
 from cognit.models._cognit_frontend_client import Scheduling
 from cognit.modules._cognitconfig import CognitConfig
 from cognit.modules._call_queue import CallQueue
+from cognit.modules._call_timings import CallStats
 from cognit.modules._logger import CognitLogger
-import time
 
 class StateMachineHandler():
 
-    def __init__(self, config: CognitConfig, requirements: Scheduling, call_queue: CallQueue, sync_result_queue: SyncResultQueue):
+    def __init__(self, config: CognitConfig, requirements: Scheduling, call_queue: CallQueue, call_stats: CallStats = None):
 
         # Logger initialization
         self.logger = CognitLogger()
@@ -17,7 +16,7 @@ class StateMachineHandler():
         self.running = True
 
         # State machine initialization
-        self.sm = DeviceRuntimeStateMachine(config, requirements, call_queue, sync_result_queue)
+        self.sm = DeviceRuntimeStateMachine(config, requirements, call_queue, call_stats)
 
     def change_requirements(self, new_requirements: Scheduling) -> bool:
         """
@@ -38,16 +37,66 @@ class StateMachineHandler():
         """
 
         self.running = False
+        self.sm.notify_event()
     
-    def run(self, interval=0.05):
+    def run(self, retry_interval=0.05):
+        """
+        Evaluates the state machine conditions as events arrive. The thread
+        sleeps while the device runtime is ready and there is nothing to do.
+
+        Args:
+            retry_interval (float): Time to wait before retrying a state that did not progress
+        """
+
+        # Calls are offloaded by the dispatcher threads while the state machine is ready
+        self.sm.callback_executor.start()
+        self.sm.dispatcher.start()
+        self.sm.poller.start()
+        self.sm.latency_monitor.start()
+        self.sm.token_refresher.start()
 
         while self.running:
 
-            self.logger.info("Current state: " + self.sm.current_state.id)
+            # Events notified from now on will wake up the next wait
+            self.sm.clear_events()
+
+            previous_state = self.sm.current_state.id
             # Evaluate the conditions of the current state
             self.evaluate_conditions()
-            # Wait for the next iteration
-            time.sleep(interval)
+            current_state = self.sm.current_state.id
+
+            if current_state != previous_state:
+                self.logger.debug("State changed from %s to %s", previous_state, current_state)
+
+            if not self.running:
+                break
+
+            if self.sm.is_idle():
+                # Nothing to do until a requirement change, a lost connection or a timer arrives
+                self.sm.wait_for_event()
+            elif current_state == previous_state and current_state != "ready":
+                # The state did not progress, wait before retrying
+                self.sm.wait_for_event(retry_interval)
+
+        self.sm.dispatcher.stop()
+        # The queue is closed, the calls nobody will take are failed
+        self.sm.fail_queued_calls()
+        self.sm.poller.stop()
+        self.sm.latency_monitor.stop()
+        self.sm.token_refresher.stop()
+
+        if self.sm.timer is not None:
+            self.sm.timer.stop()
+            self.sm.timer = None
+
+        # Function IDs still held in memory are written to disk
+        if self.sm.cfc is not None and self.sm.cfc.function_id_cache is not None:
+            self.sm.cfc.function_id_cache.stop()
+
+        # Callbacks of the calls already finished are still run
+        self.sm.callback_executor.stop()
+        # No request is sent anymore, release the connections kept alive
+        self.sm.http_session.close()
 
     def evaluate_conditions(self):
         """
@@ -69,7 +118,7 @@ class StateMachineHandler():
         if not self.sm.is_cfc_connected():
             self.sm.token_not_valid_ready()
         elif not self.sm.is_ecf_connected():
-            self.sm.token_not_valid_ready_2()
+            self.sm.ecf_lost_ready()
         else:
             if not self.sm.have_requirements_changed() and not self.sm.is_new_ecf_address_set():
                 self.sm.result_given()
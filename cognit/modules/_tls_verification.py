@@ -0,0 +1,82 @@
+from urllib.parse import urlsplit
+from threading import Lock
+import time
+
+# Seconds a host is reached without verification before its certificate is verified again
+DEFAULT_UNVERIFIED_TTL = 600.0
+
+"""
+Process wide record of the Edge Cluster Frontends whose TLS certificate could not be
+verified (e.g. self-signed). Once a host failed the verification, the next requests to
+it are sent without verification right away instead of failing a handshake first.
+The decision expires after ttl seconds, so a host that gets a valid certificate is
+verified again.
+"""
+class TlsVerificationCache:
+
+    def __init__(self, ttl: float = DEFAULT_UNVERIFIED_TTL):
+        """
+        Args:
+            ttl (float): Seconds a host that failed the verification is kept as unverified
+        """
+
+        self.ttl = ttl
+        self.mutex = Lock()
+        # Host -> time.monotonic() when it is verified again
+        self.unverified_hosts = {}
+
+    def is_verified(self, uri: str) -> bool:
+        """
+        Returns False if the certificate of the host of the URI failed the verification
+        less than ttl seconds ago
+
+        Args:
+            uri (str): URI of the request
+
+        Returns:
+            bool: True if the request must verify the certificate, False otherwise
+        """
+
+        host = self._get_host(uri)
+        expires_at = self.unverified_hosts.get(host)
+
+        if expires_at is None:
+            return True
+
+        if time.monotonic() < expires_at:
+            return False
+
+        with self.mutex:
+
+            # Unless another request failed the verification again in the meantime
+            if self.unverified_hosts.get(host) == expires_at:
+                del self.unverified_hosts[host]
+
+        return True
+
+    def set_unverified(self, uri: str):
+        """
+        Records that the certificate of the host of the URI cannot be verified
+
+        Args:
+            uri (str): URI of the request that failed the verification
+        """
+
+        with self.mutex:
+            self.unverified_hosts[self._get_host(uri)] = time.monotonic() + self.ttl
+
+    def clear(self):
+        """
+        Forgets every decision, the next request to each host is verified again
+        """
+
+        with self.mutex:
+            self.unverified_hosts = {}
+
+    def _get_host(self, uri: str) -> str:
+
+        # Host and port, the same host may serve a valid certificate on another port
+        return urlsplit(uri).netloc.lower()
+
+# Shared by all the clients of the process
+tls_verification_cache = TlsVerificationCache()
@@ -0,0 +1,174 @@
+from cognit.modules._metrics import TOKEN_REFRESHES
+from cognit.modules._logger import CognitLogger
+from threading import Thread, Lock, Event
+from typing import Callable
+import base64
+import json
+import time
+
+DEFAULT_TOKEN_REFRESH_MARGIN = 60.0
+# Seconds between two attempts to refresh the token after a failed one
+TOKEN_REFRESH_RETRY_INTERVAL = 10.0
+
+def get_token_expiry(token: str) -> float | None:
+    """
+    Reads the expiry of a JWT token from its exp claim. The signature is not checked,
+    the token is only read to know when to renew it.
+
+    Args:
+        token (str): JWT token given by the Cognit Frontend
+
+    Returns:
+        float | None: Expiry as seconds since the epoch, None if the token has no readable expiry
+    """
+
+    try:
+        payload = token.split(".")[1]
+        # base64url without padding
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+"""
+Renews the token of the Cognit Frontend before it expires, so that the requests never
+carry an expired token. A single thread sleeps until margin seconds before the expiry
+and then asks for a new token, which is handed to every client at once.
+
+refresh() is single-flight: callers arriving while a refresh is in progress wait for it
+and get its token instead of authenticating again.
+"""
+class TokenRefresher:
+
+    def __init__(self, request_token: Callable[[], str | None], on_refresh: Callable[[str], None], margin: float = DEFAULT_TOKEN_REFRESH_MARGIN):
+        """
+        Args:
+            request_token (Callable): Function that authenticates and returns a new token, None if it fails
+            on_refresh (Callable): Function that hands a new token to the clients
+            margin (float): Seconds before the expiry at which the token is renewed
+        """
+
+        self.request_token = request_token
+        self.on_refresh = on_refresh
+        self.margin = margin
+        self.logger = CognitLogger()
+
+        self.mutex = Lock()
+        self.wakeup_event = Event()
+        self.stop_event = Event()
+        self.thread = None
+
+        self.token = None
+        self.expires_at = None
+        self.refresh_at = None
+
+    def start(self):
+        """
+        Launches the refreshing thread
+        """
+
+        if self.thread is not None:
+            return
+
+        self.stop_event.clear()
+        self.thread = Thread(target=self._run, name="cognit-token-refresher")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the refreshing thread
+        """
+
+        self.stop_event.set()
+        self.wakeup_event.set()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def schedule(self, token: str):
+        """
+        Sets the token in use and plans its renewal. Tokens without a readable expiry are not renewed.
+
+        Args:
+            token (str): Token just given by the Cognit Frontend
+        """
+
+        expires_at = get_token_expiry(token)
+        now = time.time()
+
+        self.token = token
+        self.expires_at = expires_at
+
+        if expires_at is None:
+            self.logger.debug("The token has no expiry, it will not be refreshed")
+            self.refresh_at = None
+        else:
+            # Short-lived tokens are renewed halfway through their life
+            self.refresh_at = expires_at - min(self.margin, max(0.0, expires_at - now) / 2)
+            self.logger.debug(f"Token expires in {expires_at - now:.0f} s, refreshing it in {self.refresh_at - now:.0f} s")
+
+        self.wakeup_event.set()
+
+    def refresh(self) -> str | None:
+        """
+        Gets a new token and hands it to the clients. The current token is kept if it fails.
+
+        Returns:
+            str | None: The new token, None if it could not be obtained
+        """
+
+        token = self.token
+
+        with self.mutex:
+
+            # Another caller refreshed it while this one was waiting
+            if self.token is not token:
+                return self.token
+
+            new_token = self.request_token()
+
+            if not new_token:
+                self.logger.warning("Token could not be refreshed, the current one is kept")
+                TOKEN_REFRESHES.labels("failure").inc()
+                return None
+
+            TOKEN_REFRESHES.labels("success").inc()
+
+            self.on_refresh(new_token)
+            self.schedule(new_token)
+            self.logger.info("Token refreshed")
+            return new_token
+
+    def _run(self):
+
+        while not self.stop_event.is_set():
+
+            self.wakeup_event.clear()
+            refresh_at = self.refresh_at
+
+            if refresh_at is None:
+                self.wakeup_event.wait()
+                continue
+
+            delay = refresh_at - time.time()
+
+            if delay > 0:
+                # A new schedule() wakes it up earlier
+                self.wakeup_event.wait(delay)
+                continue
+
+            try:
+                refreshed = self.refresh() is not None
+            except Exception as e:
+                self.logger.error(f"Token refresh failed: {e}")
+                refreshed = False
+
+            if not refreshed and self.refresh_at == refresh_at:
+
+                # Keep trying while the current token is valid, after that the requests fail and the runtime authenticates again
+                if self.expires_at is not None and time.time() + TOKEN_REFRESH_RETRY_INTERVAL < self.expires_at:
+                    self.refresh_at = time.time() + TOKEN_REFRESH_RETRY_INTERVAL
+                else:
+                    self.refresh_at = None
@@ -0,0 +1,95 @@
+"""
+Microbenchmark of the CallQueue enqueue/dequeue throughput.
+
+Usage:
+    python cognit/test/benchmark/bench_call_queue.py [--calls 10000] [--repeat 5]
+"""
+
+import sys
+sys.path.append(".")
+
+from cognit.models._device_runtime import Call, ExecutionMode, FunctionLanguage
+from cognit.modules._call_queue import CallQueue
+from threading import Thread
+import argparse
+import time
+
+def sum(a: int, b: int):
+    return a + b
+
+def make_calls(n: int) -> list[Call]:
+    call = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 2])
+    return [call.copy() for _ in range(n)]
+
+def bench_list_baseline(calls: list[Call]) -> float:
+    """
+    Reference: list based FIFO with pop(0), as CallQueue used to be implemented.
+    """
+    queue = []
+    start = time.perf_counter()
+    for call in calls:
+        queue.append(call)
+    while queue:
+        queue.pop(0)
+    return time.perf_counter() - start
+
+def bench_get_call(calls: list[Call]) -> float:
+    queue = CallQueue(size_limit=len(calls))
+    start = time.perf_counter()
+    for call in calls:
+        queue.add_call(call)
+    while queue.get_call() is not None:
+        pass
+    return time.perf_counter() - start
+
+def bench_get_many(calls: list[Call], batch: int = 64) -> float:
+    queue = CallQueue(size_limit=len(calls))
+    start = time.perf_counter()
+    for call in calls:
+        queue.add_call(call)
+    while queue.get_many(batch):
+        pass
+    return time.perf_counter() - start
+
+def bench_blocking_consumer(calls: list[Call]) -> float:
+    """
+    One producer thread and one consumer blocked in get_call() until each call arrives.
+    """
+    queue = CallQueue(size_limit=len(calls))
+    received = 0
+
+    def consume():
+        nonlocal received
+        while received < len(calls):
+            if queue.get_call(timeout=None) is not None:
+                received += 1
+
+    consumer = Thread(target=consume)
+    start = time.perf_counter()
+    consumer.start()
+    for call in calls:
+        queue.add_call(call)
+    consumer.join()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=10000, help="Number of calls queued in each run")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs, the best one is reported")
+    args = parser.parse_args()
+
+    calls = make_calls(args.calls)
+    benchmarks = {
+        "list pop(0), no lock": bench_list_baseline,
+        "add_call + get_call": bench_get_call,
+        "add_call + get_many(64)": bench_get_many,
+        "blocking consumer thread": bench_blocking_consumer,
+    }
+
+    print(f"{'benchmark':<28} {'best (ms)':>10} {'calls/s':>14}")
+    for name, bench in benchmarks.items():
+        best = min(bench(calls) for _ in range(args.repeat))
+        print(f"{name:<28} {best * 1000:>10.2f} {args.calls / best:>14,.0f}")
+
+if __name__ == "__main__":
+    main()
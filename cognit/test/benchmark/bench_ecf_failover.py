@@ -0,0 +1,98 @@
+"""
+Recovery time of the Device Runtime from the loss of its Edge Cluster Frontend to the
+first successful call, measured against the local stand-ins of stand_in.py.
+
+Scenarios:
+    failover to a known ECF   Two ECFs are in use, the lost one's calls go to the other
+    get the ECFs again        Only the lost ECF is in use, the ECFs are listed again with the same token
+    full re-init              The previous behaviour: authenticate, upload the requirements and list the ECFs
+
+Usage:
+    python cognit/test/benchmark/bench_ecf_failover.py [--repeat 5] [--cfc-delay 0.05] [--ecf-delay 0.01]
+"""
+
+import sys
+sys.path.append(".")
+
+from cognit.test.benchmark.stand_in import start_cognit_frontend, start_edge_cluster_frontend, write_config, REQUIREMENTS
+from cognit.models._edge_cluster_frontend_client import ExecReturnCode
+from cognit.device_runtime import DeviceRuntime
+import statistics
+import argparse
+import logging
+import time
+import os
+
+def add(a: int, b: int):
+    return a + b
+
+def measure_recovery(scenario: str, cfc_delay: float, ecf_delay: float) -> tuple[float, int]:
+    """
+    Returns:
+        tuple[float, int]: Seconds from the ECF loss to the first successful call, and calls that failed meanwhile
+    """
+
+    cognit_frontend = start_cognit_frontend(cfc_delay)
+    lost_ecf = start_edge_cluster_frontend(cognit_frontend, ecf_delay)
+    backup_ecf = start_edge_cluster_frontend(cognit_frontend, ecf_delay)
+    cognit_frontend.ecf_addresses = [lost_ecf.address, backup_ecf.address]
+
+    max_edge_clusters = 0 if scenario == "failover to a known ECF" else 1
+    config_path = write_config(cognit_frontend, max_edge_clusters=max_edge_clusters)
+    runtime = DeviceRuntime(config_path)
+
+    try:
+
+        runtime.init(REQUIREMENTS)
+
+        # Warm up: connected, function uploaded, connections open
+        while runtime.call(add, 2, 3, timeout=5).ret_code != ExecReturnCode.SUCCESS:
+            time.sleep(0.01)
+
+        sm = runtime.sm_handler.sm
+
+        # The ECF goes down and the frontend stops offering it
+        lost_ecf.stop()
+        cognit_frontend.ecf_addresses = [backup_ecf.address]
+        start = time.perf_counter()
+
+        if scenario == "full re-init":
+            sm.cfc.set_has_connection(False)
+            sm.notify_event()
+
+        failed = 0
+
+        while runtime.call(add, 2, 3, timeout=5).ret_code != ExecReturnCode.SUCCESS:
+            failed += 1
+
+        return time.perf_counter() - start, failed
+
+    finally:
+
+        runtime.stop()
+        backup_ecf.stop()
+        cognit_frontend.stop()
+        os.unlink(config_path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs of each scenario")
+    parser.add_argument("--cfc-delay", type=float, default=0.05, help="Seconds added to each Cognit Frontend response")
+    parser.add_argument("--ecf-delay", type=float, default=0.01, help="Seconds added to each Edge Cluster Frontend response")
+    args = parser.parse_args()
+
+    # The lost ECF is reported at ERROR level, keep the output readable
+    logging.getLogger("cognit-logger").disabled = True
+
+    print(f"{'scenario':<26} {'median (ms)':>12} {'max (ms)':>10} {'failed calls':>13}")
+
+    for scenario in ["failover to a known ECF", "get the ECFs again", "full re-init"]:
+
+        runs = [measure_recovery(scenario, args.cfc_delay, args.ecf_delay) for _ in range(args.repeat)]
+        recoveries = [recovery for recovery, _ in runs]
+        failed = max(failed for _, failed in runs)
+
+        print(f"{scenario:<26} {statistics.median(recoveries) * 1000:>12.1f} {max(recoveries) * 1000:>10.1f} {failed:>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Throughput and latency of DeviceRuntime.call() at a fixed concurrency, end to end against
+the local stand-ins of stand_in.py. It needs no network access, so it can run in CI.
+
+Every level of concurrency is run on a fresh runtime: a number of threads call the same
+function in a loop until the given number of calls is done. The first call of the
+runtime, which authenticates and uploads the function, is left out.
+
+Usage:
+    python cognit/test/benchmark/bench_end_to_end.py [--concurrency 1 4 16] [--calls 500] [--ecfs 2]
+        [--ecf-delay 0.005] [--jitter 0.002] [--error-rate 0] [--cold-start 0] [--json results.json]
+"""
+
+import sys
+sys.path.append(".")
+
+from cognit.test.benchmark.stand_in import start_cognit_frontend, start_edge_cluster_frontend, write_config, REQUIREMENTS
+from cognit.models._edge_cluster_frontend_client import ExecReturnCode
+from cognit.device_runtime import DeviceRuntime
+from threading import Thread, Lock
+import statistics
+import argparse
+import logging
+import json
+import time
+import os
+
+# Phases of the offload shown in the breakdown, see DeviceRuntime.stats()
+PHASES = ["queue_wait", "params_serialization", "execute", "response_parsing", "result_deserialization", "total"]
+
+def add(a: int, b: int):
+    return a + b
+
+def get_percentiles(latencies: list[float]) -> tuple[float, float, float]:
+
+    if len(latencies) < 2:
+        latency = latencies[0] if latencies else float("nan")
+        return latency, latency, latency
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+def run(concurrency: int, calls: int, args: argparse.Namespace) -> dict:
+    """
+    Returns:
+        dict: Throughput in calls per second, latency percentiles in milliseconds, failed calls
+        and median time per phase of the offload
+    """
+
+    cognit_frontend = start_cognit_frontend(args.cfc_delay, args.jitter, seed=args.seed)
+    ecfs = [start_edge_cluster_frontend(cognit_frontend, args.ecf_delay, args.jitter, args.error_rate, args.cold_start, seed=args.seed) for _ in range(args.ecfs)]
+    cognit_frontend.ecf_addresses = [ecf.address for ecf in ecfs]
+
+    # Every thread has its worker and its pooled connection
+    config_path = write_config(cognit_frontend, dispatcher_pool_size=concurrency, http_pool_size=concurrency, latency_report_interval=0)
+    runtime = DeviceRuntime(config_path)
+
+    latencies = []
+    failed = 0
+    remaining = calls
+    mutex = Lock()
+
+    def caller():
+
+        nonlocal failed, remaining
+
+        while True:
+
+            with mutex:
+                if remaining == 0:
+                    return
+                remaining -= 1
+
+            start = time.perf_counter()
+            result = runtime.call(add, 2, 3, timeout=args.timeout)
+            elapsed = (time.perf_counter() - start) * 1000
+
+            with mutex:
+                if result is not None and result.ret_code == ExecReturnCode.SUCCESS:
+                    latencies.append(elapsed)
+                else:
+                    failed += 1
+
+    try:
+
+        runtime.init(REQUIREMENTS)
+
+        # Warm up: connected and function uploaded
+        deadline = time.monotonic() + 30
+
+        while runtime.call(add, 2, 3, timeout=5).ret_code != ExecReturnCode.SUCCESS:
+            if time.monotonic() > deadline:
+                raise RuntimeError("The Device Runtime did not get ready against the stand-ins")
+
+        runtime.call_stats.reset()
+
+        threads = [Thread(target=caller) for _ in range(concurrency)]
+        start = time.perf_counter()
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        duration = time.perf_counter() - start
+        stats = runtime.stats().get(f"{add.__module__}.{add.__qualname__}", {})
+
+    finally:
+
+        runtime.stop()
+
+        for ecf in ecfs:
+            ecf.stop()
+
+        cognit_frontend.stop()
+        os.unlink(config_path)
+
+    p50, p95, p99 = get_percentiles(latencies)
+
+    return {
+        "concurrency": concurrency,
+        "calls": calls,
+        "failed": failed,
+        "throughput": len(latencies) / duration,
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+        "phases": {phase: stats[phase]["p50"] for phase in PHASES if phase in stats},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Numbers of threads calling at the same time")
+    parser.add_argument("--calls", type=int, default=500, help="Calls made at each level of concurrency")
+    parser.add_argument("--ecfs", type=int, default=2, help="Number of Edge Cluster Frontends")
+    parser.add_argument("--cfc-delay", type=float, default=0.005, help="Seconds added to each Cognit Frontend response")
+    parser.add_argument("--ecf-delay", type=float, default=0.005, help="Seconds added to each Edge Cluster Frontend response")
+    parser.add_argument("--jitter", type=float, default=0.002, help="Maximum seconds randomly added to or taken from the delays")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of the execution requests answered with a 500 error")
+    parser.add_argument("--cold-start", type=float, default=0.0, help="Seconds added to the first execution of each function in each ECF")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Timeout of each call in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the injected jitter and errors")
+    parser.add_argument("--json", help="File where the results are written as JSON")
+    args = parser.parse_args()
+
+    # Injected errors are reported at ERROR level, keep the output readable
+    logging.getLogger("cognit-logger").disabled = True
+
+    results = []
+
+    print(f"{'concurrency':>11} {'calls/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'failed':>7}")
+
+    for concurrency in args.concurrency:
+
+        result = run(concurrency, args.calls, args)
+        results.append(result)
+
+        print(f"{concurrency:>11} {result['throughput']:>9.1f} {result['p50']:>9.2f} {result['p95']:>9.2f} {result['p99']:>9.2f} {result['failed']:>7}")
+
+    print()
+    print("Median per phase (ms)")
+    print(f"{'concurrency':>11} " + " ".join(f"{phase:>22}" for phase in PHASES))
+
+    for result in results:
+        print(f"{result['concurrency']:>11} " + " ".join(f"{result['phases'].get(phase, float('nan')):>22.3f}" for phase in PHASES))
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+if __name__ == "__main__":
+    main()
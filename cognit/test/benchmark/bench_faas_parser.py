@@ -0,0 +1,215 @@
+"""
+Time and peak memory of FaasParser (cloudpickle + base64 + UTF-8 decode) for the
+payloads that go through it: functions with large closures, scalars, nested dicts,
+strings, bytes and NumPy arrays, from 1 KB up to the sizes given.
+
+Operations:
+    serialize      FaasParser.serialize(), as for functions and results
+    deserialize    FaasParser.deserialize() of the serialized payload
+    params         serialize_params(), the JSON body of an execution request
+
+The time is the best of the runs done within --min-time seconds, at least one, with
+tracemalloc off, the least disturbed by the rest of the machine. The peak memory is taken in a separate run with tracemalloc on, it is
+the memory allocated over the payload itself. The results can be saved and compared
+with a previous run to check a serialization change:
+
+Usage:
+    python cognit/test/benchmark/bench_faas_parser.py [--sizes 1K 1M 10M] [--payloads str bytes]
+        [--save baseline.json] [--baseline baseline.json]
+
+The NumPy payloads are skipped if NumPy is not installed. 500M sizes need several GB of memory.
+"""
+
+import sys
+sys.path.append(".")
+
+from cognit.modules._edge_cluster_frontend_client import serialize_params
+from cognit.modules._faas_parser import FaasParser
+from typing import Callable, Any
+import cloudpickle
+import tracemalloc
+import platform
+import argparse
+import logging
+import json
+import time
+import gc
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+def parse_size(size: str) -> int:
+
+    unit = size[-1].upper()
+    return int(float(size[:-1]) * UNITS[unit]) if unit in UNITS else int(size)
+
+def format_size(size: int) -> str:
+
+    for unit in ("G", "M", "K"):
+        if size >= UNITS[unit]:
+            return f"{size / UNITS[unit]:.3g}{unit}"
+
+    return str(size)
+
+def make_function(size: int) -> Callable:
+
+    # Captured by the closure, it is shipped with the function
+    table = bytes(range(256)) * (size // 256)
+
+    def lookup(index: int) -> int:
+        return table[index % len(table)]
+
+    return lookup
+
+def make_nested_dict(size: int) -> dict:
+
+    # Each entry takes about 100 bytes once pickled
+    return {f"sensor-{i}": {"id": i, "value": i * 0.5, "tags": ["edge", "cognit"], "meta": {"ok": True, "unit": "ms"}}
+        for i in range(max(1, size // 100))}
+
+def make_numpy_array(size: int) -> Any:
+    return np.arange(max(1, size // 8), dtype=np.float64)
+
+# Payload name -> builder from a target size, None if the size does not apply
+PAYLOADS = {
+    "function": make_function,
+    "scalar": None,
+    "dict": make_nested_dict,
+    "str": lambda size: "x" * size,
+    "bytes": lambda size: bytes(range(256)) * (size // 256) + bytes(size % 256),
+    "numpy": make_numpy_array,
+}
+
+def measure_time(operation: Callable[[], Any], min_time: float, max_runs: int) -> float:
+    """
+    Returns:
+        float: Seconds of the fastest run
+    """
+
+    runs = []
+    start = time.perf_counter()
+
+    while not runs or (len(runs) < max_runs and time.perf_counter() - start < min_time):
+
+        run_start = time.perf_counter()
+        operation()
+        runs.append(time.perf_counter() - run_start)
+
+    return min(runs)
+
+def measure_peak(operation: Callable[[], Any]) -> int:
+    """
+    Returns:
+        int: Bytes allocated at the peak of the operation, the result included
+    """
+
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        result = operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    del result
+    return peak
+
+def run(payload_name: str, size: int, args: argparse.Namespace) -> list[dict]:
+
+    parser = FaasParser()
+
+    payload = 3.14159 if PAYLOADS[payload_name] is None else PAYLOADS[payload_name](size)
+    serialized = parser.serialize(payload)
+
+    operations = {
+        "serialize": lambda: parser.serialize(payload),
+        "deserialize": lambda: parser.deserialize(serialized),
+    }
+
+    # Functions are uploaded, not sent as parameters
+    if payload_name != "function":
+        operations["params"] = lambda: serialize_params(parser, (payload,))
+
+    results = []
+
+    for operation_name, operation in operations.items():
+
+        results.append({
+            "payload": payload_name,
+            "size": size if PAYLOADS[payload_name] is not None else 0,
+            "operation": operation_name,
+            "serialized_bytes": len(serialized),
+            "seconds": measure_time(operation, args.min_time, args.max_runs),
+            "peak_bytes": measure_peak(operation) if not args.no_memory else None,
+        })
+
+    return results
+
+def get_key(result: dict) -> tuple:
+    return result["payload"], result["size"], result["operation"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["1K", "100K", "1M", "10M"], help="Payload sizes, e.g. 1K 1M 500M")
+    parser.add_argument("--payloads", nargs="+", default=list(PAYLOADS), choices=list(PAYLOADS), help="Kinds of payload")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds spent running each operation to get its best time")
+    parser.add_argument("--max-runs", type=int, default=1000, help="Maximum runs of each operation")
+    parser.add_argument("--no-memory", action="store_true", help="Do not measure the peak memory")
+    parser.add_argument("--save", help="File where the results are written as JSON")
+    parser.add_argument("--baseline", help="Results saved by a previous run to compare with")
+    args = parser.parse_args()
+
+    logging.getLogger("cognit-logger").disabled = True
+
+    payloads = list(args.payloads)
+
+    if "numpy" in payloads and np is None:
+        print("NumPy is not installed, its payloads are skipped\n")
+        payloads.remove("numpy")
+
+    baseline = {}
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = {get_key(result): result for result in json.load(file)["results"]}
+
+    sizes = sorted(parse_size(size) for size in args.sizes)
+    results = []
+
+    print(f"{'payload':<9} {'size':>6} {'operation':<12} {'serialized':>10} {'time (ms)':>11} {'MB/s':>9} {'peak (MB)':>10} {'vs baseline':>12}")
+
+    for payload_name in payloads:
+
+        # Scalars have a single size
+        for size in sizes if PAYLOADS[payload_name] is not None else [0]:
+
+            for result in run(payload_name, size, args):
+
+                results.append(result)
+
+                throughput = result["serialized_bytes"] / result["seconds"] / 1e6
+                peak = f"{result['peak_bytes'] / 1e6:.2f}" if result["peak_bytes"] is not None else "-"
+                previous = baseline.get(get_key(result))
+                ratio = f"{result['seconds'] / previous['seconds']:.2f}x" if previous else "-"
+
+                print(f"{payload_name:<9} {format_size(result['size']) if result['size'] else '-':>6} {result['operation']:<12} {format_size(result['serialized_bytes']):>10} "
+                      f"{result['seconds'] * 1000:>11.3f} {throughput:>9.1f} {peak:>10} {ratio:>12}")
+
+    if args.save:
+
+        with open(args.save, "w") as file:
+            json.dump({
+                "python": platform.python_version(),
+                "cloudpickle": cloudpickle.__version__,
+                "numpy": np.__version__ if np is not None else None,
+                "machine": platform.machine(),
+                "results": results,
+            }, file, indent=2)
+
+if __name__ == "__main__":
+    main()
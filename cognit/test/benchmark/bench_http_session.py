@@ -0,0 +1,126 @@
+"""
+Per-call latency of EdgeClusterFrontendClient.execute_function against a local HTTPS
+stand-in of the Edge Cluster Frontend, with a pooled keep-alive session and with the
+module-level requests functions (a new TCP + TLS connection per call).
+
+The stand-in uses a self-signed certificate generated with the openssl command.
+
+Usage:
+    python cognit/test/benchmark/bench_http_session.py [--calls 200] [--threads 4]
+"""
+
+import sys
+sys.path.append(".")
+
+from cognit.modules._edge_cluster_frontend_client import EdgeClusterFrontendClient
+from cognit.modules._http_session import create_http_session
+from cognit.modules._faas_parser import FaasParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+import requests as req
+import subprocess
+import statistics
+import tempfile
+import argparse
+import json
+import time
+import ssl
+import os
+
+RESULT = FaasParser().serialize(5)
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    # Keep-alive needs HTTP/1.1
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, do not let them wait for an ACK
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"ret_code": 0, "res": RESULT, "err": None}).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def create_certificate(directory: str) -> tuple[str, str]:
+
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+
+    subprocess.run([
+        "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+        "-keyout", key, "-out", cert, "-subj", "/CN=localhost",
+        "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+    ], check=True, capture_output=True)
+
+    return cert, key
+
+def start_stand_in(cert: str, key: str) -> ThreadingHTTPServer:
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def bench(client: EdgeClusterFrontendClient, calls: int, threads: int) -> list[float]:
+
+    def offload(_) -> float:
+        start = time.perf_counter()
+        client.execute_function("1", 1, [2, 3], timeout=10)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(threads) as pool:
+        return list(pool.map(offload, range(calls)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="Number of offloads in each run")
+    parser.add_argument("--threads", type=int, default=4, help="Offloads sent at the same time, as the dispatcher threads")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        cert, key = create_certificate(directory)
+        # Trusted by both the session and the module-level functions
+        os.environ["REQUESTS_CA_BUNDLE"] = cert
+
+        server = start_stand_in(cert, key)
+        address = f"https://localhost:{server.server_address[1]}"
+
+        clients = {
+            # The requests module has the same post() and get() as a session
+            "new connection per call": EdgeClusterFrontendClient("token", address, req),
+            "pooled keep-alive session": EdgeClusterFrontendClient("token", address, create_http_session(args.threads)),
+        }
+
+        print(f"{'client':<28} {'mean (ms)':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'calls/s':>10}")
+
+        for name, client in clients.items():
+
+            # Warm up, the pooled session opens its connections here
+            bench(client, args.threads, args.threads)
+
+            start = time.perf_counter()
+            latencies = bench(client, args.calls, args.threads)
+            elapsed = time.perf_counter() - start
+
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{name:<28} {statistics.mean(latencies) * 1000:>10.2f} {statistics.median(latencies) * 1000:>10.2f} {p99 * 1000:>10.2f} {args.calls / elapsed:>10,.0f}")
+
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Cost of a debug message of CognitLogger in the dispatch loop, with the debug level
+disabled and enabled, against the previous implementation that inspected the whole
+call stack before checking the level.
+
+The messages are logged from a few frames down the stack, as in the state machine and
+the dispatcher threads. Enabled messages go to a handler that discards them. Each
+figure is the best of five runs, the previous logger runs 1/100 of the messages.
+
+Usage:
+    python cognit/test/benchmark/bench_logger.py [--messages 100000] [--depth 10]
+"""
+
+import sys
+sys.path.append(".")
+
+from cognit.modules._logger import CognitLogger, CognitFormatter, LOG_FORMAT, LOGGER_NAME
+import argparse
+import inspect
+import logging
+import time
+import os
+
+class NullStreamHandler(logging.StreamHandler):
+
+    def __init__(self):
+        super().__init__(open(os.devnull, "w"))
+
+class PreviousCognitLogger(CognitLogger):
+
+    # CognitLogger._log() before the fast path
+    def debug(self, message):
+        frame = inspect.stack()[1]
+        filename = os.path.basename(frame.filename)
+        self.logger.log(logging.DEBUG, f"[{filename}::{frame.lineno}] {message}")
+
+class NoOpLogger(CognitLogger):
+
+    def debug(self, message, *args):
+        pass
+
+def is_connected(logger: CognitLogger, connected: bool, lazy: bool) -> bool:
+
+    # As the conditions of the state machine, evaluated on every event
+    if lazy:
+        logger.debug("Edge Cluster Frontend connected: %s", connected)
+    else:
+        logger.debug("Edge Cluster Frontend connected: " + str(connected))
+
+    return connected
+
+def run_at_depth(depth: int, function, *args):
+
+    if depth > 0:
+        return run_at_depth(depth - 1, function, *args)
+
+    return function(*args)
+
+def bench(logger: CognitLogger, messages: int, lazy: bool) -> float:
+
+    start = time.perf_counter()
+
+    for _ in range(messages):
+        is_connected(logger, True, lazy)
+
+    return (time.perf_counter() - start) / messages
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100000, help="Messages logged in each run")
+    parser.add_argument("--depth", type=int, default=10, help="Frames between the thread entry and the message")
+    args = parser.parse_args()
+
+    # Only the benchmark handler, nothing is written to the console or the log file
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers = []
+    handler = NullStreamHandler()
+    handler.setFormatter(CognitFormatter(LOG_FORMAT))
+    logger.addHandler(handler)
+
+    loggers = {
+        # The floor: the call to debug() and nothing else
+        "no-op debug()": NoOpLogger(),
+        "previous": PreviousCognitLogger(),
+        "fast path, eager message": CognitLogger(),
+        "fast path, lazy arguments": CognitLogger(),
+    }
+
+    print(f"{'logger':<28} {'debug disabled (ns)':>20} {'debug enabled (ns)':>20}")
+
+    for name, cognit_logger in loggers.items():
+
+        lazy = name.endswith("lazy arguments")
+        # The previous logger is about a thousand times slower
+        messages = args.messages // 100 if name == "previous" else args.messages
+        results = []
+
+        for level in [logging.INFO, logging.DEBUG]:
+            logger.setLevel(level)
+            results.append(min(run_at_depth(args.depth, bench, cognit_logger, messages, lazy) for _ in range(5)))
+
+        print(f"{name:<28} {results[0] * 1e9:>20,.0f} {results[1] * 1e9:>20,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""
+In-process stand-ins of the Cognit Frontend and of the Edge Cluster Frontends, for the
+benchmarks that need a whole Device Runtime without a real COGNIT deployment.
+
+The Cognit Frontend answers the authentication, the application requirements, the
+Edge Cluster listing, the DaaS upload and the latency reports. The Edge Cluster
+Frontends run the offloaded functions in-process and answer with their serialized result.
+In the ASYNC mode (mode=async), they answer with the id of the execution instead, and
+its result is served by the status route /v1/faas/{faas_task_uuid}/status.
+
+Every server can inject a fixed latency, a random jitter, errors and, in the Edge
+Cluster Frontends, the cold start of the first execution of each function.
+
+They can also be run as a standalone process, e.g. for the integration tests:
+    python cognit/test/benchmark/stand_in.py [--port 8000] [--ecfs 2] [--ecf-delay 0.01]
+"""
+
+import sys
+sys.path.append(".")
+
+from cognit.modules._faas_parser import FaasParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from threading import Thread, Lock
+import tempfile
+import argparse
+import random
+import uuid
+import socket
+import json
+import time
+import re
+
+EXECUTE_PATH = re.compile(r"^/v1/functions/(\d+)/execute")
+STATUS_PATH = re.compile(r"^/v1/faas/([\w-]+)/status$")
+
+class StandInServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, handler: type, delay: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, port: int = 0, seed: int = None):
+        """
+        Args:
+            handler (type): Request handler class
+            delay (float): Seconds added to every response, to emulate the network round trip
+            jitter (float): Maximum seconds randomly added to or taken from the delay
+            error_rate (float): Fraction of the requests answered with a 500 error
+            port (int): Port to listen on, a free one by default
+            seed (int): Seed of the random jitter and errors, to repeat a run
+        """
+
+        super().__init__(("127.0.0.1", port), handler)
+        self.delay = delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.thread = None
+        self.connections = set()
+
+    @property
+    def address(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+
+        self.thread = Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving and closes the sockets, including the kept alive connections.
+        New connections are refused from now on.
+        """
+
+        self.shutdown()
+        self.server_close()
+
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def get_delay(self) -> float:
+        """
+        Returns the seconds to wait before answering a request
+        """
+
+        if not self.jitter:
+            return self.delay
+
+        return max(0.0, self.delay + self.random.uniform(-self.jitter, self.jitter))
+
+    def is_error(self) -> bool:
+        """
+        Decides if a request is answered with an injected error
+        """
+
+        return self.error_rate > 0 and self.random.random() < self.error_rate
+
+    def process_request(self, request, client_address):
+
+        self.connections.add(request)
+        super().process_request(request, client_address)
+
+    def shutdown_request(self, request):
+
+        self.connections.discard(request)
+        super().shutdown_request(request)
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def do_HEAD(self):
+
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _handle(self, method: str):
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+
+        server = self.server
+        server.requests += 1
+
+        delay = server.get_delay()
+
+        if delay:
+            time.sleep(delay)
+
+        if server.is_error():
+            server.errors += 1
+            status, data = 500, {"detail": "Injected error"}
+        else:
+            status, data = self.route(method, self.path.split("?")[0], body)
+        payload = json.dumps(data).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def route(self, method: str, path: str, body: bytes) -> tuple[int, object]:
+        return 404, {"detail": "Not found"}
+
+    def log_message(self, format, *args):
+        pass
+
+class CognitFrontendHandler(StandInHandler):
+
+    def route(self, method: str, path: str, body: bytes) -> tuple[int, object]:
+
+        server = self.server
+
+        if path == "/v1/authenticate":
+            return 201, "stand-in-token"
+
+        if path == "/v1/app_requirements" and method == "POST":
+            return 200, 1
+
+        if path.startswith("/v1/app_requirements/") and path.endswith("/ec_fe"):
+            return 200, [{"NAME": f"cluster-{i}", "TEMPLATE": {"EDGE_CLUSTER_FRONTEND": address}} for i, address in enumerate(server.ecf_addresses)]
+
+        if path.startswith("/v1/app_requirements/"):
+            return 200, 1
+
+        if path == "/v1/daas/upload":
+            with server.mutex:
+                function = json.loads(body)["FC"]
+                function_id = server.functions.setdefault(function, len(server.functions) + 1)
+                server.uploads += 1
+            server.function_store[function_id] = function
+            return 200, function_id
+
+        if path == "/v1/latency":
+            return 200, True
+
+        return 404, {"detail": "Not found"}
+
+class EdgeClusterFrontendHandler(StandInHandler):
+
+    def route(self, method: str, path: str, body: bytes) -> tuple[int, object]:
+
+        match = STATUS_PATH.match(path)
+
+        if method == "GET" and match is not None:
+            return self.get_status(match.group(1))
+
+        match = EXECUTE_PATH.match(path)
+
+        if method != "POST" or match is None:
+            return 404, {"detail": "Not found"}
+
+        function_id = int(match.group(1))
+        function = self.server.function_store.get(function_id)
+
+        if function is None:
+            return 200, {"ret_code": -1, "res": None, "err": "Function not found"}
+
+        mode = parse_qs(urlsplit(self.path).query).get("mode", ["sync"])[0]
+
+        if mode != "async":
+            return 200, self.run_function(function_id, function, body)
+
+        # The function runs after the answer, its result is given by the status route
+        task_uuid = str(uuid.uuid4())
+
+        with self.server.mutex:
+            self.server.executions[task_uuid] = None
+
+        def run():
+            result = self.run_function(function_id, function, body)
+            with self.server.mutex:
+                self.server.executions[task_uuid] = result
+
+        Thread(target=run, daemon=True).start()
+
+        return 200, {"status": "WORKING", "res": None, "exec_id": {"faas_task_uuid": task_uuid}}
+
+    def get_status(self, task_uuid: str) -> tuple[int, object]:
+
+        with self.server.mutex:
+
+            if task_uuid not in self.server.executions:
+                return 404, {"detail": f"Execution {task_uuid} not found"}
+
+            result = self.server.executions[task_uuid]
+
+        status = "WORKING" if result is None else "READY"
+
+        return 200, {"status": status, "res": result, "exec_id": {"faas_task_uuid": task_uuid}}
+
+    def run_function(self, function_id: int, function: str, body: bytes) -> dict:
+        """
+        Runs an uploaded function with the serialized parameters of an execution request
+
+        Returns:
+            dict: ExecResponse of the execution
+        """
+
+        parser = FaasParser()
+
+        # The first execution of each function pays for its cold start
+        with self.server.mutex:
+            cold = function_id not in self.server.warm_functions
+            self.server.warm_functions.add(function_id)
+
+        if cold and self.server.cold_start:
+            time.sleep(self.server.cold_start)
+
+        params = [parser.deserialize(param) for param in json.loads(body)]
+
+        try:
+            result = parser.deserialize(function)(*params)
+        except Exception as e:
+            return {"ret_code": -1, "res": None, "err": str(e)}
+
+        return {"ret_code": 0, "res": parser.serialize(result), "err": None}
+
+def start_cognit_frontend(delay: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, port: int = 0, seed: int = None) -> StandInServer:
+    """
+    Starts a stand-in of the Cognit Frontend. The Edge Clusters it lists are set in its
+    ecf_addresses attribute. See StandInServer for the arguments.
+    """
+
+    server = StandInServer(CognitFrontendHandler, delay, jitter, error_rate, port, seed)
+    server.ecf_addresses = []
+    server.functions = {}
+    server.function_store = {}
+    server.uploads = 0
+    server.mutex = Lock()
+    return server.start()
+
+def start_edge_cluster_frontend(cognit_frontend: StandInServer, delay: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, cold_start: float = 0.0, port: int = 0, seed: int = None) -> StandInServer:
+    """
+    Starts a stand-in of an Edge Cluster Frontend that runs the functions uploaded to the given
+    Cognit Frontend. The first execution of each function waits cold_start seconds more, see
+    StandInServer for the other arguments.
+    """
+
+    server = StandInServer(EdgeClusterFrontendHandler, delay, jitter, error_rate, port, seed)
+    server.function_store = cognit_frontend.function_store
+    server.cold_start = cold_start
+    server.warm_functions = set()
+    # Results of the executions submitted in ASYNC mode, None while they run
+    server.executions = {}
+    server.mutex = Lock()
+    return server.start()
+
+def write_config(cognit_frontend: StandInServer, **options) -> str:
+    """
+    Writes a Device Runtime configuration file that points to the stand-in Cognit Frontend.
+    The function ID cache is disabled unless given in the options.
+
+    Returns:
+        str: Path of the configuration file
+    """
+
+    config = {
+        "api_endpoint": cognit_frontend.address,
+        "credentials": "user:password",
+        "function_id_cache_path": "",
+    }
+    config.update(options)
+
+    file = tempfile.NamedTemporaryFile("w", suffix=".yml", delete=False)
+
+    with file:
+        for key, value in config.items():
+            file.write(f"{key}: {json.dumps(value)}\n")
+
+    return file.name
+
+REQUIREMENTS = {
+    "FLAVOUR": "Benchmark",
+    "GEOLOCATION": {
+        "latitude": 43.05,
+        "longitude": -2.53
+    }
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8000, help="Port of the Cognit Frontend, the Edge Cluster Frontends take the next ones")
+    parser.add_argument("--ecfs", type=int, default=1, help="Number of Edge Cluster Frontends")
+    parser.add_argument("--cfc-delay", type=float, default=0.0, help="Seconds added to each Cognit Frontend response")
+    parser.add_argument("--ecf-delay", type=float, default=0.0, help="Seconds added to each Edge Cluster Frontend response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum seconds randomly added to or taken from the delays")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of the execution requests answered with a 500 error")
+    parser.add_argument("--cold-start", type=float, default=0.0, help="Seconds added to the first execution of each function")
+    args = parser.parse_args()
+
+    cognit_frontend = start_cognit_frontend(args.cfc_delay, args.jitter, port=args.port)
+    ecfs = [start_edge_cluster_frontend(cognit_frontend, args.ecf_delay, args.jitter, args.error_rate, args.cold_start, port=args.port + 1 + i) for i in range(args.ecfs)]
+    cognit_frontend.ecf_addresses = [ecf.address for ecf in ecfs]
+
+    print(f"Cognit Frontend at {cognit_frontend.address}")
+
+    for ecf in ecfs:
+        print(f"Edge Cluster Frontend at {ecf.address}")
+
+    try:
+        cognit_frontend.thread.join()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
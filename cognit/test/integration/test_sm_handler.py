@@ -1,4 +1,3 @@
-from cognit.modules._sync_result_queue import SyncResultQueue
 from cognit.models._cognit_frontend_client import Scheduling
 from cognit.modules._cognitconfig import CognitConfig
 from cognit.modules._sm_handler import StateMachineHandler
@@ -36,10 +35,9 @@ def sm_handler() -> StateMachineHandler:
     cognit_config = CognitConfig(COGNIT_CONFIG_PATH)
     requirements = Scheduling(**REQS_INIT)  
     call_queue = CallQueue()
-    sync_result_queue = SyncResultQueue()
 
     # Init SMHandler
-    return StateMachineHandler(cognit_config, requirements, call_queue, sync_result_queue)
+    return StateMachineHandler(cognit_config, requirements, call_queue)
 
 
 @pytest.fixture
@@ -49,10 +47,9 @@ def sm_handler_bad_config() -> StateMachineHandler:
     cognit_config = CognitConfig(BAD_COGNIT_CONFIG_PATH)
     requirements = Scheduling(**REQS_INIT)  
     call_queue = CallQueue()
-    sync_result_queue = SyncResultQueue()
 
     # Init SMHandler
-    return StateMachineHandler(cognit_config, requirements, call_queue, sync_result_queue)
+    return StateMachineHandler(cognit_config, requirements, call_queue)
 
 # INIT -> SEND_INIT_REQUEST -> GET_ECF_ADDRESS -> READY
 
@@ -163,13 +160,16 @@ def test_sm_handler_get_ecf_address_ecf_not_connected(
     assert sm_handler.sm.current_state.id == "send_init_request"
     sm_handler.evaluate_conditions()
     assert sm_handler.sm.current_state.id == "get_ecf_address"
-    sm_handler.sm.ecf.set_has_connection(False)
+    for ecf in sm_handler.sm.balancer.get_clients():
+        ecf.set_has_connection(False)
     sm_handler.evaluate_conditions()
     assert sm_handler.sm.current_state.id == "get_ecf_address"
-    sm_handler.sm.ecf.set_has_connection(False)
+    for ecf in sm_handler.sm.balancer.get_clients():
+        ecf.set_has_connection(False)
     sm_handler.evaluate_conditions()
     assert sm_handler.sm.current_state.id == "get_ecf_address"
-    sm_handler.sm.ecf.set_has_connection(False)
+    for ecf in sm_handler.sm.balancer.get_clients():
+        ecf.set_has_connection(False)
     sm_handler.evaluate_conditions()
     assert sm_handler.sm.current_state.id == "init"
     
@@ -228,7 +228,7 @@ def test_sm_handler_ready_new_requirements(
     sm_handler.evaluate_conditions()
     assert sm_handler.sm.current_state.id == "ready"    
 
-# INIT -> SEND_INIT_REQUEST -> GET_ECF_ADDRESS -> READY -> INIT (ECF not connected)
+# INIT -> SEND_INIT_REQUEST -> GET_ECF_ADDRESS -> READY -> GET_ECF_ADDRESS (ECF not connected)
 
 def test_sm_handler_get_ecf_address_reconnect(
     sm_handler: StateMachineHandler,
@@ -241,9 +241,11 @@ def test_sm_handler_get_ecf_address_reconnect(
     assert sm_handler.sm.current_state.id == "get_ecf_address"
     sm_handler.evaluate_conditions()
     assert sm_handler.sm.current_state.id == "ready"
-    sm_handler.sm.ecf.set_has_connection(False)
+    for ecf in sm_handler.sm.balancer.get_clients():
+        ecf.set_has_connection(False)
     sm_handler.evaluate_conditions()
-    assert sm_handler.sm.current_state.id == "init"   
+    # The ECFs are obtained again with the same token
+    assert sm_handler.sm.current_state.id == "get_ecf_address"
 
 # INIT -> SEND_INIT_REQUEST -> GET_ECF_ADDRESS -> READY -> INIT (CFC not connected)
 
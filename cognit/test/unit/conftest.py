@@ -0,0 +1,20 @@
+from cognit.modules import _function_id_cache
+from cognit.modules._tls_verification import tls_verification_cache
+import pytest
+
+@pytest.fixture(autouse=True)
+def function_id_cache_path(tmp_path, monkeypatch) -> str:
+
+    # Keep the function IDs of every test in its own file instead of the home directory
+    path = str(tmp_path / "function_ids.json")
+    monkeypatch.setattr("cognit.modules._cognitconfig.DEFAULT_FUNCTION_ID_CACHE_PATH", path)
+    monkeypatch.setattr(_function_id_cache, "_caches", {})
+
+    return path
+
+@pytest.fixture(autouse=True)
+def clear_tls_verification_cache():
+
+    # Hosts that failed the TLS verification in a test must not affect the next ones
+    yield
+    tls_verification_cache.clear()
@@ -0,0 +1,174 @@
+from cognit.models._edge_cluster_frontend_client import ExecReturnCode
+from cognit.modules._async_edge_cluster_frontend_client import AsyncEdgeClusterFrontendClient
+from cognit.modules._edge_cluster_frontend_client import DEFAULT_EXECUTION_TIMEOUT
+from cognit.modules._function_registry import FunctionRegistry
+from cognit.async_device_runtime import AsyncDeviceRuntime
+from cognit.modules._faas_parser import FaasParser
+
+from pytest_mock import MockerFixture
+from types import SimpleNamespace
+import threading
+import asyncio
+import pytest
+import httpx
+import json
+
+COGNIT_CONFIG_PATH = "cognit/test/config/cognit_v2.yml"
+
+REQS_INIT = {
+    "FLAVOUR": "EnergyV2",
+    "GEOLOCATION": {
+        "latitude": 43.05,
+        "longitude": -2.53
+    }
+}
+
+ECF_ADDRESS = "https://ecf.test"
+
+def sum(a: int, b: int):
+    return a + b
+
+class FakeCognit:
+    """
+    Answers the Cognit Frontend and Edge Cluster Frontend requests
+    """
+
+    def __init__(self, execution_delay: float = 0):
+        self.parser = FaasParser()
+        self.execution_delay = execution_delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+
+        self.requests.append(request.url.path)
+        path = request.url.path
+
+        if path == "/v1/authenticate":
+            return httpx.Response(201, json="JWT_token")
+        if path == "/v1/app_requirements":
+            return httpx.Response(200, json=4123)
+        if path == "/v1/app_requirements/4123/ec_fe":
+            return httpx.Response(200, json=[{"NAME": "cluster", "TEMPLATE": {"EDGE_CLUSTER_FRONTEND": ECF_ADDRESS}}])
+        if path == "/v1/daas/upload":
+            await asyncio.sleep(self.execution_delay)
+            return httpx.Response(200, json=4079)
+        if path == "/v1/functions/4079/execute":
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(self.execution_delay)
+            self.in_flight -= 1
+            params = [self.parser.deserialize(param) for param in json.loads(request.content)]
+            return httpx.Response(200, json={"ret_code": 0, "res": self.parser.serialize(params[0] + params[1]), "err": None})
+
+        return httpx.Response(404, json={"detail": "Not found"})
+
+@pytest.fixture
+def fake_cognit(mocker: MockerFixture) -> FakeCognit:
+
+    fake = FakeCognit(execution_delay=0.1)
+
+    def create_http_client(self, limits, verify):
+        return httpx.AsyncClient(transport=httpx.MockTransport(fake.handle))
+
+    mocker.patch("cognit.async_device_runtime.AsyncDeviceRuntime._create_http_client", create_http_client)
+    return fake
+
+def test_async_call(fake_cognit: FakeCognit):
+
+    async def main():
+        async with AsyncDeviceRuntime(COGNIT_CONFIG_PATH) as runtime:
+            assert await runtime.init(REQS_INIT) is True
+            return await runtime.call(sum, 2, 3)
+
+    result = asyncio.run(main())
+
+    # Assertions
+    assert result.ret_code == ExecReturnCode.SUCCESS
+    assert result.res == 5
+    assert fake_cognit.requests[:3] == ["/v1/authenticate", "/v1/app_requirements", "/v1/app_requirements/4123/ec_fe"]
+
+def test_async_submit_keeps_many_calls_in_flight(fake_cognit: FakeCognit):
+
+    async def main():
+        async with AsyncDeviceRuntime(COGNIT_CONFIG_PATH, max_in_flight=50) as runtime:
+            await runtime.init(REQS_INIT)
+            tasks = [runtime.submit(sum, i, i) for i in range(50)]
+            return await asyncio.gather(*tasks)
+
+    results = asyncio.run(main())
+
+    # Assertions
+    assert [result.res for result in results] == [i + i for i in range(50)]
+    assert fake_cognit.max_in_flight == 50
+    # The function is uploaded only once
+    assert fake_cognit.requests.count("/v1/daas/upload") == 1
+
+def test_async_call_timeout(fake_cognit: FakeCognit):
+
+    fake_cognit.execution_delay = 5
+
+    async def main():
+        async with AsyncDeviceRuntime(COGNIT_CONFIG_PATH) as runtime:
+            await runtime.init(REQS_INIT)
+            return await runtime.call(sum, 2, 3, timeout=0.1)
+
+    result = asyncio.run(main())
+
+    # Assertions
+    assert result.ret_code == ExecReturnCode.ERROR
+    assert "Timeout" in result.err
+
+def test_async_call_serializes_out_of_the_event_loop(mocker: MockerFixture, fake_cognit: FakeCognit):
+
+    threads = {}
+
+    # The fake servers (de)serialize on the event loop, keep them out of the record
+    parser = FaasParser()
+    fake_cognit.parser = SimpleNamespace(serialize=parser.serialize, deserialize=parser.deserialize)
+
+    def record(name, method):
+        def wrapper(*args, **kwargs):
+            threads.setdefault(name, set()).add(threading.current_thread())
+            return method(*args, **kwargs)
+        return wrapper
+
+    mocker.patch.object(FaasParser, "serialize", record("serialize", FaasParser.serialize))
+    mocker.patch.object(FaasParser, "deserialize", record("deserialize", FaasParser.deserialize))
+    mocker.patch.object(FunctionRegistry, "get_entry", record("get_entry", FunctionRegistry.get_entry))
+
+    async def main():
+        async with AsyncDeviceRuntime(COGNIT_CONFIG_PATH) as runtime:
+            await runtime.init(REQS_INIT)
+            return await runtime.call(sum, 2, 3), threading.current_thread()
+
+    result, loop_thread = asyncio.run(main())
+
+    # Fingerprint, function and parameters serialization and result deserialization
+    assert result.res == 5
+    assert set(threads) == {"serialize", "deserialize", "get_entry"}
+    assert all(loop_thread not in used for used in threads.values())
+
+def test_async_call_without_timeout_has_a_finite_request_timeout(mocker: MockerFixture, fake_cognit: FakeCognit):
+
+    execute = mocker.spy(AsyncEdgeClusterFrontendClient, "execute_function")
+
+    async def main():
+        async with AsyncDeviceRuntime(COGNIT_CONFIG_PATH) as runtime:
+            await runtime.init(REQS_INIT)
+            await runtime.call(sum, 2, 3)
+            await runtime.call(sum, 2, 3, timeout=7)
+
+    asyncio.run(main())
+
+    # Assertions
+    assert [call.kwargs["timeout"] for call in execute.call_args_list] == [DEFAULT_EXECUTION_TIMEOUT, 7]
+
+def test_async_call_not_running():
+
+    runtime = AsyncDeviceRuntime(COGNIT_CONFIG_PATH)
+    result = asyncio.run(runtime.call(sum, 2, 3))
+
+    # Assertions
+    assert result.ret_code == ExecReturnCode.ERROR
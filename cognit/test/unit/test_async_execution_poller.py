@@ -0,0 +1,182 @@
+from cognit.models._edge_cluster_frontend_client import AsyncExecResponse, AsyncExecStatus, AsyncExecId, ExecResponse, ExecReturnCode
+from cognit.models._device_runtime import Call, ExecutionMode, FunctionLanguage
+from cognit.modules._async_execution_poller import AsyncExecutionPoller
+
+from pytest_mock import MockerFixture
+from threading import Event, Barrier
+import pytest
+import time
+
+def sum(a: int, b: int):
+    return a + b
+
+@pytest.fixture
+def call() -> Call:
+    return Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.ASYNC, params=[2, 3])
+
+def test_poller_delivers_result_when_ready(mocker: MockerFixture, call: Call):
+
+    exec_id = AsyncExecId(faas_task_uuid="1234-abcd")
+    result = ExecResponse(ret_code=ExecReturnCode.SUCCESS, res="5")
+
+    # Working twice, then ready
+    ecf = mocker.Mock()
+    ecf.get_async_execution_status.side_effect = [
+        AsyncExecResponse(status=AsyncExecStatus.WORKING, res=None, exec_id=exec_id),
+        AsyncExecResponse(status=AsyncExecStatus.WORKING, res=None, exec_id=exec_id),
+        AsyncExecResponse(status=AsyncExecStatus.READY, res=result, exec_id=exec_id),
+    ]
+
+    delivered = []
+    finished = Event()
+
+    def on_result(call, result):
+        delivered.append((call, result))
+        finished.set()
+
+    poller = AsyncExecutionPoller(on_result, poll_interval=0.01)
+    poller.start()
+    poller.add(ecf, exec_id, call)
+
+    assert finished.wait(5) is True
+    poller.stop()
+
+    # Assertions
+    assert delivered == [(call, result)]
+    assert ecf.get_async_execution_status.call_count == 3
+    assert len(poller) == 0
+
+def test_poller_gives_up_after_errors(mocker: MockerFixture, call: Call):
+
+    exec_id = AsyncExecId(faas_task_uuid="1234-abcd")
+
+    ecf = mocker.Mock()
+    ecf.get_async_execution_status.side_effect = Exception("Connection refused")
+
+    delivered = []
+    finished = Event()
+
+    def on_result(call, result):
+        delivered.append(result)
+        finished.set()
+
+    poller = AsyncExecutionPoller(on_result, poll_interval=0.01)
+    poller.start()
+    poller.add(ecf, exec_id, call)
+
+    assert finished.wait(5) is True
+    poller.stop()
+
+    # Assertions
+    assert delivered[0].ret_code == ExecReturnCode.ERROR
+    assert ecf.get_async_execution_status.call_count == 3
+
+def test_poller_failed_execution(mocker: MockerFixture, call: Call):
+
+    exec_id = AsyncExecId(faas_task_uuid="1234-abcd")
+
+    ecf = mocker.Mock()
+    ecf.get_async_execution_status.return_value = AsyncExecResponse(status=AsyncExecStatus.FAILED, res=None, exec_id=exec_id)
+
+    delivered = []
+    finished = Event()
+
+    def on_result(call, result):
+        delivered.append(result)
+        finished.set()
+
+    poller = AsyncExecutionPoller(on_result, poll_interval=0.01)
+    poller.start()
+    poller.add(ecf, exec_id, call)
+
+    assert finished.wait(5) is True
+    poller.stop()
+
+    # Assertions
+    assert delivered[0].ret_code == ExecReturnCode.ERROR
+
+def test_poller_stop_completes_outstanding_calls(mocker: MockerFixture, call: Call):
+
+    exec_id = AsyncExecId(faas_task_uuid="1234-abcd")
+
+    ecf = mocker.Mock()
+    ecf.get_async_execution_status.return_value = AsyncExecResponse(status=AsyncExecStatus.WORKING, res=None, exec_id=exec_id)
+
+    delivered = []
+
+    poller = AsyncExecutionPoller(lambda call, result: delivered.append(result), poll_interval=0.01)
+    poller.start()
+    poller.add(ecf, exec_id, call)
+    poller.stop()
+
+    # The caller gets an error instead of waiting forever
+    assert len(delivered) == 1
+    assert delivered[0].ret_code == ExecReturnCode.ERROR
+    assert "stopped" in delivered[0].err
+    assert len(poller) == 0
+
+def test_poller_applies_the_deadline_of_the_call(mocker: MockerFixture):
+
+    exec_id = AsyncExecId(faas_task_uuid="1234-abcd")
+    call = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.ASYNC, params=[2, 3], timeout=0.1, deadline=time.monotonic() + 0.1)
+
+    # The execution never finishes
+    ecf = mocker.Mock()
+    ecf.get_async_execution_status.return_value = AsyncExecResponse(status=AsyncExecStatus.WORKING, res=None, exec_id=exec_id)
+
+    delivered = []
+    finished = Event()
+
+    def on_result(call, result):
+        delivered.append(result)
+        finished.set()
+
+    poller = AsyncExecutionPoller(on_result, poll_interval=0.01)
+    poller.start()
+    poller.add(ecf, exec_id, call)
+
+    assert finished.wait(5) is True
+    poller.stop()
+
+    # Assertions
+    assert delivered[0].ret_code == ExecReturnCode.ERROR
+    assert "Timeout" in delivered[0].err
+    # No status request outlives the deadline
+    assert all(args.args[1] <= 0.1 for args in ecf.get_async_execution_status.call_args_list)
+
+def test_poller_sends_status_requests_concurrently(mocker: MockerFixture):
+
+    tasks = 8
+    barrier = Barrier(tasks, timeout=5)
+
+    def get_status(exec_id, timeout):
+        # Only returns once every request of the sweep is in flight
+        barrier.wait()
+        return AsyncExecResponse(status=AsyncExecStatus.READY, res=ExecResponse(res="5"), exec_id=exec_id)
+
+    ecf = mocker.Mock()
+    ecf.get_async_execution_status.side_effect = get_status
+
+    delivered = []
+    finished = Event()
+
+    def on_result(call, result):
+        delivered.append(result)
+        if len(delivered) == tasks:
+            finished.set()
+
+    poller = AsyncExecutionPoller(on_result, poll_interval=0.01, concurrency=tasks)
+
+    # All of them are in the first sweep
+    for i in range(tasks):
+        call = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.ASYNC, params=[2, 3])
+        poller.add(ecf, AsyncExecId(faas_task_uuid=f"task-{i}"), call)
+
+    poller.start()
+
+    assert finished.wait(5) is True
+    poller.stop()
+
+    # Assertions
+    assert all(result.res == "5" for result in delivered)
+    assert ecf.get_async_execution_status.call_count == tasks
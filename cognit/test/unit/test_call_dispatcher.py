@@ -0,0 +1,150 @@
+from cognit.models._edge_cluster_frontend_client import ExecReturnCode
+from cognit.models._device_runtime import Call, ExecutionMode, FunctionLanguage
+from cognit.modules._call_dispatcher import CallDispatcher
+from cognit.modules._call_queue import CallQueue
+
+from threading import Event, Lock
+import pytest
+import time
+
+def sum(a: int, b: int):
+    return a + b
+
+def make_call(a: int, b: int) -> Call:
+    return Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.ASYNC, params=[a, b])
+
+@pytest.fixture
+def call_queue() -> CallQueue:
+    return CallQueue(10)
+
+def test_dispatcher_executes_calls_concurrently(call_queue: CallQueue):
+
+    release = Event()
+    mutex = Lock()
+    running = []
+    max_running = 0
+
+    def execute(call: Call):
+        nonlocal max_running
+        with mutex:
+            running.append(call)
+            max_running = max(max_running, len(running))
+        release.wait(5)
+        with mutex:
+            running.remove(call)
+
+    dispatcher = CallDispatcher(call_queue, execute, pool_size=3)
+    dispatcher.start()
+    dispatcher.resume()
+
+    for i in range(3):
+        call_queue.add_call(make_call(i, i))
+
+    # The three calls are in flight at the same time
+    deadline = time.monotonic() + 5
+    while dispatcher.get_in_flight() < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert dispatcher.get_in_flight() == 3
+
+    release.set()
+    dispatcher.stop()
+
+    assert max_running == 3
+    assert dispatcher.get_in_flight() == 0
+    assert len(call_queue) == 0
+
+def test_dispatcher_paused_does_not_take_calls(call_queue: CallQueue):
+
+    executed = []
+
+    dispatcher = CallDispatcher(call_queue, executed.append, pool_size=2)
+    dispatcher.start()
+
+    call = make_call(2, 2)
+    call_queue.add_call(call)
+    time.sleep(0.05)
+
+    # Not ready yet, the call stays in the queue
+    assert executed == []
+    assert len(call_queue) == 1
+
+    dispatcher.resume()
+
+    deadline = time.monotonic() + 5
+    while not executed and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    dispatcher.stop()
+
+    assert executed == [call]
+
+def test_dispatcher_survives_execution_errors(call_queue: CallQueue):
+
+    executed = []
+
+    def execute(call: Call):
+        executed.append(call)
+        raise Exception("Request error")
+
+    dispatcher = CallDispatcher(call_queue, execute, pool_size=1)
+    dispatcher.start()
+    dispatcher.resume()
+
+    call_queue.add_call(make_call(1, 1))
+    call_queue.add_call(make_call(2, 2))
+
+    deadline = time.monotonic() + 5
+    while len(executed) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    dispatcher.stop()
+
+    assert len(executed) == 2
+
+def test_dispatcher_resolves_the_future_of_failed_calls(call_queue: CallQueue):
+
+    def execute(call: Call):
+        call.future.set_running_or_notify_cancel()
+        raise RecursionError("maximum recursion depth exceeded")
+
+    dispatcher = CallDispatcher(call_queue, execute, pool_size=1)
+    dispatcher.start()
+    dispatcher.resume()
+
+    call = make_call(1, 1)
+    call_queue.add_call(call)
+
+    result = call.future.result(timeout=5)
+    dispatcher.stop()
+
+    # Assertions
+    assert result.ret_code == ExecReturnCode.ERROR
+    assert "maximum recursion depth" in result.err
+
+def test_dispatcher_stop_and_restart(call_queue: CallQueue):
+
+    executed = []
+
+    dispatcher = CallDispatcher(call_queue, executed.append, pool_size=4)
+
+    # Workers racing with stop() must not miss it
+    for _ in range(20):
+        dispatcher.start()
+        dispatcher.resume()
+        dispatcher.stop()
+
+    dispatcher.start()
+    dispatcher.resume()
+
+    call = make_call(1, 1)
+    call_queue.add_call(call)
+
+    deadline = time.monotonic() + 5
+    while not executed and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    dispatcher.stop()
+
+    # Assertions
+    assert executed == [call]
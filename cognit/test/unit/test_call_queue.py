@@ -1,7 +1,9 @@
 from cognit.models._device_runtime import Call, ExecutionMode, FunctionLanguage
 from cognit.modules._call_queue import CallQueue
 
+from threading import Thread, Timer
 import pytest
+import time
 
 @pytest.fixture
 def call_queue() -> CallQueue:
@@ -76,3 +78,67 @@ def test_call_queue_full(call_queue: CallQueue):
     assert call_queue.get_call() == call5
     assert call_queue.get_call() == None
 
+
+def test_call_queue_blocking_get_call(call_queue: CallQueue):
+
+    call = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=dummy_callback, mode=ExecutionMode.SYNC, params=[2, 2])
+
+    # The call is added while the consumer is waiting
+    timer = Timer(0.05, call_queue.add_call, args=[call])
+    timer.start()
+
+    assert call_queue.get_call(timeout=5) == call
+    timer.join()
+
+def test_call_queue_get_call_timeout(call_queue: CallQueue):
+
+    start = time.monotonic()
+
+    assert call_queue.get_call(timeout=0.05) == None
+    assert time.monotonic() - start >= 0.05
+
+def test_call_queue_get_many(call_queue: CallQueue):
+
+    calls = [Call(function=sum, fc_lang=FunctionLanguage.PY, callback=dummy_callback, mode=ExecutionMode.SYNC, params=[i, i]) for i in range(5)]
+
+    for call in calls:
+        assert call_queue.add_call(call) == True
+
+    # Drain the queue in FIFO order
+    assert call_queue.get_many(3) == calls[:3]
+    assert call_queue.get_many(3) == calls[3:]
+    assert call_queue.get_many(3) == []
+    assert len(call_queue) == 0
+
+def test_call_queue_close(call_queue: CallQueue):
+
+    results = []
+    consumer = Thread(target=lambda: results.append(call_queue.get_call(timeout=None)))
+    consumer.start()
+
+    # Give the consumer time to block
+    time.sleep(0.05)
+    call_queue.close()
+    consumer.join(5)
+
+    assert consumer.is_alive() == False
+    assert results == [None]
+
+    # Consumers arriving after close() do not block either
+    assert call_queue.get_call(timeout=None) is None
+
+    call_queue.open()
+    call_queue.add_call("call")
+    assert call_queue.get_call(timeout=None) == "call"
+
+def test_call_queue_rejects_calls_while_closed(call_queue: CallQueue):
+
+    call_queue.add_call("queued")
+    call_queue.close()
+
+    # Nobody would take them
+    assert call_queue.add_call("late") is False
+
+    # The calls left are still handed out to be failed
+    assert call_queue.drain() == ["queued"]
+    assert len(call_queue) == 0
@@ -0,0 +1,87 @@
+from cognit.modules._call_timings import CallStats, PhaseHistogram, get_function_name
+from cognit.models._call_timings import CallTimings, QUEUE_WAIT, EXECUTE, TOTAL
+
+import pytest
+import time
+
+def add(a: int, b: int):
+    return a + b
+
+def test_timings_add_up_repeated_phases():
+
+    timings = CallTimings()
+    start = timings.created_at
+
+    timings.record(QUEUE_WAIT, start, start + 0.002)
+    # The execution is retried in another Edge Cluster
+    timings.record(EXECUTE, start + 0.002, start + 0.012)
+    timings.record(EXECUTE, start + 0.012, start + 0.017)
+
+    durations = timings.get_durations()
+
+    # Assertions
+    assert durations[QUEUE_WAIT] == pytest.approx(2)
+    assert durations[EXECUTE] == pytest.approx(15)
+    assert TOTAL not in durations
+
+    timings.finish()
+
+    assert timings.get_durations()[TOTAL] >= 0
+
+def test_histogram_percentiles():
+
+    histogram = PhaseHistogram()
+
+    for duration in range(1, 101):
+        histogram.add(float(duration))
+
+    # Assertions
+    assert histogram.count == 100
+    assert histogram.get_summary()["mean"] == pytest.approx(50.5)
+    assert histogram.get_summary()["max"] == 100
+    # Estimated within the bucket of the percentile
+    assert 25 <= histogram.get_percentile(50) <= 50
+    assert 50 <= histogram.get_percentile(95) <= 100
+    assert histogram.get_percentile(100) == 100
+    assert PhaseHistogram().get_percentile(50) is None
+
+def test_histogram_above_last_bucket():
+
+    histogram = PhaseHistogram(buckets=(1, 10))
+
+    histogram.add(500)
+    histogram.add(1000)
+
+    # Assertions
+    assert histogram.counts == [0, 0, 2]
+    assert 10 <= histogram.get_percentile(50) <= 1000
+    assert histogram.get_percentile(99) <= 1000
+
+def test_stats_per_function_and_phase():
+
+    stats = CallStats()
+
+    for _ in range(3):
+        timings = CallTimings()
+        timings.record(QUEUE_WAIT, time.monotonic())
+        timings.record(EXECUTE, time.monotonic())
+        timings.finish()
+        stats.add(add, timings)
+
+    stats.add(sum, CallTimings())
+
+    result = stats.get_stats()
+    name = get_function_name(add)
+
+    # Assertions
+    assert name == f"{__name__}.add"
+    assert list(result[name]) == [QUEUE_WAIT, EXECUTE, TOTAL]
+    assert result[name][EXECUTE]["count"] == 3
+    assert result["builtins.sum"] == {}
+
+    # The copies are not changed by the calls that finish later
+    histograms = stats.get_histograms()
+    stats.add(add, timings)
+
+    assert histograms[name][TOTAL].count == 3
+    assert stats.get_stats()[name][TOTAL]["count"] == 4
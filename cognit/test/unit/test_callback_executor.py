@@ -0,0 +1,96 @@
+from cognit.modules._callback_executor import CallbackExecutor
+from threading import Event, Lock
+import time
+
+def test_callbacks_run_in_parallel():
+
+    executor = CallbackExecutor(pool_size=4)
+    executor.start()
+
+    release = Event()
+    started = []
+    lock = Lock()
+
+    def callback(i):
+        with lock:
+            started.append(i)
+        release.wait(5)
+
+    for i in range(4):
+        executor.submit(callback, i)
+
+    # All the callbacks start although none of them has finished
+    deadline = time.monotonic() + 5
+    while len(started) < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert sorted(started) == [0, 1, 2, 3]
+
+    release.set()
+    assert executor.wait_idle(5) is True
+    executor.stop()
+
+def test_callbacks_with_same_key_keep_order():
+
+    executor = CallbackExecutor(pool_size=4)
+    executor.start()
+
+    results = []
+
+    def callback(i):
+        # The first callbacks are the slowest ones
+        time.sleep(0.01 * (10 - i))
+        results.append(i)
+
+    for i in range(10):
+        executor.submit(callback, i, key="sensor")
+
+    assert executor.wait_idle(5) is True
+    executor.stop()
+
+    assert results == list(range(10))
+
+def test_failed_callback_does_not_stop_the_pool():
+
+    executor = CallbackExecutor(pool_size=1)
+    executor.start()
+
+    results = []
+
+    def failing(i):
+        raise ValueError("Callback error")
+
+    executor.submit(failing, 0)
+    executor.submit(results.append, 1)
+
+    assert executor.wait_idle(5) is True
+    executor.stop()
+
+    metrics = executor.get_metrics()
+
+    assert results == [1]
+    assert metrics["completed"] == 2
+    assert metrics["failed"] == 1
+    assert metrics["queue_depth"] == 0
+
+def test_metrics_and_stop_runs_pending_callbacks():
+
+    executor = CallbackExecutor(pool_size=1)
+
+    results = []
+
+    # Submitted before the workers exist
+    for i in range(3):
+        executor.submit(results.append, i)
+
+    assert executor.get_metrics()["queue_depth"] == 3
+
+    executor.start()
+    executor.stop()
+
+    metrics = executor.get_metrics()
+
+    assert results == [0, 1, 2]
+    assert metrics["max_queue_depth"] == 3
+    assert metrics["completed"] == 3
+    assert metrics["total_callback_time"] >= 0
@@ -1,10 +1,12 @@
 from cognit.modules._cognit_frontend_client import CognitFrontendClient
 from cognit.models._cognit_frontend_client import Scheduling
 from cognit.modules._cognitconfig import CognitConfig
+from cognit.modules._function_registry import fingerprint_function
+from cognit.modules._faas_parser import FaasParser
 
 from pytest_mock import MockerFixture
-import hashlib
 import pytest
+import requests as req
 
 COGNIT_CONFIG_PATH = "cognit/test/config/cognit_v2.yml"
 BAD_COGNIT_CONFIG_PATH = "cognit/test/config/cognit_v2_wrong_user.yml"
@@ -113,7 +115,7 @@ def cognit_client(cognit_config: CognitConfig, mocker: MockerFixture) -> CognitF
     mock_response.status_code = TEST_CFE_RESPONSES["authenticate"]["status_code"]
     mock_response.json.return_value = TEST_CFE_RESPONSES["authenticate"]["body"]
 
-    mocker.patch("requests.post", return_value=mock_response)
+    mocker.patch("requests.Session.post", return_value=mock_response)
 
     cfc._authenticate()
 
@@ -121,7 +123,7 @@ def cognit_client(cognit_config: CognitConfig, mocker: MockerFixture) -> CognitF
     mock_response.status_code = TEST_CFE_RESPONSES["req_init_upload"]["status_code"]
     mock_response.json.return_value = TEST_CFE_RESPONSES["req_init_upload"]["body"]
 
-    mocker.patch("requests.post", return_value=mock_response)
+    mocker.patch("requests.Session.post", return_value=mock_response)
 
     cfc.init(Scheduling(**TEST_REQS_INIT))
 
@@ -136,7 +138,7 @@ def cognit_client_max_latency(cognit_config: CognitConfig, mocker: MockerFixture
     mock_response.status_code = TEST_CFE_RESPONSES["authenticate"]["status_code"]
     mock_response.json.return_value = TEST_CFE_RESPONSES["authenticate"]["body"]
 
-    mocker.patch("requests.post", return_value=mock_response)
+    mocker.patch("requests.Session.post", return_value=mock_response)
 
     cfc._authenticate()
 
@@ -144,7 +146,7 @@ def cognit_client_max_latency(cognit_config: CognitConfig, mocker: MockerFixture
     mock_response.status_code = TEST_CFE_RESPONSES["req_init_upload"]["status_code"]
     mock_response.json.return_value = TEST_CFE_RESPONSES["req_init_upload"]["body"]
 
-    mocker.patch("requests.post", return_value=mock_response)
+    mocker.patch("requests.Session.post", return_value=mock_response)
 
     cfc.init(Scheduling(**TEST_REQS_INIT_MAX_LATENCY))
 
@@ -164,13 +166,31 @@ def test_authenticate(cognit_config: CognitConfig, mocker: MockerFixture):
     mock_response.status_code = TEST_CFE_RESPONSES["authenticate"]["status_code"]
     mock_response.json.return_value = TEST_CFE_RESPONSES["authenticate"]["body"]
 
-    mocker.patch("requests.post", return_value=mock_response)
+    mocker.patch("requests.Session.post", return_value=mock_response)
 
     token = cfc._authenticate()
 
     assert cfc.get_has_connection() is True
     assert token is "JWT_token"
 
+# A failed refresh keeps the current token and connection
+def test_refresh_token(cognit_client: CognitFrontendClient, mocker: MockerFixture):
+
+    mocker.patch("requests.Session.post", side_effect=req.exceptions.ConnectionError("unreachable"))
+
+    assert cognit_client.refresh_token() is None
+    assert cognit_client.token == "JWT_token"
+    assert cognit_client.get_has_connection() is True
+
+    mock_response = mocker.Mock()
+    mock_response.status_code = 201
+    mock_response.json.return_value = "new_JWT_token"
+
+    mocker.patch("requests.Session.post", return_value=mock_response)
+
+    assert cognit_client.refresh_token() == "new_JWT_token"
+    assert cognit_client.token == "new_JWT_token"
+
 # Test init method
 def test_init_cfc(cognit_config: CognitConfig, mocker: MockerFixture):
 
@@ -185,7 +205,7 @@ def test_init_cfc(cognit_config: CognitConfig, mocker: MockerFixture):
     mock_response.status_code = TEST_CFE_RESPONSES["authenticate"]["status_code"]
     mock_response.json.return_value = TEST_CFE_RESPONSES["authenticate"]["body"]
 
-    mocker.patch("requests.post", return_value=mock_response)
+    mocker.patch("requests.Session.post", return_value=mock_response)
 
     token = cfc._authenticate()
 
@@ -196,7 +216,7 @@ def test_init_cfc(cognit_config: CognitConfig, mocker: MockerFixture):
     mock_response.status_code = TEST_CFE_RESPONSES["req_init_upload"]["status_code"]
     mock_response.json.return_value = TEST_CFE_RESPONSES["req_init_upload"]["body"]
 
-    mocker.patch("requests.post", return_value=mock_response)
+    mocker.patch("requests.Session.post", return_value=mock_response)
 
     has_initialized = cfc.init(Scheduling(**TEST_REQS_INIT))
 
@@ -211,7 +231,7 @@ def test_get_edge_cluster_address_no_max_latency(cognit_client: CognitFrontendCl
     mock_response.status_code = TEST_CFE_RESPONSES["ecf_address"]["status_code"]
     mock_response.json.return_value = TEST_CFE_RESPONSES["ecf_address"]["body"]
 
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch("requests.Session.get", return_value=mock_response)
 
     address = cognit_client._get_edge_cluster_address()
 
@@ -224,7 +244,7 @@ def test_get_edge_cluster_address_with_max_latency(cognit_client_max_latency: Co
     mock_response.status_code = TEST_CFE_RESPONSES["ecf_address"]["status_code"]
     mock_response.json.return_value = TEST_CFE_RESPONSES["ecf_address"]["body"]
 
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch("requests.Session.get", return_value=mock_response)
 
     mocker.patch("cognit.modules._latency_calculator.LatencyCalculator.get_latency_for_clusters", return_value=TEST_CFE_RESPONSES["latency_address"]["result"])
 
@@ -233,29 +253,66 @@ def test_get_edge_cluster_address_with_max_latency(cognit_client_max_latency: Co
     assert address == "https://saturnocity.com/preprod/cognit-frontend/"
     assert cognit_client_max_latency.get_has_connection() is True
 
+    # The clusters that meet MAX_LATENCY (25) are kept, fastest first
+    assert cognit_client_max_latency.available_ecfs == ["https://saturnocity.com/preprod/cognit-frontend/", "https://nature4hivemind.ddns.info"]
+
 def test_upload_function_to_daas(cognit_client: CognitFrontendClient, mocker: MockerFixture, test_func: callable):
 
     mock_response = mocker.Mock()
     mock_response.status_code = TEST_CFE_RESPONSES["fun_upload"]["status_code"]
     mock_response.json.return_value = TEST_CFE_RESPONSES["fun_upload"]["body"]
 
-    mocker.patch("requests.post", return_value=mock_response)
+    mocker.patch("requests.Session.post", return_value=mock_response)
 
     function_id = cognit_client.upload_function_to_daas(test_func)
 
-    hash_func = hashlib.sha256(test_func.__code__.co_code).hexdigest()
+    hash_func = fingerprint_function(test_func)
 
     assert cognit_client.offloaded_funs_hash_map.get(hash_func) == function_id
     assert cognit_client.get_has_connection() is True
     assert function_id == 4079
 
+def test_upload_function_to_daas_cache_hit(cognit_client: CognitFrontendClient, mocker: MockerFixture, test_func: callable):
+
+    mock_response = mocker.Mock()
+    mock_response.status_code = TEST_CFE_RESPONSES["fun_upload"]["status_code"]
+    mock_response.json.return_value = TEST_CFE_RESPONSES["fun_upload"]["body"]
+
+    mock_post = mocker.patch("requests.Session.post", return_value=mock_response)
+    cognit_client.upload_function_to_daas(test_func)
+
+    serialize = mocker.spy(FaasParser, "serialize")
+
+    # Already uploaded functions are neither serialized nor sent again
+    for _ in range(5):
+        assert cognit_client.upload_function_to_daas(test_func) == 4079
+
+    assert mock_post.call_count == 1
+    serialize.assert_not_called()
+
+def test_upload_function_to_daas_after_restart(cognit_config: CognitConfig, cognit_client: CognitFrontendClient, mocker: MockerFixture, test_func: callable):
+
+    mock_response = mocker.Mock()
+    mock_response.status_code = TEST_CFE_RESPONSES["fun_upload"]["status_code"]
+    mock_response.json.return_value = TEST_CFE_RESPONSES["fun_upload"]["body"]
+
+    mock_post = mocker.patch("requests.Session.post", return_value=mock_response)
+    cognit_client.upload_function_to_daas(test_func)
+
+    # A new client, e.g. after a re-authentication, reuses the ID stored on disk
+    cfc = CognitFrontendClient(cognit_config)
+
+    assert cfc.upload_function_to_daas(test_func) == 4079
+    assert mock_post.call_count == 1
+    assert cfc.is_function_id_verified(test_func) is True
+
 def test_app_req_update(cognit_client: CognitFrontendClient, mocker: MockerFixture):
 
     mock_response = mocker.Mock()
     mock_response.status_code = TEST_CFE_RESPONSES["req_update"]["status_code"]
     mock_response.json.return_value = TEST_CFE_RESPONSES["req_update"]["body"]
 
-    mocker.patch("requests.put", return_value=mock_response)
+    mocker.patch("requests.Session.put", return_value=mock_response)
 
     is_updated = cognit_client.init(Scheduling(**REQS_NEW))
 
@@ -268,7 +325,7 @@ def test_app_req_read(cognit_client: CognitFrontendClient, mocker: MockerFixture
     mock_response.status_code = TEST_CFE_RESPONSES["req_read_ok"]["status_code"]
     mock_response.json.return_value = TEST_CFE_RESPONSES["req_read_ok"]["body"]
 
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch("requests.Session.get", return_value=mock_response)
 
     result = cognit_client._app_req_read()
 
@@ -279,7 +336,7 @@ def test_app_req_delete(cognit_client: CognitFrontendClient, mocker: MockerFixtu
     mock_response = mocker.Mock()
     mock_response.status_code = TEST_CFE_RESPONSES["req_delete"]["status_code"]
 
-    mocker.patch("requests.delete", return_value=mock_response)
+    mocker.patch("requests.Session.delete", return_value=mock_response)
 
     is_deleted = cognit_client._app_req_delete()
 
@@ -292,7 +349,7 @@ def test_app_req_delete_failure(cognit_client, mocker):
     mock_response.status_code = 404
     mock_response.json.return_value = {"detail": "Not found"}
 
-    mocker.patch("requests.delete", return_value=mock_response)
+    mocker.patch("requests.Session.delete", return_value=mock_response)
 
     is_deleted = cognit_client._app_req_delete()
 
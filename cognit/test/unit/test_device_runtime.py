@@ -0,0 +1,121 @@
+from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecReturnCode
+from cognit.test.benchmark.stand_in import start_cognit_frontend, start_edge_cluster_frontend, write_config, REQUIREMENTS
+from cognit.device_runtime import DeviceRuntime
+
+from concurrent.futures import Future
+from threading import Thread, Event
+import pytest
+import time
+import os
+
+COGNIT_CONFIG_PATH = "cognit/test/config/cognit_v2.yml"
+
+def sum(a: int, b: int):
+    return a + b
+
+@pytest.fixture
+def device_runtime() -> DeviceRuntime:
+    return DeviceRuntime(COGNIT_CONFIG_PATH)
+
+def test_submit_returns_call_future(device_runtime: DeviceRuntime):
+
+    future = device_runtime.submit(sum, 2, 3)
+
+    # Assertions
+    assert isinstance(future, Future)
+
+    call = device_runtime.call_queue.get_call()
+    assert call.future is future
+    assert call.params == [2, 3]
+
+def test_submit_queue_full(device_runtime: DeviceRuntime):
+
+    device_runtime.call_queue.size_limit = 1
+
+    assert device_runtime.submit(sum, 2, 3) is not None
+    assert device_runtime.submit(sum, 4, 5) is None
+
+def test_concurrent_calls_get_their_own_result(device_runtime: DeviceRuntime):
+
+    results = {}
+
+    def caller(a: int, b: int):
+        results[(a, b)] = device_runtime.call(sum, a, b)
+
+    callers = [Thread(target=caller, args=(i, i)) for i in range(5)]
+
+    for thread in callers:
+        thread.start()
+
+    # Act as the dispatcher, answering the calls in reverse order
+    calls = []
+    while len(calls) < 5:
+        call = device_runtime.call_queue.get_call(timeout=5)
+        calls.append(call)
+
+    for call in reversed(calls):
+        call.future.set_result(ExecResponse(res=str(call.params[0] + call.params[1])))
+
+    for thread in callers:
+        thread.join(5)
+
+    # Assertions
+    for i in range(5):
+        assert results[(i, i)].res == str(i + i)
+
+def test_call_timeout_withdraws_queued_call(device_runtime: DeviceRuntime):
+
+    # Nobody takes the call from the queue
+    start = time.monotonic()
+    result = device_runtime.call(sum, 2, 3, timeout=0.1)
+
+    # Assertions
+    assert time.monotonic() - start < 5
+    assert result.ret_code == ExecReturnCode.ERROR
+    assert "Timeout" in result.err
+    assert len(device_runtime.call_queue) == 0
+
+def test_submit_sets_call_deadline(device_runtime: DeviceRuntime):
+
+    device_runtime.submit(sum, 2, 3, timeout=10)
+
+    call = device_runtime.call_queue.get_call()
+
+    # Assertions
+    assert call.timeout == 10
+    assert 9 < call.get_remaining_time() <= 10
+
+def test_call_async_is_polled_against_stand_in_ecf():
+
+    cognit_frontend = start_cognit_frontend()
+    ecf = start_edge_cluster_frontend(cognit_frontend)
+    cognit_frontend.ecf_addresses = [ecf.address]
+
+    config_path = write_config(cognit_frontend, ecf_async_mode=True, async_poll_interval=0.05, latency_report_interval=0)
+    runtime = DeviceRuntime(config_path)
+
+    results = []
+    done = Event()
+
+    def callback(result: ExecResponse):
+        results.append(result)
+        done.set()
+
+    try:
+
+        runtime.init(REQUIREMENTS)
+        assert runtime.call_async(sum, callback, 2, 3) is True
+        assert done.wait(10) is True
+
+    finally:
+
+        runtime.stop()
+        ecf.stop()
+        cognit_frontend.stop()
+        os.unlink(config_path)
+
+    # Assertions
+    assert results[0].ret_code == ExecReturnCode.SUCCESS
+    assert results[0].res == 5
+    # Submitted in ASYNC mode and collected from the status route
+    assert len(ecf.executions) == 1
@@ -1,15 +1,22 @@
-from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecReturnCode
+from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecReturnCode, AsyncExecResponse, AsyncExecStatus, AsyncExecId
 from cognit.modules._edge_cluster_frontend_client import EdgeClusterFrontendClient
 from cognit.modules._device_runtime_state_machine import DeviceRuntimeStateMachine
 from cognit.models._cognit_frontend_client import Scheduling
-from cognit.modules._sync_result_queue import SyncResultQueue
+from cognit.modules._edge_cluster_balancer import BalancingPolicy
+from cognit.modules._function_id_cache import FunctionIdCache
+from cognit.modules._function_registry import fingerprint_function
 from cognit.modules._cognitconfig import CognitConfig
 from cognit.modules._call_queue import CallQueue
+from cognit.modules._latency_calculator import LatencyMeasurement
 from cognit.models._device_runtime import *
 
 from statemachine.exceptions import TransitionNotAllowed
 from pytest_mock import MockerFixture
+from threading import Event
+import requests as req
+import urllib3
 import pytest
+import time
 
 COGNIT_CONFIG_PATH = "cognit/test/config/cognit_v2.yml"
 
@@ -49,13 +56,12 @@ def init_state_machine(mocker) -> DeviceRuntimeStateMachine:
     # Init parameters
     cognit_config = CognitConfig(COGNIT_CONFIG_PATH)
     requirements = Scheduling(**REQS_INIT)
-    sync_result_queue = SyncResultQueue()  
     call_queue = CallQueue()
 
     # Mock methods that are executed in INIT state
     mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient._authenticate", return_value="mocked_token")
 
-    sm = DeviceRuntimeStateMachine(cognit_config, requirements, call_queue, sync_result_queue)
+    sm = DeviceRuntimeStateMachine(cognit_config, requirements, call_queue)
 
     return sm
 
@@ -65,7 +71,6 @@ def ready_state_machine(mocker) -> DeviceRuntimeStateMachine:
     # Init parameters
     cognit_config = CognitConfig(COGNIT_CONFIG_PATH)
     requirements = Scheduling(**REQS_INIT)
-    sync_result_queue = SyncResultQueue()  
     call_queue = CallQueue()
 
     # Mock methods that are executed in INIT state
@@ -76,7 +81,7 @@ def ready_state_machine(mocker) -> DeviceRuntimeStateMachine:
     mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.init", return_value=True)
 
     # Init SMHandler
-    sm = DeviceRuntimeStateMachine(cognit_config, requirements, call_queue, sync_result_queue)
+    sm = DeviceRuntimeStateMachine(cognit_config, requirements, call_queue)
 
     # Transition to READY state
     sm.success_auth()  
@@ -96,6 +101,104 @@ def test_init_state(init_state_machine: DeviceRuntimeStateMachine):
     assert init_state_machine.cfc is not None
     assert init_state_machine.ecf is None
 
+# Clients created after a re-init keep using the connections of the previous ones
+def test_clients_share_http_session(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    session = ready_state_machine.http_session
+
+    assert ready_state_machine.cfc.session is session
+    assert ready_state_machine.ecf.session is session
+
+    # The CFC connection is lost and the clients are created again
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.get_has_connection", return_value=False)
+    ready_state_machine.token_not_valid_ready()
+
+    assert ready_state_machine.cfc.session is session
+
+# Losing every ECF only gets the ECFs again, the CFC client and its token are kept
+def test_ecf_lost_keeps_cfc(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    cfc = ready_state_machine.cfc
+    authenticate = mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient._authenticate", return_value="new_token")
+
+    ready_state_machine.ecf.set_has_connection(False)
+    mocker.patch("cognit.modules._edge_cluster_frontend_client.EdgeClusterFrontendClient.get_has_connection", return_value=False)
+    ready_state_machine.ecf_lost_ready()
+
+    # Assertions
+    assert ready_state_machine.current_state.id == "get_ecf_address"
+    assert ready_state_machine.cfc is cfc
+    assert ready_state_machine.token == "mocked_token"
+    authenticate.assert_not_called()
+
+# A refreshed token reaches every client without leaving the ready state
+def test_refreshed_token_is_shared_by_all_clients(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.refresh_token", return_value="refreshed_token")
+
+    token = ready_state_machine.token_refresher.refresh()
+
+    # Assertions
+    assert token == "refreshed_token"
+    assert ready_state_machine.current_state.id == "ready"
+    assert ready_state_machine.token == "refreshed_token"
+    assert ready_state_machine.cfc.token == "refreshed_token"
+    assert all(client.token == "refreshed_token" for client in ready_state_machine.balancer.get_clients())
+
+def test_execute_call_fails_over_to_next_ecf(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.upload_function_to_daas", return_value="func_id")
+
+    # The preferred ECF is down
+    down_ecf = mocker.Mock(address="http://down-ecf")
+    down_ecf.get_has_connection.return_value = True
+    def fail(*args, **kwargs):
+        down_ecf.get_has_connection.return_value = False
+        reason = urllib3.exceptions.NewConnectionError(None, "Connection refused")
+        raise req.exceptions.ConnectionError(urllib3.exceptions.MaxRetryError(None, "/v1/faas/execute", reason))
+    down_ecf.execute_function.side_effect = fail
+
+    up_ecf = mocker.Mock(address="http://up-ecf")
+    up_ecf.get_has_connection.return_value = True
+    up_ecf.execute_function.return_value = ExecResponse(res="5")
+
+    ready_state_machine.balancer.set_clients([down_ecf, up_ecf])
+
+    call_object = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3])
+    ready_state_machine.execute_call(call_object)
+
+    # The same call is served by the other ECF, without leaving the ready state
+    assert call_object.future.result(timeout=0).res == "5"
+    assert ready_state_machine.is_ecf_connected() is True
+    assert ready_state_machine.current_state.id == "ready"
+
+def test_execute_call_does_not_fail_over_once_the_request_was_sent(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.upload_function_to_daas", return_value="func_id")
+
+    # The connection drops after the request was sent, the function may be running
+    dropped_ecf = mocker.Mock(address="http://dropped-ecf")
+    dropped_ecf.get_has_connection.return_value = True
+    reason = urllib3.exceptions.ProtocolError("Connection aborted.", ConnectionResetError(104, "Connection reset by peer"))
+    dropped_ecf.execute_function.side_effect = req.exceptions.ConnectionError(reason)
+
+    other_ecf = mocker.Mock(address="http://other-ecf")
+    other_ecf.get_has_connection.return_value = True
+    other_ecf.execute_function.return_value = ExecResponse(res="5")
+
+    ready_state_machine.balancer.set_clients([dropped_ecf, other_ecf])
+    mocker.patch.object(ready_state_machine.balancer, "acquire", side_effect=[dropped_ecf, other_ecf])
+    mocker.patch.object(ready_state_machine.balancer, "release")
+
+    call_object = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3])
+    ready_state_machine.execute_call(call_object)
+
+    # The call is not executed a second time
+    result = call_object.future.result(timeout=0)
+    assert result.ret_code.value == ExecReturnCode.ERROR.value
+    assert "Connection aborted" in result.err
+    other_ecf.execute_function.assert_not_called()
+
 # Check init has transition corectly to the send_init_request state
 def test_init_to_send_init_request(mocker: MockerFixture, init_state_machine: DeviceRuntimeStateMachine):
 
@@ -160,6 +263,63 @@ def test_get_ecf_address_to_ready(mocker: MockerFixture, init_state_machine: Dev
     assert init_state_machine.ecf.address == "http://mocked-address.com"
 
 
+# Every Edge Cluster offered by the CFC gets a client, the chosen one first
+def test_get_ecf_address_balances_all_clusters(mocker: MockerFixture, init_state_machine: DeviceRuntimeStateMachine):
+
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.init", return_value=True)
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient._get_edge_cluster_address", return_value="http://mocked-address.com")
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.get_has_connection", return_value=True)
+
+    init_state_machine.cfc.available_ecfs = ["http://other-address.com", "http://mocked-address.com", "http://third-address.com"]
+
+    init_state_machine.success_auth()
+    init_state_machine.requirements_up()
+
+    # Assertions
+    addresses = [client.address for client in init_state_machine.balancer.get_clients()]
+    assert addresses == ["http://mocked-address.com", "http://other-address.com", "http://third-address.com"]
+    assert init_state_machine.ecf.address == "http://mocked-address.com"
+
+def test_execute_calls_are_spread_across_clusters(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.upload_function_to_daas", return_value="func_id")
+
+    ecfs = [mocker.Mock(), mocker.Mock()]
+    for i, mock_ecf in enumerate(ecfs):
+        mock_ecf.address = f"http://ecf-{i}"
+        mock_ecf.get_has_connection.return_value = True
+        mock_ecf.execute_function.return_value = ExecResponse(res=str(i))
+
+    ready_state_machine.balancer.policy = BalancingPolicy.ROUND_ROBIN
+    ready_state_machine.balancer.set_clients(ecfs)
+
+    for _ in range(4):
+        ready_state_machine.execute_call(Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3]))
+
+    # Assertions
+    assert [mock_ecf.execute_function.call_count for mock_ecf in ecfs] == [2, 2]
+    assert all(status["outstanding"] == 0 for status in ready_state_machine.balancer.get_status())
+
+def test_execute_call_records_timings(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.upload_function_to_daas", return_value="func_id")
+
+    mock_ecf = mocker.Mock(address="http://ecf")
+    mock_ecf.get_has_connection.return_value = True
+    mock_ecf.execute_function.return_value = ExecResponse(res="5")
+    ready_state_machine.balancer.set_clients([mock_ecf])
+
+    call_object = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3])
+    ready_state_machine.execute_call(call_object)
+
+    result = call_object.future.result(timeout=0)
+
+    # Assertions
+    assert mock_ecf.execute_function.call_args.kwargs["timings"] is call_object.timings
+    assert result.timings["queue_wait"] >= 0
+    assert result.timings["total"] >= result.timings["queue_wait"]
+    assert ready_state_machine.call_stats.get_stats()["builtins.sum"]["total"]["count"] == 1
+
 def test_execute_function_offloading_sync(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
 
     call_object = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3])
@@ -167,10 +327,10 @@ def test_execute_function_offloading_sync(mocker: MockerFixture, ready_state_mac
     # Mock CFC method to return a task ID
     mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.upload_function_to_daas", return_value="func_id")
     mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.get_app_requirements_id", return_value="app_req_id")
-    mocker.patch("cognit.modules._call_queue.CallQueue.get_call", return_value=call_object)
 
     # Mock the ECF client and its method (mocked object)
-    mock_ecf = mocker.create_autospec(EdgeClusterFrontendClient)
+    mock_ecf = mocker.Mock()
+    mock_ecf.get_has_connection.return_value = True
    
     # Create an actual ExecResponse object to return from the mock
     mock_resp = ExecResponse(
@@ -185,10 +345,10 @@ def test_execute_function_offloading_sync(mocker: MockerFixture, ready_state_mac
     ready_state_machine.ecf = mock_ecf
 
     # Call the function you're testing
-    ready_state_machine.on_enter_ready()
+    ready_state_machine.execute_call(call_object)
 
     # Assertions
-    assert ready_state_machine.sync_results_queue.get_sync_result() == mock_resp
+    assert call_object.future.result(timeout=0) == mock_resp
     assert ready_state_machine.current_state == ready_state_machine.ready
 
 def test_update_requirements_no_change(
@@ -233,7 +393,7 @@ def test_update_requirements_with_change_in_ready_state(
     # Assertions
     assert ready_state_machine.current_state.id == "send_init_request"
     
-    mock_logger.debug.assert_called_with("Uploading requirements: " + str(new_requirements))
+    mock_logger.debug.assert_called_with("Uploading requirements: %s", new_requirements)
     assert ready_state_machine.new_requirements == None
 
 def test_update_requirements_with_change_in_get_ecf_address_state(
@@ -271,7 +431,7 @@ def test_update_requirements_with_change_in_get_ecf_address_state(
     # Assertions
     assert init_state_machine.current_state.id == "send_init_request"
     
-    mock_logger.debug.assert_called_with("Uploading requirements: " + str(new_requirements))
+    mock_logger.debug.assert_called_with("Uploading requirements: %s", new_requirements)
     assert init_state_machine.new_requirements == None
 
 
@@ -330,4 +490,374 @@ def test_address_has_changed_in_ready_state(
     assert ready_state_machine.get_address_counter == 1
     assert isinstance(ready_state_machine.ecf, EdgeClusterFrontendClient)
     assert ready_state_machine.ecf.address == "http://new-mocked-address.com"
-    assert ready_state_machine.new_ecf_address is None
\ No newline at end of file
+    assert ready_state_machine.new_ecf_address is None
+def test_ready_state_is_idle_until_ecf_address_changes(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    ready_state_machine.clear_events()
+
+    # Nothing to do, the state machine can wait
+    assert ready_state_machine.is_idle() is True
+    assert ready_state_machine.wait_for_event(0.01) is False
+
+    # Enqueued calls are handled by the dispatcher, not by the state machine
+    call_object = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3])
+    ready_state_machine.call_queue.add_call(call_object)
+
+    assert ready_state_machine.wait_for_event(0.01) is False
+
+    # The refresh timer finds a new address
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.get_edge_cluster_candidates", return_value=["http://new-mocked-address.com"])
+    mocker.patch("cognit.modules._edge_cluster_frontend_client.EdgeClusterFrontendClient.warm_up", return_value=True)
+    ready_state_machine.get_new_ecf_address()
+
+    assert ready_state_machine.wait_for_event(0.01) is True
+    assert ready_state_machine.is_idle() is False
+
+def test_ready_state_runs_reselection_timer(ready_state_machine: DeviceRuntimeStateMachine, new_requirements: Scheduling):
+
+    timer = ready_state_machine.timer
+
+    # Assertions
+    assert timer is not None
+    assert timer.interval == ready_state_machine.config.ecf_reselection_interval
+
+    # Only the ready state re-evaluates the Edge Cluster
+    ready_state_machine.change_requirements(new_requirements)
+    ready_state_machine.ready_update_requirements()
+
+    assert ready_state_machine.timer is None
+    assert timer._stop_event.is_set()
+
+def test_reselection_switches_only_to_a_clearly_faster_ecf(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    current = "http://mocked-address.com"
+    candidate = "http://closer-address.com"
+
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.get_edge_cluster_candidates", return_value=[candidate, current])
+    warm_up = mocker.patch("cognit.modules._edge_cluster_frontend_client.EdgeClusterFrontendClient.warm_up", return_value=True)
+    get_latencies = mocker.patch.object(ready_state_machine.latency_monitor, "get_latencies")
+
+    # 2 ms and 10 % faster is within the hysteresis
+    get_latencies.return_value = {current: 20.0, candidate: 18.0}
+    ready_state_machine.get_new_ecf_address()
+
+    assert ready_state_machine.new_ecf_address is None
+    warm_up.assert_not_called()
+
+    # The candidate cannot be reached, stay
+    get_latencies.return_value = {current: 20.0, candidate: 10.0}
+    warm_up.return_value = False
+    ready_state_machine.get_new_ecf_address()
+
+    assert ready_state_machine.new_ecf_address is None
+
+    # Connected to the candidate first, then switch
+    warm_up.return_value = True
+    ready_state_machine.get_new_ecf_address()
+
+    assert ready_state_machine.new_ecf_address == candidate
+
+    ready_state_machine.ready_update_ecf_address()
+
+    assert [client.address for client in ready_state_machine.balancer.get_clients()] == [candidate, current]
+
+def test_reselection_leaves_an_ecf_that_no_longer_answers(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    current = "http://mocked-address.com"
+    candidate = "http://other-address.com"
+
+    ready_state_machine.cfc.available_ecfs = [current]
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.get_edge_cluster_candidates", return_value=[candidate, current])
+    mocker.patch("cognit.modules._edge_cluster_frontend_client.EdgeClusterFrontendClient.warm_up", return_value=True)
+
+    # Only the candidate answers the probes
+    mocker.patch.object(ready_state_machine.latency_monitor.calculator, "measure", return_value={candidate: LatencyMeasurement([20.0])})
+
+    ready_state_machine.get_new_ecf_address()
+
+    # Assertions
+    assert ready_state_machine.new_ecf_address == candidate
+    # The Edge Clusters in use only change in the state machine thread
+    assert ready_state_machine.cfc.available_ecfs == [current]
+
+    ready_state_machine.ready_update_ecf_address()
+
+    assert ready_state_machine.cfc.available_ecfs == [candidate, current]
+
+def test_dispatcher_only_runs_in_ready_state(ready_state_machine: DeviceRuntimeStateMachine, new_requirements: Scheduling):
+
+    assert ready_state_machine.dispatcher.ready.is_set() is True
+
+    ready_state_machine.change_requirements(new_requirements)
+    ready_state_machine.ready_update_requirements()
+
+    assert ready_state_machine.dispatcher.ready.is_set() is False
+
+def test_requirements_change_wakes_state_machine(ready_state_machine: DeviceRuntimeStateMachine, new_requirements: Scheduling):
+
+    ready_state_machine.clear_events()
+
+    ready_state_machine.change_requirements(new_requirements)
+
+    assert ready_state_machine.wait_for_event(0.01) is True
+    assert ready_state_machine.is_idle() is False
+
+def test_execute_call_results_go_to_their_caller(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.upload_function_to_daas", return_value="func_id")
+
+    # The ECF returns the sum of the parameters
+    mock_ecf = mocker.Mock()
+    mock_ecf.get_has_connection.return_value = True
+    mock_ecf.execute_function.side_effect = lambda func_id, app_req_id, params, timeout, **kwargs: ExecResponse(res=str(params[0] + params[1]))
+    ready_state_machine.ecf = mock_ecf
+
+    call_a = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3])
+    call_b = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[10, 20])
+
+    # Executed in reverse order
+    ready_state_machine.execute_call(call_b)
+    ready_state_machine.execute_call(call_a)
+
+    # Assertions
+    assert call_a.future.result(timeout=0).res == "5"
+    assert call_b.future.result(timeout=0).res == "30"
+
+def test_execute_call_upload_error(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.upload_function_to_daas", return_value=None)
+
+    call_object = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3])
+
+    ready_state_machine.execute_call(call_object)
+
+    # The caller is not left waiting
+    result = call_object.future.result(timeout=0)
+    assert result.ret_code.value == ExecReturnCode.ERROR.value
+    assert result.err == "Function could not be uploaded"
+
+def test_execute_call_skips_cancelled_call(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    upload = mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.upload_function_to_daas", return_value="func_id")
+
+    call_object = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3])
+    call_object.future.cancel()
+
+    ready_state_machine.execute_call(call_object)
+
+    # The function is neither uploaded nor executed
+    upload.assert_not_called()
+
+def test_execute_call_expired_deadline(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    upload = mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.upload_function_to_daas", return_value="func_id")
+
+    call_object = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3], timeout=1, deadline=time.monotonic() - 1)
+
+    ready_state_machine.execute_call(call_object)
+
+    # Assertions
+    upload.assert_not_called()
+    assert call_object.future.result(timeout=0).ret_code.value == ExecReturnCode.ERROR.value
+
+def test_execute_call_passes_remaining_time(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.upload_function_to_daas", return_value="func_id")
+
+    mock_ecf = mocker.Mock()
+    mock_ecf.get_has_connection.return_value = True
+    mock_ecf.execute_function.return_value = ExecResponse(res="5")
+    ready_state_machine.ecf = mock_ecf
+
+    call_object = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3], timeout=10, deadline=time.monotonic() + 10)
+
+    ready_state_machine.execute_call(call_object)
+
+    # The request timeout is what is left of the deadline
+    timeout = mock_ecf.execute_function.call_args.args[3]
+    assert 9 < timeout <= 10
+
+def test_execute_call_reuploads_stale_cached_function_id(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine, function_id_cache_path: str):
+
+    def add(a: int, b: int):
+        return a + b
+
+    # A previous process uploaded the function, but the DaaS no longer knows the ID
+    cfc = ready_state_machine.cfc
+    FunctionIdCache(function_id_cache_path, flush_delay=0).put(cfc.function_id_cache_namespace, fingerprint_function(add), 1111)
+
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = 2222
+    mock_post = mocker.patch("requests.Session.post", return_value=mock_response)
+
+    mock_ecf = mocker.Mock()
+    mock_ecf.get_has_connection.return_value = True
+    mock_ecf.execute_function.side_effect = [ExecResponse(ret_code=ExecReturnCode.ERROR, err="Function not found"), ExecResponse(res="5")]
+    ready_state_machine.ecf = mock_ecf
+
+    call_object = Call(function=add, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3])
+
+    ready_state_machine.execute_call(call_object)
+
+    # The cached ID is tried first, then the function is uploaded and executed again
+    assert [call.args[0] for call in mock_ecf.execute_function.call_args_list] == [1111, 2222]
+    assert mock_post.call_count == 1
+    assert call_object.future.result(timeout=0).res == "5"
+    assert cfc.upload_function_to_daas(add) == 2222
+
+def test_execute_call_keeps_cached_function_id_when_the_function_fails(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine, function_id_cache_path: str):
+
+    def divide(a: int, b: int):
+        return a / b
+
+    cfc = ready_state_machine.cfc
+    FunctionIdCache(function_id_cache_path, flush_delay=0).put(cfc.function_id_cache_namespace, fingerprint_function(divide), 1111)
+
+    mock_post = mocker.patch("requests.Session.post")
+
+    # The ID is valid, the function itself raises
+    mock_ecf = mocker.Mock()
+    mock_ecf.get_has_connection.return_value = True
+    mock_ecf.execute_function.return_value = ExecResponse(ret_code=ExecReturnCode.ERROR, err="division by zero")
+    ready_state_machine.ecf = mock_ecf
+
+    call_object = Call(function=divide, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[1, 0])
+
+    ready_state_machine.execute_call(call_object)
+
+    # The error is returned without uploading nor executing the function again
+    assert call_object.future.result(timeout=0).err == "division by zero"
+    assert mock_ecf.execute_function.call_count == 1
+    mock_post.assert_not_called()
+    assert cfc.is_function_id_verified(divide) is True
+
+def test_submitted_async_call_validates_cached_function_id_when_polled(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine, function_id_cache_path: str):
+
+    ready_state_machine.config._ecf_async_mode = True
+
+    def add(a: int, b: int):
+        return a + b
+
+    cfc = ready_state_machine.cfc
+    FunctionIdCache(function_id_cache_path, flush_delay=0).put(cfc.function_id_cache_namespace, fingerprint_function(add), 1111)
+
+    mock_ecf = mocker.Mock()
+    mock_ecf.get_has_connection.return_value = True
+    mock_ecf.execute_function_async.return_value = AsyncExecResponse(status=AsyncExecStatus.WORKING, res=None, exec_id=AsyncExecId(faas_task_uuid="1234-abcd"))
+    ready_state_machine.ecf = mock_ecf
+
+    call_object = Call(function=add, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.ASYNC, params=[2, 3])
+
+    ready_state_machine.execute_call(call_object)
+
+    # The execution has only been submitted, nothing is known about the ID yet
+    assert cfc.is_function_id_verified(add) is False
+
+    ready_state_machine.deliver_polled_result(call_object, ExecResponse(ret_code=ExecReturnCode.SUCCESS, res=5))
+
+    assert cfc.is_function_id_verified(add) is True
+    assert call_object.future.result(timeout=0).res == "5"
+
+def test_execute_async_call_is_handed_to_poller(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    ready_state_machine.config._ecf_async_mode = True
+
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.upload_function_to_daas", return_value="func_id")
+
+    mock_ecf = mocker.Mock()
+    mock_ecf.get_has_connection.return_value = True
+    mock_ecf.execute_function_async.return_value = AsyncExecResponse(status=AsyncExecStatus.WORKING, res=None, exec_id=AsyncExecId(faas_task_uuid="1234-abcd"))
+    ready_state_machine.ecf = mock_ecf
+
+    callback = mocker.Mock()
+    call_object = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=callback, mode=ExecutionMode.ASYNC, params=[2, 3])
+
+    ready_state_machine.execute_call(call_object)
+
+    # The dispatcher does not wait for the execution to finish
+    assert "1234-abcd" in ready_state_machine.poller.outstanding
+    assert call_object.future.done() is False
+    callback.assert_not_called()
+
+    # The poller collects the result
+    result = ExecResponse(ret_code=ExecReturnCode.SUCCESS, res=5)
+    ready_state_machine.callback_executor.start()
+    ready_state_machine.deliver_result(call_object, result)
+
+    assert call_object.future.result(timeout=0) == result
+    assert ready_state_machine.callback_executor.wait_idle(5) is True
+    ready_state_machine.callback_executor.stop()
+    callback.assert_called_once_with(result)
+
+def test_submitted_async_call_holds_the_ecf_until_polled(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    ready_state_machine.config._ecf_async_mode = True
+
+    mocker.patch("cognit.modules._cognit_frontend_client.CognitFrontendClient.upload_function_to_daas", return_value="func_id")
+
+    exec_id = AsyncExecId(faas_task_uuid="1234-abcd")
+    mock_ecf = mocker.Mock(address="http://ecf")
+    mock_ecf.get_has_connection.return_value = True
+    mock_ecf.execute_function_async.return_value = AsyncExecResponse(status=AsyncExecStatus.WORKING, res=None, exec_id=exec_id)
+    mock_ecf.get_async_execution_status.return_value = AsyncExecResponse(status=AsyncExecStatus.READY, res={"res": "5"}, exec_id=exec_id)
+    ready_state_machine.balancer.set_clients([mock_ecf])
+
+    call_object = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.ASYNC, params=[2, 3])
+
+    ready_state_machine.execute_call(call_object)
+
+    # The execution still runs in the ECF, it keeps its slot
+    assert ready_state_machine.balancer.get_status()[0]["outstanding"] == 1
+
+    ready_state_machine.poller._check("1234-abcd", mock_ecf, exec_id, call_object)
+
+    # Released with the result
+    assert call_object.future.result(timeout=0).res == "5"
+    assert ready_state_machine.balancer.get_status()[0]["outstanding"] == 0
+
+def test_queued_calls_are_failed_when_stopped(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    callback = mocker.Mock()
+    waiting = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=callback, mode=ExecutionMode.ASYNC, params=[2, 3])
+    withdrawn = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3])
+    withdrawn.future.cancel()
+
+    ready_state_machine.call_queue.add_call(waiting)
+    ready_state_machine.call_queue.add_call(withdrawn)
+
+    # As the dispatcher leaves them when it stops
+    ready_state_machine.call_queue.close()
+    ready_state_machine.callback_executor.start()
+    ready_state_machine.fail_queued_calls()
+
+    # Assertions
+    result = waiting.future.result(timeout=0)
+    assert result.ret_code.value == ExecReturnCode.ERROR.value
+    assert "stopped" in result.err
+    assert ready_state_machine.callback_executor.wait_idle(5) is True
+    ready_state_machine.callback_executor.stop()
+    callback.assert_called_once_with(result)
+    assert withdrawn.future.cancelled() is True
+    assert len(ready_state_machine.call_queue) == 0
+
+    # Nobody would offload the calls made after the stop
+    assert ready_state_machine.call_queue.add_call(Call(function=sum, fc_lang=FunctionLanguage.PY, callback=None, mode=ExecutionMode.SYNC, params=[2, 3])) is False
+
+def test_slow_callback_does_not_block_deliver_result(mocker: MockerFixture, ready_state_machine: DeviceRuntimeStateMachine):
+
+    release = Event()
+    callback = mocker.Mock(side_effect=lambda result: release.wait(5))
+    call_object = Call(function=sum, fc_lang=FunctionLanguage.PY, callback=callback, mode=ExecutionMode.ASYNC, params=[2, 3])
+    result = ExecResponse(ret_code=ExecReturnCode.SUCCESS, res=5)
+
+    ready_state_machine.callback_executor.start()
+
+    # The dispatcher thread returns while the callback is still running
+    ready_state_machine.deliver_result(call_object, result)
+    assert call_object.future.done() is True
+
+    release.set()
+    assert ready_state_machine.callback_executor.wait_idle(5) is True
+    ready_state_machine.callback_executor.stop()
+    callback.assert_called_once_with(result)
@@ -0,0 +1,108 @@
+from cognit.modules._edge_cluster_balancer import EdgeClusterBalancer, BalancingPolicy
+from cognit.modules._edge_cluster_frontend_client import EdgeClusterFrontendClient
+from pytest_mock import MockerFixture
+import pytest
+
+@pytest.fixture
+def clients() -> list[EdgeClusterFrontendClient]:
+    return [EdgeClusterFrontendClient("the_token", f"https://ecf-{i}") for i in range(3)]
+
+def test_round_robin(clients: list[EdgeClusterFrontendClient]):
+
+    balancer = EdgeClusterBalancer(BalancingPolicy.ROUND_ROBIN)
+    balancer.set_clients(clients)
+
+    chosen = []
+    for _ in range(6):
+        client = balancer.acquire()
+        balancer.release(client, 0.01)
+        chosen.append(client.address)
+
+    # Assertions
+    assert chosen == ["https://ecf-0", "https://ecf-1", "https://ecf-2"] * 2
+
+def test_least_outstanding(clients: list[EdgeClusterFrontendClient]):
+
+    balancer = EdgeClusterBalancer(BalancingPolicy.LEAST_OUTSTANDING)
+    balancer.set_clients(clients)
+
+    # Three calls in flight at the same time go to different Edge Clusters
+    in_flight = [balancer.acquire() for _ in range(3)]
+
+    assert {client.address for client in in_flight} == {"https://ecf-0", "https://ecf-1", "https://ecf-2"}
+
+    # The first one to finish takes the next call
+    balancer.release(in_flight[1], 0.01)
+
+    assert balancer.acquire() is in_flight[1]
+
+def test_latency_weighted_prefers_fast_edge_cluster(mocker: MockerFixture, clients: list[EdgeClusterFrontendClient]):
+
+    balancer = EdgeClusterBalancer(BalancingPolicy.LATENCY_WEIGHTED)
+    balancer.set_clients(clients[:2])
+
+    for client, latency in zip(clients[:2], [0.01, 1.0]):
+        balancer.acquire()
+        balancer.release(client, latency)
+
+    chosen = [balancer.acquire().address for _ in range(1000)]
+
+    # 100 times faster, so roughly 99% of the calls
+    assert chosen.count("https://ecf-0") > 900
+
+def test_disconnected_edge_cluster_is_skipped_until_retry(mocker: MockerFixture, clients: list[EdgeClusterFrontendClient]):
+
+    monotonic = mocker.patch("cognit.modules._edge_cluster_balancer.time.monotonic", return_value=100.0)
+
+    balancer = EdgeClusterBalancer(BalancingPolicy.ROUND_ROBIN, retry_interval=30)
+    balancer.set_clients(clients[:2])
+
+    # The request to the first Edge Cluster fails
+    client = balancer.acquire()
+    client.set_has_connection(False)
+    balancer.release(client)
+
+    # Assertions
+    assert balancer.get_has_connection() is True
+    assert all(balancer.acquire() is clients[1] for _ in range(5))
+
+    # It is tried again once the retry interval expires
+    monotonic.return_value = 131.0
+
+    assert clients[0] in [balancer.acquire() for _ in range(2)]
+    assert clients[0].get_has_connection() is True
+
+def test_no_edge_cluster_connected(clients: list[EdgeClusterFrontendClient]):
+
+    balancer = EdgeClusterBalancer()
+    balancer.set_clients(clients)
+
+    for client in clients:
+        client.set_has_connection(False)
+
+    # Assertions
+    assert balancer.get_has_connection() is False
+    assert balancer.acquire() is None
+
+def test_replaced_clients_keep_the_state_of_their_edge_cluster(clients: list[EdgeClusterFrontendClient]):
+
+    balancer = EdgeClusterBalancer(BalancingPolicy.LEAST_OUTSTANDING)
+    balancer.set_clients(clients[:2])
+
+    in_flight = balancer.acquire()
+    balancer.release(balancer.acquire(), 0.05)
+
+    # The Edge Clusters are chosen again, ecf-0 and ecf-1 are still offered
+    balancer.set_clients([EdgeClusterFrontendClient("the_token", f"https://ecf-{i}") for i in range(3)])
+
+    status = {state["address"]: state for state in balancer.get_status()}
+
+    # Assertions
+    assert status[in_flight.address]["outstanding"] == 1
+    assert status["https://ecf-1"]["latency"] == 0.05
+    assert status["https://ecf-2"]["outstanding"] == 0
+
+    # The request sent with the old client still gives its slot back
+    balancer.release(in_flight, 0.01)
+
+    assert {state["address"]: state for state in balancer.get_status()}[in_flight.address]["outstanding"] == 0
@@ -1,19 +1,17 @@
-from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecutionMode, ExecReturnCode
-from cognit.modules._edge_cluster_frontend_client import EdgeClusterFrontendClient
+from cognit.models._edge_cluster_frontend_client import ExecResponse, ExecReturnCode, AsyncExecStatus
+from cognit.modules._edge_cluster_frontend_client import EdgeClusterFrontendClient, is_unknown_function_error
+from cognit.modules._tls_verification import TlsVerificationCache
+from cognit.modules._http_session import create_http_session, get_ssl_context
+from cognit.models._call_timings import CallTimings
 
 from pytest_mock import MockerFixture
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+import requests as req
+import subprocess
+import shutil
 import pytest
-
-global callback_executed, response_received
-
-@pytest.fixture
-def dummy_callback() -> callable:
-    def callback(response):
-        global callback_executed
-        global response_received
-        response_received = response
-        callback_executed = True
-    return callback
+import ssl
 
 def test_client_success_initialization():
     test_address = "the_address"
@@ -39,17 +37,15 @@ def test_client_bad_initialization():
     assert ecf.address == None
     assert ecf._has_connection == False
 
-def test_execute_function_if_async(
+def test_execute_function_if_sync(
         mocker: MockerFixture,
-        dummy_callback: callable
     ):
 
-    global callback_executed, response_received
+    mocker.patch("cognit.modules._faas_parser.FaasParser.deserialize", return_value=6)
+
     test_address = "the_address"
     test_token = "the_token"
 
-    mocker.patch("cognit.modules._faas_parser.FaasParser.deserialize", return_value=6)
-
     # Initialize ECF Client
     ecf = EdgeClusterFrontendClient(test_token, test_address)
 
@@ -66,71 +62,221 @@ def test_execute_function_if_async(
     )
 
     # Mock post method
-    mocker.patch("requests.post", return_value=mock_resp)
+    mocker.patch("requests.Session.post", return_value=mock_resp)
 
     # Test function
     function_id = "123"
     app_req_id = 123
-
     response = ecf.execute_function(
         func_id=function_id, 
         app_req_id=app_req_id, 
-        exec_mode=ExecutionMode.ASYNC, 
-        callback=dummy_callback, 
         params_tuple=[2, 3],
         timeout=None
     )
 
     # Assertions
-    assert response == None
-    assert callback_executed == True
-    assert response_received.res == 6
-    assert response_received.ret_code == ExecReturnCode.SUCCESS
-   
-def test_execute_function_if_sync(
-        mocker: MockerFixture,
-    ):
+    
+    assert response.ret_code == ExecReturnCode.SUCCESS
+    assert response.res == 6
+def test_execute_function_records_timings(mocker: MockerFixture):
 
-    global callback_executed
+    mocker.patch("cognit.modules._faas_parser.FaasParser.deserialize", return_value=6)
+
+    mock_resp = mocker.Mock()
+    mock_resp.json.return_value = {"ret_code": 0, "res": "serialized_res", "err": None}
+    mocker.patch("requests.Session.post", return_value=mock_resp)
+
+    ecf = EdgeClusterFrontendClient("the_token", "the_address")
+    timings = CallTimings()
+
+    ecf.execute_function("123", 123, [2, 3], timeout=None, timings=timings)
+
+    # Assertions
+    assert list(timings.get_durations()) == ["params_serialization", "execute", "response_parsing", "result_deserialization"]
+
+def test_execute_function_with_unknown_id(mocker: MockerFixture):
+
+    # The DaaS does not know the function ID
+    mock_resp = mocker.Mock()
+    mock_resp.status_code = 404
+    mock_resp.raise_for_status.side_effect = req.exceptions.HTTPError("404 Client Error")
+    mocker.patch("requests.Session.post", return_value=mock_resp)
+
+    ecf = EdgeClusterFrontendClient("the_token", "the_address")
+
+    result = ecf.execute_function("123", 123, [2, 3], timeout=None)
+    status = ecf.execute_function_async(func_id="123", app_req_id=123, params_tuple=[2, 3], timeout=None)
+
+    # Assertions
+    assert is_unknown_function_error(result) is True
+    assert status.status == AsyncExecStatus.FAILED
+    assert is_unknown_function_error(status.res) is True
+    assert ecf.get_has_connection() is True
+
+def test_is_unknown_function_error():
+
+    assert is_unknown_function_error(ExecResponse(ret_code=ExecReturnCode.ERROR, err="Function not found")) is True
+    assert is_unknown_function_error(ExecResponse(ret_code=ExecReturnCode.ERROR, err="Function 1111 not found")) is True
+    # Errors of the function itself do not tell anything about its ID
+    assert is_unknown_function_error(ExecResponse(ret_code=ExecReturnCode.ERROR, err="division by zero")) is False
+    assert is_unknown_function_error(ExecResponse(ret_code=ExecReturnCode.ERROR, err="Key not found")) is False
+    assert is_unknown_function_error(ExecResponse(res="Function not found")) is False
+    assert is_unknown_function_error(None) is False
+
+def test_execute_function_async_mode(mocker: MockerFixture):
 
     mocker.patch("cognit.modules._faas_parser.FaasParser.deserialize", return_value=6)
 
-    test_address = "the_address"
-    callback_executed = False
-    test_token = "the_token"
+    ecf = EdgeClusterFrontendClient("the_token", "the_address")
 
-    # Initialize ECF Client
-    ecf = EdgeClusterFrontendClient(test_token, test_address)
+    # The ECF answers with the id of the execution
+    mock_resp = mocker.Mock()
+    mock_resp.json.return_value = {"status": "WORKING", "res": None, "exec_id": {"faas_task_uuid": "1234-abcd"}}
+    mock_post = mocker.patch("requests.Session.post", return_value=mock_resp)
 
-    assert ecf.address == "the_address"
-    assert ecf._has_connection == True
-    assert ecf.token == "the_token"
-    
-    # Mocked result from post method
+    status = ecf.execute_function_async(func_id="123", app_req_id=123, params_tuple=[2, 3], timeout=None)
+
+    # Assertions
+    assert mock_post.call_args.kwargs["params"]["mode"] == "async"
+    assert status.status == AsyncExecStatus.WORKING
+    assert status.exec_id.faas_task_uuid == "1234-abcd"
+
+    # The ECF finishes the execution
     mock_resp = mocker.Mock()
-    mock_resp.json.return_value = ExecResponse(
-        ret_code = ExecReturnCode.SUCCESS, 
-        res = "serialized_res",
-        err = None
-    )
+    mock_resp.json.return_value = {"status": "READY", "res": {"ret_code": 0, "res": "serialized_res", "err": None}, "exec_id": {"faas_task_uuid": "1234-abcd"}}
+    mock_get = mocker.patch("requests.Session.get", return_value=mock_resp)
 
-    # Mock post method
-    mocker.patch("requests.post", return_value=mock_resp)
+    status = ecf.get_async_execution_status(status.exec_id)
 
-    # Test function
-    function_id = "123"
-    app_req_id = 123
-    response = ecf.execute_function(
-        func_id=function_id, 
-        app_req_id=app_req_id, 
-        exec_mode=ExecutionMode.SYNC, 
-        callback=callback_executed, 
-        params_tuple=[2, 3],
-        timeout=None
-    )
+    # Assertions
+    assert mock_get.call_args.args[0] == "the_address/v1/faas/1234-abcd/status"
+    assert status.status == AsyncExecStatus.READY
+    assert status.res.res == 6
+    assert status.res.ret_code == ExecReturnCode.SUCCESS
+
+def test_execute_function_async_mode_not_supported(mocker: MockerFixture):
+
+    mocker.patch("cognit.modules._faas_parser.FaasParser.deserialize", return_value=6)
+
+    ecf = EdgeClusterFrontendClient("the_token", "the_address")
+
+    # The ECF ignores the mode and answers with the result
+    mock_resp = mocker.Mock()
+    mock_resp.json.return_value = {"ret_code": 0, "res": "serialized_res", "err": None}
+    mocker.patch("requests.Session.post", return_value=mock_resp)
+
+    status = ecf.execute_function_async(func_id="123", app_req_id=123, params_tuple=[2, 3], timeout=None)
 
     # Assertions
-    
-    assert response.ret_code == ExecReturnCode.SUCCESS
-    assert callback_executed == False
-    assert response.res == 6
\ No newline at end of file
+    assert status.status == AsyncExecStatus.READY
+    assert status.res.res == 6
+
+def test_self_signed_certificate_is_remembered(mocker: MockerFixture):
+
+    mocker.patch("cognit.modules._faas_parser.FaasParser.deserialize", return_value=6)
+
+    mock_resp = mocker.Mock()
+    mock_resp.json.return_value = {"ret_code": 0, "res": "serialized_res", "err": None}
+
+    # Only verified requests fail, as with a self-signed certificate
+    def post(uri, **kwargs):
+        if kwargs.get("verify", True) is not False:
+            raise req.exceptions.SSLError("[SSL: CERTIFICATE_VERIFY_FAILED] certificate verify failed: self-signed certificate")
+        return mock_resp
+
+    mock_post = mocker.patch("requests.Session.post", side_effect=post)
+
+    ecf = EdgeClusterFrontendClient("the_token", "https://self-signed-ecf:1234")
+
+    for _ in range(3):
+        assert ecf.execute_function("123", 123, [2, 3]).res == 6
+
+    # Only the first execution tries to verify the certificate
+    verified = [call for call in mock_post.call_args_list if "verify" not in call.kwargs]
+    assert len(verified) == 1
+    assert mock_post.call_count == 4
+
+def test_unverified_host_is_verified_again_after_the_ttl(mocker: MockerFixture):
+
+    cache = TlsVerificationCache(ttl=60)
+    now = mocker.patch("cognit.modules._tls_verification.time.monotonic", return_value=1000.0)
+
+    cache.set_unverified("https://self-signed-ecf:1234/v1/functions/123/execute")
+
+    assert cache.is_verified("https://self-signed-ecf:1234/v1/faas/1234-abcd/status") is False
+    assert cache.is_verified("https://self-signed-ecf:4321/v1/faas/1234-abcd/status") is True
+
+    # The certificate may have been replaced by a valid one
+    now.return_value = 1061.0
+
+    assert cache.is_verified("https://self-signed-ecf:1234/v1/functions/123/execute") is True
+    assert cache.unverified_hosts == {}
+
+def test_pinned_ca_bundle_is_used(mocker: MockerFixture):
+
+    mocker.patch("cognit.modules._faas_parser.FaasParser.deserialize", return_value=6)
+
+    mock_resp = mocker.Mock()
+    mock_resp.json.return_value = {"ret_code": 0, "res": "serialized_res", "err": None}
+    mock_post = mocker.patch("requests.Session.post", return_value=mock_resp)
+
+    ecf = EdgeClusterFrontendClient("the_token", "https://private-ecf", ca_bundle="/etc/cognit/ecf-ca.pem")
+    ecf.execute_function("123", 123, [2, 3])
+
+    # Assertions
+    assert mock_post.call_args.kwargs["verify"] == "/etc/cognit/ecf-ca.pem"
+
+@pytest.fixture
+def self_signed_ecf(tmp_path):
+
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is not installed")
+
+    cert, key = str(tmp_path / "ecf.pem"), str(tmp_path / "ecf.key")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=127.0.0.1",
+        "-addext", "subjectAltName=IP:127.0.0.1", "-keyout", key, "-out", cert], check=True, capture_output=True)
+
+    class Handler(BaseHTTPRequestHandler):
+
+        protocol_version = "HTTP/1.1"
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    yield f"https://127.0.0.1:{server.server_address[1]}", cert
+
+    server.shutdown()
+    server.server_close()
+
+def test_tls_modes_reuse_their_prebuilt_ssl_context(self_signed_ecf: tuple):
+
+    address, cert = self_signed_ecf
+    session = create_http_session()
+
+    # The first request fails the verification, the next ones go without it
+    unverified = EdgeClusterFrontendClient("the_token", address, session)
+    assert unverified.warm_up() is True
+    assert unverified.warm_up() is True
+
+    pinned = EdgeClusterFrontendClient("the_token", address, session, ca_bundle=cert)
+    assert pinned.warm_up() is True
+
+    # Assertions: one pool per verification mode, each one with the shared SSL context
+    contexts = [key.key_ssl_context for key in session.get_adapter(address).poolmanager.pools.keys()]
+
+    # The first, verified request included
+    assert len(contexts) == 3
+    assert get_ssl_context(False) in contexts
+    assert get_ssl_context(cert) in contexts
@@ -0,0 +1,118 @@
+from cognit.modules._function_id_cache import FunctionIdCache
+from pytest_mock import MockerFixture
+import json
+import time
+import os
+
+NAMESPACE = "https://cognit-lab-frontend.sovereignedge.eu|user"
+
+def test_ids_survive_a_restart(function_id_cache_path: str):
+
+    cache = FunctionIdCache(function_id_cache_path)
+    cache.put(NAMESPACE, "hash_a", 4079)
+    cache.stop()
+
+    # A new process reads the file
+    restarted = FunctionIdCache(function_id_cache_path)
+
+    assert restarted.get(NAMESPACE, "hash_a") == 4079
+    assert restarted.get(NAMESPACE, "hash_b") is None
+    assert restarted.get("https://other-frontend|user", "hash_a") is None
+
+def test_ids_read_from_disk_are_not_verified(function_id_cache_path: str):
+
+    cache = FunctionIdCache(function_id_cache_path)
+    cache.put(NAMESPACE, "hash_a", 4079)
+    cache.stop()
+
+    assert cache.is_verified(NAMESPACE, "hash_a") is True
+
+    restarted = FunctionIdCache(function_id_cache_path)
+    restarted.get(NAMESPACE, "hash_a")
+
+    assert restarted.is_verified(NAMESPACE, "hash_a") is False
+
+    restarted.set_verified(NAMESPACE, "hash_a")
+
+    assert restarted.is_verified(NAMESPACE, "hash_a") is True
+
+def test_least_recently_used_id_is_evicted(function_id_cache_path: str):
+
+    cache = FunctionIdCache(function_id_cache_path, max_entries=2)
+    cache.put(NAMESPACE, "hash_a", 1)
+    cache.put(NAMESPACE, "hash_b", 2)
+
+    # Using hash_a makes hash_b the least recently used
+    cache.get(NAMESPACE, "hash_a")
+    cache.put(NAMESPACE, "hash_c", 3)
+    cache.stop()
+
+    restarted = FunctionIdCache(function_id_cache_path, max_entries=2)
+
+    assert restarted.get(NAMESPACE, "hash_a") == 1
+    assert restarted.get(NAMESPACE, "hash_b") is None
+    assert restarted.get(NAMESPACE, "hash_c") == 3
+    assert len(restarted) == 2
+
+def test_removed_id_is_not_persisted(function_id_cache_path: str):
+
+    cache = FunctionIdCache(function_id_cache_path)
+    cache.put(NAMESPACE, "hash_a", 4079)
+    cache.remove(NAMESPACE, "hash_a")
+    cache.stop()
+
+    assert FunctionIdCache(function_id_cache_path).get(NAMESPACE, "hash_a") is None
+
+def test_corrupted_file_starts_empty(function_id_cache_path: str):
+
+    with open(function_id_cache_path, "w") as file:
+        file.write("{not json")
+
+    cache = FunctionIdCache(function_id_cache_path)
+
+    assert cache.get(NAMESPACE, "hash_a") is None
+
+    # The file is rewritten on the next upload
+    cache.put(NAMESPACE, "hash_a", 4079)
+    cache.stop()
+
+    with open(function_id_cache_path, "r") as file:
+        assert json.load(file)["namespaces"][NAMESPACE] == [["hash_a", 4079]]
+
+def test_changes_are_written_once_after_the_delay(mocker: MockerFixture, function_id_cache_path: str):
+
+    cache = FunctionIdCache(function_id_cache_path, flush_delay=0.2)
+    save = mocker.spy(cache, "_save")
+
+    # A burst of uploads is held in memory
+    for i in range(10):
+        cache.put(NAMESPACE, f"hash_{i}", i)
+
+    assert save.call_count == 0
+    assert os.path.exists(function_id_cache_path) is False
+
+    deadline = time.monotonic() + 5
+    while save.call_count == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    # The timer holds the lock until the file is written
+    with cache.write_mutex:
+        pass
+
+    # Written once, with all of them
+    assert save.call_count == 1
+    assert len(FunctionIdCache(function_id_cache_path)) == 10
+
+    # Nothing changed, nothing is written
+    cache.stop()
+    assert save.call_count == 1
+
+def test_stop_writes_pending_changes(function_id_cache_path: str):
+
+    cache = FunctionIdCache(function_id_cache_path, flush_delay=60)
+    cache.put(NAMESPACE, "hash_a", 4079)
+
+    cache.stop()
+
+    assert cache.flush_timer is None
+    assert FunctionIdCache(function_id_cache_path).get(NAMESPACE, "hash_a") == 4079
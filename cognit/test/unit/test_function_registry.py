@@ -0,0 +1,219 @@
+from cognit.modules._function_registry import FunctionRegistry, fingerprint_function
+from pytest_mock import MockerFixture
+
+def sum(a: int, b: int):
+    return a + b
+
+def test_function_serialized_only_once(mocker: MockerFixture):
+
+    registry = FunctionRegistry()
+    serialize = mocker.spy(registry.parser, "serialize")
+
+    function_hash = registry.get_hash(sum)
+    serialized = registry.get_serialized(sum)
+
+    # Assertions
+    for _ in range(10):
+        assert registry.get_hash(sum) == function_hash
+        assert registry.get_serialized(sum) == serialized
+
+    assert serialize.call_count == 1
+    assert len(registry) == 1
+
+def test_hash_does_not_serialize(mocker: MockerFixture):
+
+    registry = FunctionRegistry()
+    serialize = mocker.spy(registry.parser, "serialize")
+
+    registry.get_hash(sum)
+
+    serialize.assert_not_called()
+
+def test_changed_function_is_registered_again(mocker: MockerFixture):
+
+    registry = FunctionRegistry()
+
+    def mul(a, b=2):
+        return a * b
+
+    serialized = registry.get_serialized(mul)
+
+    # Replacing the default arguments invalidates the entry
+    mul.__defaults__ = (3,)
+
+    assert registry.get_serialized(mul) != serialized
+
+def test_entries_are_released_with_the_function():
+
+    registry = FunctionRegistry()
+
+    def mul(a, b):
+        return a * b
+
+    registry.get_hash(mul)
+    assert len(registry) == 1
+
+    del mul
+    assert len(registry) == 0
+
+def make_adder(n):
+    def add(a):
+        return a + n
+    return add
+
+def test_fingerprint_same_bytecode_different_constants():
+
+    def double(a):
+        return a * 2
+
+    def triple(a):
+        return a * 3
+
+    # Same bytecode, only the constants differ
+    assert double.__code__.co_code == triple.__code__.co_code
+    assert fingerprint_function(double) != fingerprint_function(triple)
+
+def test_fingerprint_closures_and_defaults():
+
+    def mul(a, b=2):
+        return a * b
+
+    def mul_3(a, b=3):
+        return a * b
+
+    assert fingerprint_function(make_adder(1)) != fingerprint_function(make_adder(2))
+    assert fingerprint_function(mul) != fingerprint_function(mul_3)
+
+def test_fingerprint_nested_code():
+
+    def outer_1(values):
+        return [v + 1 for v in values]
+
+    def outer_2(values):
+        return [v - 1 for v in values]
+
+    assert fingerprint_function(outer_1) != fingerprint_function(outer_2)
+
+def test_fingerprint_stable_across_redefinitions():
+
+    # The same source defined twice gives the same fingerprint
+    assert fingerprint_function(make_adder(5)) == fingerprint_function(make_adder(5))
+    assert fingerprint_function(lambda a: a + 1) == fingerprint_function(lambda a: a + 1)
+
+def test_fingerprint_recursive_closure():
+
+    def make_factorial():
+        def factorial(n):
+            return 1 if n <= 1 else n * factorial(n - 1)
+        return factorial
+
+    assert fingerprint_function(make_factorial()) == fingerprint_function(make_factorial())
+
+def test_fingerprint_self_referencing_containers():
+
+    def make_function(value):
+        return lambda: value
+
+    def make_list(last):
+        values = [1]
+        values.append(values)
+        values.append(last)
+        return values
+
+    def make_dict():
+        values = {"a": 1}
+        values["self"] = values
+        return values
+
+    # The cycle is fingerprinted instead of recursing forever
+    assert fingerprint_function(make_function(make_list(2))) == fingerprint_function(make_function(make_list(2)))
+    assert fingerprint_function(make_function(make_list(2))) != fingerprint_function(make_function(make_list(3)))
+    assert fingerprint_function(make_function(make_dict())) == fingerprint_function(make_function(make_dict()))
+
+def test_rebound_closure_is_registered_again():
+
+    registry = FunctionRegistry()
+    n = 2
+
+    def add(a):
+        return a + n
+
+    function_hash = registry.get_hash(add)
+
+    # A new value in the same cell invalidates the entry
+    n = 3
+
+    assert registry.get_hash(add) != function_hash
+    assert len(registry) == 1
+
+def test_function_with_mutable_closure_is_not_cached(mocker: MockerFixture):
+
+    registry = FunctionRegistry()
+    serialize = mocker.spy(registry.parser, "serialize")
+    weights = [1, 2]
+
+    def scale(a):
+        return [a * weight for weight in weights]
+
+    function_hash = registry.get_hash(scale)
+    serialized = registry.get_serialized(scale)
+
+    # The list changes in place, the function is fingerprinted and serialized again
+    weights.append(3)
+
+    assert registry.get_hash(scale) != function_hash
+    assert registry.get_serialized(scale) != serialized
+    assert serialize.call_count == 2
+    assert len(registry) == 0
+
+def test_function_capturing_a_class_is_not_cached():
+
+    registry = FunctionRegistry()
+
+    class Config:
+        factor = 2
+
+    def scale(a):
+        return a * Config.factor
+
+    function_hash = registry.get_hash(scale)
+
+    # A class attribute is reassigned, the function is fingerprinted again
+    Config.factor = 3
+
+    assert registry.get_hash(scale) != function_hash
+    assert len(registry) == 0
+
+def test_entry_of_a_function_that_cannot_be_cached_is_fingerprinted_once(mocker: MockerFixture):
+
+    registry = FunctionRegistry()
+    compute_hash = mocker.spy(registry, "_compute_hash")
+    weights = [1, 2]
+
+    def scale(a):
+        return [a * weight for weight in weights]
+
+    entry = registry.get_entry(scale)
+    serialized = registry.get_serialized(scale, entry)
+
+    # Assertions
+    assert serialized == entry.serialized
+    assert compute_hash.call_count == 1
+
+def test_fingerprint_is_computed_without_the_lock(mocker: MockerFixture):
+
+    registry = FunctionRegistry()
+    locked = []
+
+    def compute_hash(function):
+        locked.append(registry.mutex.locked())
+        return fingerprint_function(function)
+
+    mocker.patch.object(registry, "_compute_hash", side_effect=compute_hash)
+
+    registry.get_hash(sum)
+
+    # Assertions
+    assert locked == [False]
+    assert registry.get_hash(sum) == fingerprint_function(sum)
+    assert len(locked) == 1
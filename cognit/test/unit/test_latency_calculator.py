@@ -0,0 +1,77 @@
+from cognit.modules._latency_calculator import LatencyCalculator, get_host_and_port
+from pytest_mock import MockerFixture
+import socket
+import pytest
+import time
+
+@pytest.fixture
+def listeners() -> list[socket.socket]:
+
+    # The handshake completes in the backlog, nothing needs to accept the connections
+    sockets = []
+    for _ in range(2):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(16)
+        sockets.append(sock)
+
+    yield sockets
+
+    for sock in sockets:
+        sock.close()
+
+def get_closed_port() -> int:
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def test_get_host_and_port():
+
+    assert get_host_and_port("https://ecf.example.com/preprod/") == ("ecf.example.com", 443)
+    assert get_host_and_port("http://10.0.0.1:1234") == ("10.0.0.1", 1234)
+    assert get_host_and_port("ecf.example.com:8000/path") == ("ecf.example.com", 8000)
+    assert get_host_and_port("10.0.0.1") == ("10.0.0.1", 80)
+
+def test_measure_all_clusters(listeners: list[socket.socket]):
+
+    clusters = [f"http://127.0.0.1:{sock.getsockname()[1]}/path" for sock in listeners]
+
+    measurements = LatencyCalculator(samples=3, timeout=2).measure(clusters)
+
+    # Assertions
+    assert set(measurements) == set(clusters)
+
+    for measurement in measurements.values():
+        assert len(measurement.samples) == 3
+        assert measurement.median >= 0
+        assert measurement.jitter >= 0
+
+def test_unreachable_cluster_is_left_out(listeners: list[socket.socket]):
+
+    reachable = f"http://127.0.0.1:{listeners[0].getsockname()[1]}"
+    unreachable = f"http://127.0.0.1:{get_closed_port()}"
+
+    calculator = LatencyCalculator(samples=2, timeout=2)
+    latencies = calculator.get_latency_for_clusters([reachable, unreachable])
+
+    # Assertions
+    assert list(latencies) == [reachable]
+    assert calculator.calculate(unreachable) == -1.0
+    assert calculator.get_latency_for_clusters([unreachable]) == {}
+
+def test_clusters_are_probed_in_parallel_within_the_deadline(mocker: MockerFixture):
+
+    def slow_probe(cluster: str, deadline: float) -> list[float]:
+        time.sleep(0.2 if cluster == "http://slow" else 0.05)
+        return [1.0]
+
+    mocker.patch.object(LatencyCalculator, "_probe", side_effect=slow_probe, autospec=False)
+
+    start = time.monotonic()
+    latencies = LatencyCalculator(timeout=0.1).get_latency_for_clusters(["http://a", "http://b", "http://c", "http://slow"])
+    elapsed = time.monotonic() - start
+
+    # Assertions: three 50 ms probes do not add up, the slow one misses the deadline
+    assert elapsed < 0.15
+    assert set(latencies) == {"http://a", "http://b", "http://c"}
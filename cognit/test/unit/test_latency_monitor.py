@@ -0,0 +1,108 @@
+from cognit.modules._latency_calculator import LatencyCalculator, LatencyMeasurement
+from cognit.modules._latency_monitor import LatencyMonitor, LatencyStats
+from pytest_mock import MockerFixture
+import pytest
+
+@pytest.fixture
+def calculator(mocker: MockerFixture) -> LatencyCalculator:
+
+    calculator = LatencyCalculator()
+    latencies = {"https://ecf-0": [10.0, 12.0], "https://ecf-1": [30.0, 30.0]}
+
+    mocker.patch.object(calculator, "measure", side_effect=lambda addresses: {
+        address: LatencyMeasurement(latencies[address]) for address in addresses if address in latencies
+    })
+
+    return calculator
+
+def test_latency_stats_window():
+
+    stats = LatencyStats(window=100)
+
+    for latency in range(1, 201):
+        stats.add(float(latency))
+
+    summary = stats.get_summary()
+
+    # Assertions: the percentiles only cover the last 100 samples, 101 to 200
+    assert summary["samples"] == 200
+    assert summary["p50"] == 150.0
+    assert summary["p95"] == 195.0
+    assert summary["p99"] == 199.0
+    assert 180 < summary["ewma"] <= 200
+
+def test_cached_latencies_are_not_probed_again(calculator: LatencyCalculator):
+
+    monitor = LatencyMonitor(calculator)
+
+    latencies = monitor.get_latencies(["https://ecf-0", "https://ecf-1"])
+    latencies_again = monitor.get_latencies(["https://ecf-0", "https://ecf-1"])
+
+    # Assertions
+    assert latencies == latencies_again
+    assert latencies["https://ecf-0"] < latencies["https://ecf-1"]
+    assert calculator.measure.call_count == 1
+
+def test_calls_and_probes_are_kept_apart(calculator: LatencyCalculator):
+
+    monitor = LatencyMonitor(calculator)
+    monitor.set_addresses(["https://ecf-0", "https://ecf-1"])
+
+    monitor.probe()
+    monitor.add_call_sample("https://ecf-0", 250.0)
+
+    stats = monitor.get_stats()
+
+    # Assertions
+    assert stats["https://ecf-0"]["network"]["p50"] == 10.0
+    assert stats["https://ecf-0"]["call"]["p50"] == 250.0
+    assert stats["https://ecf-1"]["call"] is None
+
+    # A cluster no longer offered is forgotten
+    monitor.set_addresses(["https://ecf-1"])
+
+    assert list(monitor.get_stats()) == ["https://ecf-1"]
+
+def test_latencies_are_reported_in_batches(calculator: LatencyCalculator, mocker: MockerFixture):
+
+    report = mocker.Mock(side_effect=[False, True])
+    monitor = LatencyMonitor(calculator, report=report)
+    monitor.set_addresses(["https://ecf-0", "https://ecf-1"])
+
+    # Nothing measured yet
+    assert monitor.send_report() is True
+    assert report.call_count == 0
+
+    monitor.probe()
+
+    # The first report is rejected, the next one sends it again
+    assert monitor.send_report() is False
+    assert monitor.send_report() is True
+    assert monitor.send_report() is True
+
+    # Assertions
+    assert report.call_count == 2
+    assert set(report.call_args.args[0]) == {"https://ecf-0", "https://ecf-1"}
+
+def test_stale_latency_is_not_used_nor_reported(calculator: LatencyCalculator, mocker: MockerFixture):
+
+    now = mocker.patch("cognit.modules._latency_monitor.time.monotonic", return_value=1000.0)
+    report = mocker.Mock(return_value=True)
+    monitor = LatencyMonitor(calculator, probe_interval=30, report=report)
+    monitor.set_addresses(["https://ecf-0", "https://ecf-1"])
+
+    monitor.probe()
+
+    # ecf-1 stops answering the probes
+    calculator.measure.side_effect = lambda addresses: {address: LatencyMeasurement([10.0]) for address in addresses if address == "https://ecf-0"}
+
+    for _ in range(3):
+        now.return_value += 31
+        monitor.probe()
+
+    # Assertions
+    assert monitor.get_stats()["https://ecf-1"]["network"]["failures"] == 3
+    assert monitor.get_latencies(["https://ecf-0", "https://ecf-1"]) == {"https://ecf-0": pytest.approx(10.0, abs=1)}
+
+    monitor.send_report()
+    assert set(report.call_args.args[0]) == {"https://ecf-0"}
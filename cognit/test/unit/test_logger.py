@@ -0,0 +1,164 @@
+from cognit.modules._logger import CognitLogger, CognitFormatter, DroppingQueueHandler, RotatingLogFileHandler, configure_logging, LOG_FORMAT
+import inspect
+import time
+import os
+import logging
+import pytest
+import io
+
+@pytest.fixture
+def log_stream() -> io.StringIO:
+
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(CognitFormatter(LOG_FORMAT))
+
+    logger = logging.getLogger("cognit-logger")
+    level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+
+    yield stream
+
+    logger.removeHandler(handler)
+    logger.setLevel(level)
+
+class CountedArgument:
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "argument"
+
+def test_message_has_caller_location(log_stream: io.StringIO):
+
+    line = inspect.currentframe().f_lineno + 1
+    CognitLogger().info("Connected to %s", "ecf-0")
+
+    # Assertions
+    assert f"[test_logger.py::{line}] Connected to ecf-0" in log_stream.getvalue()
+
+def test_message_without_location(log_stream: io.StringIO):
+
+    CognitLogger(verbose=False).warning("Retrying in 5 s")
+
+    # Assertions
+    assert "] Retrying in 5 s" in log_stream.getvalue()
+    assert "test_logger.py" not in log_stream.getvalue()
+
+def test_disabled_level_does_not_format_arguments(log_stream: io.StringIO):
+
+    logger = CognitLogger()
+    argument = CountedArgument()
+
+    logger.set_level(logging.INFO)
+    logger.debug("Value: %s", argument)
+
+    assert argument.formatted == 0
+    assert log_stream.getvalue() == ""
+
+    logger.set_level(logging.DEBUG)
+    logger.debug("Value: %s", argument)
+
+    # Assertions, once per handler
+    assert argument.formatted > 0
+    assert "Value: argument" in log_stream.getvalue()
+
+def test_message_without_arguments_is_not_formatted(log_stream: io.StringIO):
+
+    CognitLogger().error("Battery at 100%")
+
+    # Assertions
+    assert "Battery at 100%" in log_stream.getvalue()
+
+def test_records_are_written_in_background(tmp_path):
+
+    log_file = str(tmp_path / "device_runtime.log")
+
+    configure_logging(level=logging.INFO, console_level=logging.CRITICAL, file=log_file)
+
+    try:
+        logger = CognitLogger()
+        logger.debug("Not written")
+        logger.info("Written by the writer thread")
+    finally:
+        # The records queued are written before the setup is replaced
+        configure_logging()
+
+    with open(log_file) as file:
+        content = file.read()
+
+    # Assertions
+    assert "Written by the writer thread" in content
+    assert "Not written" not in content
+
+def test_queue_drops_debug_first_and_reports_it():
+
+    handler = DroppingQueueHandler(queue_size=10)
+    logger = logging.getLogger("test-dropping-queue")
+
+    def record(level: int, message: str) -> logging.LogRecord:
+        return logger.makeRecord(logger.name, level, __file__, 0, message, None, None)
+
+    for i in range(20):
+        handler.emit(record(logging.DEBUG, f"debug {i}"))
+
+    # Debug records stop at the high water mark
+    assert handler.queue.qsize() == 8
+    assert handler.dropped == 12
+
+    # Once the writer catches up the next record reports the drops
+    while not handler.queue.empty():
+        handler.queue.get_nowait()
+
+    handler.emit(record(logging.WARNING, "back to normal"))
+
+    messages = [handler.queue.get_nowait().getMessage() for _ in range(2)]
+
+    assert messages[0] == "back to normal"
+    assert messages[1].startswith("12 log records were dropped")
+    assert handler.dropped == 0
+
+    # A full queue drops warnings too
+    for i in range(15):
+        handler.emit(record(logging.WARNING, f"warning {i}"))
+
+    # Assertions
+    assert handler.queue.qsize() == 10
+    assert handler.dropped == 5
+
+def test_log_file_rotation(tmp_path):
+
+    log_file = str(tmp_path / "device_runtime.log")
+    logger = logging.getLogger("test-rotation")
+
+    def record(message: str) -> logging.LogRecord:
+        return logger.makeRecord(logger.name, logging.INFO, __file__, 0, message, None, None)
+
+    # By size
+    handler = RotatingLogFileHandler(log_file, max_bytes=100, backup_count=2)
+
+    for i in range(20):
+        handler.emit(record(f"message number {i}"))
+
+    handler.close()
+
+    assert os.path.exists(log_file + ".1")
+    assert os.path.exists(log_file + ".2")
+    assert not os.path.exists(log_file + ".3")
+
+    # By time
+    log_file = str(tmp_path / "timed.log")
+    handler = RotatingLogFileHandler(log_file, max_bytes=0, backup_count=1, interval=0.05)
+    handler.emit(record("before"))
+    time.sleep(0.1)
+    handler.emit(record("after"))
+    handler.close()
+
+    with open(log_file) as file:
+        assert file.read().strip() == "after"
+
+    with open(log_file + ".1") as file:
+        assert file.read().strip() == "before"
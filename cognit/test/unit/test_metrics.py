@@ -0,0 +1,135 @@
+from cognit.modules._metrics import MetricsRegistry, MetricsServer, Metric, metrics, CALL_QUEUE_DEPTH, CALL_QUEUE_REJECTED, HTTP_BYTES_RECEIVED, \
+    CALLBACK_QUEUE_DEPTH, CALLBACK_DURATION
+from cognit.modules._callback_executor import CallbackExecutor
+from cognit.modules._http_session import create_http_session
+from cognit.modules._call_queue import CallQueue
+
+from pytest_mock import MockerFixture
+import urllib.request
+import pytest
+
+def test_render_text_format():
+
+    registry = MetricsRegistry()
+
+    requests = registry.counter("test_requests_total", "Requests sent", ("host",))
+    in_flight = registry.gauge("test_in_flight", "Requests in flight")
+    duration = registry.histogram("test_duration_seconds", "Request duration", buckets=(0.1, 1))
+
+    requests.labels("ecf-1").inc()
+    requests.labels("ecf-1").inc(2)
+    requests.labels('ecf"2').inc()
+    in_flight.inc()
+    duration.observe(0.05)
+    duration.observe(0.5)
+    duration.observe(5)
+
+    lines = registry.render().splitlines()
+
+    # Assertions
+    assert "# TYPE test_requests_total counter" in lines
+    assert 'test_requests_total{host="ecf-1"} 3' in lines
+    assert 'test_requests_total{host="ecf\\"2"} 1' in lines
+    assert "test_in_flight 1" in lines
+    assert 'test_duration_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_duration_seconds_bucket{le="1"} 2' in lines
+    assert 'test_duration_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_duration_seconds_sum 5.55" in lines
+    assert "test_duration_seconds_count 3" in lines
+
+def test_labels_and_names_are_checked():
+
+    registry = MetricsRegistry()
+    counter = registry.counter("test_total", "Test", ("a", "b"))
+
+    with pytest.raises(ValueError):
+        counter.labels("only_a")
+
+    with pytest.raises(ValueError):
+        registry.gauge("test_total", "Test")
+
+def test_gauge_function():
+
+    registry = MetricsRegistry()
+    gauge = registry.gauge("test_depth", "Depth")
+    gauge.set_function(lambda: 7)
+
+    # Assertions
+    assert gauge.get() == 7
+    assert "test_depth 7" in registry.render().splitlines()
+
+def test_call_queue_metrics():
+
+    rejected = CALL_QUEUE_REJECTED.get()
+    call_queue = CallQueue(size_limit=1)
+
+    assert call_queue.add_call("call")
+    assert CALL_QUEUE_DEPTH.get() == 1
+    assert not call_queue.add_call("call")
+
+    call_queue.get_call()
+
+    # Assertions
+    assert CALL_QUEUE_DEPTH.get() == 0
+    assert CALL_QUEUE_REJECTED.get() == rejected + 1
+
+def test_callback_metrics():
+
+    depth = CALLBACK_QUEUE_DEPTH.get()
+    count = CALLBACK_DURATION.children[()].histogram.count
+    executor = CallbackExecutor(pool_size=1)
+
+    # Submitted before the workers exist
+    for i in range(3):
+        executor.submit(lambda: None)
+
+    assert CALLBACK_QUEUE_DEPTH.get() == depth + 3
+
+    executor.start()
+    executor.stop()
+
+    # Assertions
+    assert CALLBACK_QUEUE_DEPTH.get() == depth
+    assert CALLBACK_DURATION.children[()].histogram.count == count + 3
+    assert "cognit_callback_duration_seconds_count" in metrics.render()
+
+def test_metric_must_create_its_children():
+
+    class Untyped(Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Untyped("test_untyped", "Metric without children")
+
+def test_http_bytes_are_counted(mocker: MockerFixture):
+
+    session = create_http_session()
+    received = HTTP_BYTES_RECEIVED.get("ecf.example:8000")
+
+    response = mocker.Mock(url="http://ecf.example:8000/v1/functions/1/execute", content=b"12345")
+    response.request.body = "[1, 2]"
+
+    for hook in session.hooks["response"]:
+        hook(response)
+
+    # Assertions
+    assert HTTP_BYTES_RECEIVED.get("ecf.example:8000") == received + 5
+
+def test_metrics_server():
+
+    registry = MetricsRegistry()
+    registry.counter("test_served_total", "Served").inc()
+
+    server = MetricsServer(registry, port=0)
+    server.start()
+
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            content_type = response.headers["Content-Type"]
+            body = response.read().decode()
+    finally:
+        server.stop()
+
+    # Assertions
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert "test_served_total 1" in body.splitlines()
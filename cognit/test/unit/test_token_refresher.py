@@ -0,0 +1,91 @@
+from cognit.modules._token_refresher import TokenRefresher, get_token_expiry
+from pytest_mock import MockerFixture
+from threading import Thread, Event
+import base64
+import json
+import time
+
+def make_token(expires_in: float) -> str:
+
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+    return f"{encode({'alg': 'HS256'})}.{encode({'sub': 'user', 'exp': time.time() + expires_in})}.signature"
+
+def test_get_token_expiry():
+
+    token = make_token(3600)
+
+    assert abs(get_token_expiry(token) - (time.time() + 3600)) < 5
+    assert get_token_expiry("not-a-jwt") is None
+    assert get_token_expiry(None) is None
+
+def test_refresh_is_scheduled_before_expiry():
+
+    refresher = TokenRefresher(lambda: None, lambda token: None, margin=60)
+
+    refresher.schedule(make_token(3600))
+    assert abs(refresher.refresh_at - (refresher.expires_at - 60)) < 1e-6
+
+    # Short-lived tokens are renewed halfway
+    refresher.schedule(make_token(40))
+    assert 15 < refresher.expires_at - refresher.refresh_at <= 20
+
+    refresher.schedule("opaque-token")
+    assert refresher.refresh_at is None
+
+def test_refresh_is_single_flight(mocker: MockerFixture):
+
+    release = Event()
+    new_token = make_token(3600)
+
+    def request_token():
+        release.wait(1)
+        return new_token
+
+    request = mocker.Mock(side_effect=request_token)
+    on_refresh = mocker.Mock()
+
+    refresher = TokenRefresher(request, on_refresh)
+    refresher.schedule(make_token(3600))
+
+    results = []
+    threads = [Thread(target=lambda: results.append(refresher.refresh())) for _ in range(4)]
+
+    for thread in threads:
+        thread.start()
+
+    release.set()
+
+    for thread in threads:
+        thread.join()
+
+    # Assertions
+    assert results == [new_token] * 4
+    assert request.call_count == 1
+    on_refresh.assert_called_once_with(new_token)
+
+def test_token_is_refreshed_in_background(mocker: MockerFixture):
+
+    refreshed = Event()
+    new_token = make_token(3600)
+    # The first attempt fails, the current token is kept until the next one
+    request = mocker.Mock(side_effect=[None, new_token])
+    on_refresh = mocker.Mock(side_effect=lambda token: refreshed.set())
+
+    mocker.patch("cognit.modules._token_refresher.TOKEN_REFRESH_RETRY_INTERVAL", 0.05)
+
+    refresher = TokenRefresher(request, on_refresh, margin=60)
+    refresher.start()
+
+    try:
+        # Short-lived, it is refreshed halfway through its life
+        refresher.schedule(make_token(0.4))
+        assert refreshed.wait(2)
+    finally:
+        refresher.stop()
+
+    # Assertions
+    assert request.call_count == 2
+    on_refresh.assert_called_once_with(new_token)
+    assert refresher.token == new_token
@@ -0,0 +1,49 @@
+# This is needed to run the example from the cognit source code
+# If you installed cognit with pip, you can remove this
+import sys
+sys.path.append(".")
+
+from cognit import async_device_runtime
+import asyncio
+
+# Functions used to be uploaded
+def suma(a: int, b: int):
+    return a + b
+
+def mult(a: int, b: int):
+    return a * b
+
+# Execution requirements, dependencies and policies
+REQS_INIT = {
+    "FLAVOUR": "SmartCity",
+    "GEOLOCATION": {
+        "latitude": 43.05,
+        "longitude": -2.53
+    }
+}
+
+async def main():
+
+    # Instantiate an asyncio Device Runtime
+    async with async_device_runtime.AsyncDeviceRuntime("./examples/cognit-template.yml") as my_device_runtime:
+
+        if not await my_device_runtime.init(REQS_INIT):
+            print("Device Runtime could not be initialized")
+            return
+
+        # Offload and wait for a function
+        result = await my_device_runtime.call(suma, 17, 5)
+
+        print("-----------------------------------------------")
+        print("Sum result: " + str(result))
+        print("-----------------------------------------------")
+
+        # Keep several offloads in flight from the same event loop
+        tasks = [my_device_runtime.submit(mult, i, 2, timeout=30) for i in range(10)]
+        results = await asyncio.gather(*tasks)
+
+        print("-----------------------------------------------")
+        print("Multiply results: " + str([result.res for result in results]))
+        print("-----------------------------------------------")
+
+asyncio.run(main())